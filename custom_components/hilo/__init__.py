@@ -9,11 +9,6 @@ import traceback
 from typing import List, Optional
 
 from aiohttp import CookieJar, client_exceptions
-from homeassistant.components.select import (
-    ATTR_OPTION,
-    DOMAIN as SELECT_DOMAIN,
-    SERVICE_SELECT_OPTION,
-)
 from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -24,7 +19,14 @@ from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP,
     Platform,
 )
-from homeassistant.core import Context, HomeAssistant, callback
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from homeassistant.helpers import (
     config_entry_oauth2_flow,
@@ -33,7 +35,9 @@ from homeassistant.helpers import (
 )
 from homeassistant.helpers.aiohttp_client import async_create_clientsession
 from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+import homeassistant.util.dt as dt_util
 from pyhilo import API
 from pyhilo.device import HiloDevice
 from pyhilo.devices import Devices
@@ -44,37 +48,62 @@ from pyhilo.signalr import SignalREvent, signalr_event_from_payload
 from pyhilo.util import from_utc_timestamp, time_diff
 from pysignalr.exceptions import ServerError as SignalRServerError
 
+from .bulk import BULK_SET_SCHEMA, async_bulk_set
+from .challenge import ChallengeEventStore, ChallengeMessageNormalizer
 from .config_flow import STEP_OPTION_SCHEMA, HiloFlowHandler
 from .const import (
+    CHALLENGE_EVENT_LIST_TIMEOUT,
+    CHALLENGE_LOCK_MARGIN,
     CONF_APPRECIATION_PHASE,
     CONF_CHALLENGE_LOCK,
+    CONF_ENERGY_METER_PERIOD,
     CONF_GENERATE_ENERGY_METERS,
     CONF_HQ_PLAN_NAME,
     CONF_LOG_TRACES,
     CONF_PRE_COLD_PHASE,
     CONF_TARIFF,
     CONF_TRACK_UNKNOWN_SOURCES,
+    CONF_UNRECORDED_ATTRIBUTES,
     CONF_UNTARIFICATED_DEVICES,
     DEFAULT_APPRECIATION_PHASE,
     DEFAULT_CHALLENGE_LOCK,
+    DEFAULT_ENERGY_METER_PERIOD,
     DEFAULT_GENERATE_ENERGY_METERS,
     DEFAULT_HQ_PLAN_NAME,
     DEFAULT_LOG_TRACES,
     DEFAULT_PRE_COLD_PHASE,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_TRACK_UNKNOWN_SOURCES,
+    DEFAULT_UNRECORDED_ATTRIBUTES,
     DEFAULT_UNTARIFICATED_DEVICES,
     DOMAIN,
     HILO_ENERGY_TOTAL,
     LOG,
     MIN_SCAN_INTERVAL,
+    SERVICE_BULK_SET,
+    SERVICE_RERUN_MIGRATIONS,
+)
+from .energy import EnergyAccumulator
+from .migrations import (
+    MIGRATION_CHALLENGE_IN_PROGRESS,
+    MIGRATION_ENTITY_IDS,
+    MIGRATION_GATEWAY_IDENTIFIER,
+    MIGRATION_UNIQUE_IDS,
+    MigrationTracker,
 )
 from .oauth2 import AuthCodeWithPKCEImplementation
+from .registry import EntityRegistryIndex
+from .subscriptions import ChallengeSubscriptionRegistry
 
 DISPATCHER_TOPIC_SIGNALR_EVENT = "pyhilo_signalr_event"
 SIGNAL_UPDATE_ENTITY = "pyhilo_device_update_{}"
+SIGNAL_CHALLENGE_UPDATE = "pyhilo_challenge_update_{}"
+SIGNAL_DEVICES_ADDED = "pyhilo_devices_added_{}"
+SIGNAL_DEVICE_RENAMED = "pyhilo_device_renamed_{}"
 COORDINATOR_AWARE_PLATFORMS = [Platform.SENSOR]
 PLATFORMS = COORDINATOR_AWARE_PLATFORMS + [
+    Platform.BINARY_SENSOR,
+    Platform.CALENDAR,
     Platform.CLIMATE,
     Platform.LIGHT,
     Platform.SWITCH,
@@ -97,9 +126,82 @@ GATEWAY_ENTITY_SUFFIXES = [
     "hilo_rate_low_threshold",
     "hilo_rate_reward_rate",
     "hilo_cost_total",
+    "defi_hilo_allowed_kwh",
+    "defi_hilo_used_kwh",
+    "defi_hilo_remaining_cash",
+    "defi_hilo_predicted_cash",
+    "defi_hilo_accumulated_cash",
 ]
 
 
+# Note (ic-dev21): This is a bit of a hack to rename some entities that were created with non-standard names in early versions
+# HA has changed the way they name entities linked to a device by default and this breaks the naming scheme of the gateway entities.
+# If we let the HA default behaviour, all gateway entities (such as challenge sensor) will be prefixed with "hilo_gateway_",
+# This code will check for the old entity IDs and rename them to the new format if they exist.
+GATEWAY_ENTITY_RENAMES = {
+    "sensor.hilo_gateway_defi_hilo": "sensor.defi_hilo",
+    "sensor.hilo_gateway_notifications_hilo": "sensor.notifications_hilo",
+    "sensor.hilo_gateway_recompenses_hilo": "sensor.recompenses_hilo",
+    "sensor.hilo_gateway_outdoor_weather_hilo": "sensor.outdoor_weather_hilo",
+    "sensor.hilo_gateway_hilo_rate_current": "sensor.hilo_rate_current",
+    "sensor.hilo_gateway_hilo_rate_low": "sensor.hilo_rate_low",
+    "sensor.hilo_gateway_hilo_rate_medium": "sensor.hilo_rate_medium",
+    "sensor.hilo_gateway_hilo_rate_access": "sensor.hilo_rate_access",
+    "sensor.hilo_gateway_hilo_rate_low_threshold": "sensor.hilo_rate_low_threshold",
+    "sensor.hilo_gateway_hilo_rate_reward_rate": "sensor.hilo_rate_reward_rate",
+    "sensor.hilo_gateway_hilo_cost_total": "sensor.hilo_cost_total",
+    "sensor.hilo_gateway": "sensor.hilo_gateway",
+}
+ENERGY_ENTITY_RENAMES = {
+    "sensor.meter00_hilo_energy_total": "sensor.hilo_energy_total",
+}
+
+
+def signalr_device_id(argument: int | dict) -> int | None:
+    """Return the id of the device a SignalR device message is about.
+
+    The device messages carry either the bare id or the device itself.
+    """
+    if isinstance(argument, dict):
+        argument = argument.get("deviceId", argument.get("id"))
+    try:
+        return int(argument)
+    except (TypeError, ValueError):
+        return None
+
+
+@callback
+def _async_rename_entity_ids(hass: HomeAssistant, renames: dict[str, str]) -> None:
+    """Rename entity ids created with non-standard names by early versions."""
+    entity_registry = er.async_get(hass)
+    for old_id, new_id in renames.items():
+        if old_id == new_id or not entity_registry.async_get(old_id):
+            continue
+        if entity_registry.async_get(new_id):
+            LOG.info(
+                "Skipping migration %s -> %s, target entity ID already registered",
+                old_id,
+                new_id,
+            )
+            entity_registry.async_update_entity(old_id, new_entity_id=new_id)
+            continue
+        entity_registry.async_update_entity(old_id, new_entity_id=new_id)
+        LOG.info("Migrated entity ID %s -> %s", old_id, new_id)
+
+
+@callback
+def _async_remove_challenge_in_progress_sensor(
+    hass: HomeAssistant, gateway: HiloDevice
+) -> None:
+    """Remove the enum sensor replaced by the challenge binary sensor."""
+    entity_registry = er.async_get(hass)
+    if entity_id := entity_registry.async_get_entity_id(
+        Platform.SENSOR, DOMAIN, f"{gateway.identifier.lower()}-defi_hilo_in_progress"
+    ):
+        LOG.info("Removing the former challenge sensor %s", entity_id)
+        entity_registry.async_remove(entity_id)
+
+
 @callback
 def _async_standardize_config_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Bring a config entry up to current standards."""
@@ -175,6 +277,33 @@ def _async_migrate_gateway_device_identifier(
     LOG.info("Migrated gateway device identifier %s -> %s", old_dsn, new_mac)
 
 
+@callback
+def _async_remove_stale_devices(
+    hass: HomeAssistant, entry: ConfigEntry, hilo: Hilo
+) -> None:
+    """Remove the registry devices which aren't in the Hilo app anymore.
+
+    The devices deleted while Home Assistant was stopped never got their
+    DeviceDeleted message.
+    """
+    devices = list(hilo.devices.all)
+    if hilo.unknown_tracker_device:
+        devices.append(hilo.unknown_tracker_device)
+    if not devices:
+        # Don't wipe the registry when the device list couldn't be fetched
+        return
+    known = {(DOMAIN, device.identifier) for device in devices}
+    device_registry = dr.async_get(hass)
+    for device_entry in dr.async_entries_for_config_entry(
+        device_registry, entry.entry_id
+    ):
+        if device_entry.identifiers.isdisjoint(known):
+            LOG.debug("Removing stale device %s", device_entry.name)
+            device_registry.async_update_device(
+                device_entry.id, remove_config_entry_id=entry.entry_id
+            )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Hilo as config entry."""
     HiloFlowHandler.async_register_implementation(
@@ -223,59 +352,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = hilo
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    if hilo.migrations.pending(MIGRATION_CHALLENGE_IN_PROGRESS):
+        if gateway := hilo.devices.find_device(1):
+            _async_remove_challenge_in_progress_sensor(hass, gateway)
+        hilo.migrations.async_mark_done(MIGRATION_CHALLENGE_IN_PROGRESS)
 
-    # Note (ic-dev21): This is a bit of a hack to rename some entities that were created with non-standard names in early versions
-    # HA has changed the way they name entities linked to a device by default and this breaks the naming scheme of the gateway entities.
-    # If we let the HA default behaviour, all gateway entities (such as challenge sensor) will be prefixed with "hilo_gateway_",
-    # This code will check for the old entity IDs and rename them to the new format if they exist.
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _async_remove_stale_devices(hass, entry, hilo)
+
+    if hilo.migrations.pending(MIGRATION_ENTITY_IDS):
+        _async_rename_entity_ids(hass, GATEWAY_ENTITY_RENAMES)
+        # Note (ic-dev21): this new renaming by HA also breaks sensor.hilo_energy_total, which is used in check_tarif
+        _async_rename_entity_ids(hass, ENERGY_ENTITY_RENAMES)
+    # Every entity has been created, their legacy unique ids are migrated
+    hilo.migrations.async_mark_done(MIGRATION_ENTITY_IDS, MIGRATION_UNIQUE_IDS)
+
+    async def async_rerun_migrations(_: ServiceCall) -> None:
+        """Run the one-shot migrations again by reloading the integration."""
+        hilo.migrations.async_reset()
+        await hass.config_entries.async_reload(entry.entry_id)
 
-    entity_registry = er.async_get(hass)
-    gateway_entity_renames = {
-        "sensor.hilo_gateway_defi_hilo": "sensor.defi_hilo",
-        "sensor.hilo_gateway_notifications_hilo": "sensor.notifications_hilo",
-        "sensor.hilo_gateway_recompenses_hilo": "sensor.recompenses_hilo",
-        "sensor.hilo_gateway_outdoor_weather_hilo": "sensor.outdoor_weather_hilo",
-        "sensor.hilo_gateway_hilo_rate_current": "sensor.hilo_rate_current",
-        "sensor.hilo_gateway_hilo_rate_low": "sensor.hilo_rate_low",
-        "sensor.hilo_gateway_hilo_rate_medium": "sensor.hilo_rate_medium",
-        "sensor.hilo_gateway_hilo_rate_access": "sensor.hilo_rate_access",
-        "sensor.hilo_gateway_hilo_rate_low_threshold": "sensor.hilo_rate_low_threshold",
-        "sensor.hilo_gateway_hilo_rate_reward_rate": "sensor.hilo_rate_reward_rate",
-        "sensor.hilo_gateway_hilo_cost_total": "sensor.hilo_cost_total",
-        "sensor.hilo_gateway": "sensor.hilo_gateway",
-    }
-    for old_id, new_id in gateway_entity_renames.items():
-        if old_id == new_id or not entity_registry.async_get(old_id):
-            continue
-        if entity_registry.async_get(new_id):
-            LOG.info(
-                "Skipping migration %s -> %s, target entity ID already registered",
-                old_id,
-                new_id,
-            )
-            entity_registry.async_update_entity(old_id, new_entity_id=new_id)
-            continue
-        entity_registry.async_update_entity(old_id, new_entity_id=new_id)
-        LOG.info("Migrated entity ID %s -> %s", old_id, new_id)
+    hass.services.async_register(
+        DOMAIN, SERVICE_RERUN_MIGRATIONS, async_rerun_migrations
+    )
 
-    # Note (ic-dev21): this new renaming by HA also breaks sensor.hilo_energy_total, which is used in check_tarif
-    energy_entity_renames = {
-        "sensor.meter00_hilo_energy_total": "sensor.hilo_energy_total"
-    }
-    for old_id, new_id in energy_entity_renames.items():
-        if old_id == new_id or not entity_registry.async_get(old_id):
-            continue
-        if entity_registry.async_get(new_id):
-            LOG.info(
-                "Skipping migration %s -> %s, target entity ID already registered",
-                old_id,
-                new_id,
-            )
-            entity_registry.async_update_entity(old_id, new_entity_id=new_id)
-            continue
-        entity_registry.async_update_entity(old_id, new_entity_id=new_id)
-        LOG.info("Migrated entity ID %s -> %s", old_id, new_id)
+    async def async_bulk_set_service(call: ServiceCall) -> ServiceResponse:
+        """Send the commands of many entities at once."""
+        locked = hilo.challenge_lock and hilo.in_reduction_phase()
+        return await async_bulk_set(hass, call.data, locked)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_SET,
+        async_bulk_set_service,
+        schema=BULK_SET_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
 
     async def handle_debug_event(event: Event):
         """Handle an event."""
@@ -347,10 +459,23 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         LOG.debug("Hilo Integration unloaded")
         hass.data[DOMAIN].pop(entry.entry_id)
+        hass.services.async_remove(DOMAIN, SERVICE_RERUN_MIGRATIONS)
+        hass.services.async_remove(DOMAIN, SERVICE_BULK_SET)
 
     return unload_ok
 
 
+async def async_remove_config_entry_device(
+    hass: HomeAssistant, entry: ConfigEntry, device_entry: dr.DeviceEntry
+) -> bool:
+    """Allow removing the devices which aren't in the Hilo app anymore."""
+    hilo = hass.data[DOMAIN][entry.entry_id]
+    return not any(
+        (DOMAIN, device.identifier) in device_entry.identifiers
+        for device in hilo.devices.all
+    )
+
+
 async def async_migrate_entry(hass, config_entry: ConfigEntry):
     """Migrate old entry."""
     LOG.debug("Migrating from version %s", config_entry.version)
@@ -386,17 +511,36 @@ class Hilo:
         self._signalr_reconnect_tasks: list[asyncio.Task | None] = [None, None]
         self._update_task: list[asyncio.Task | None] = [None, None]
         self.subscriptions: List[Optional[asyncio.Task]] = [None]
+        self.challenge_subscriptions = ChallengeSubscriptionRegistry(
+            self._async_invoke_challenge_subscription
+        )
+        self.challenge_messages = ChallengeMessageNormalizer()
+        # Set when the plan specific hub didn't send the event list in time
+        self._legacy_challenges_fallback = False
+        self._cancel_event_list_timeout: CALLBACK_TYPE | None = None
         self.hq_plan_name = entry.options.get(CONF_HQ_PLAN_NAME, DEFAULT_HQ_PLAN_NAME)
         self.appreciation = entry.options.get(
             CONF_APPRECIATION_PHASE, DEFAULT_APPRECIATION_PHASE
         )
         self.pre_cold = entry.options.get(CONF_PRE_COLD_PHASE, DEFAULT_PRE_COLD_PHASE)
+        self.challenge_events = ChallengeEventStore(self.appreciation, self.pre_cold)
+        self._entity_index: EntityRegistryIndex | None = None
+        self.migrations = MigrationTracker(hass, entry)
+        self.energy = EnergyAccumulator(
+            hass,
+            period=entry.options.get(
+                CONF_ENERGY_METER_PERIOD, DEFAULT_ENERGY_METER_PERIOD
+            ),
+        )
         self.challenge_lock = entry.options.get(
             CONF_CHALLENGE_LOCK, DEFAULT_CHALLENGE_LOCK
         )
         self.track_unknown_sources = entry.options.get(
             CONF_TRACK_UNKNOWN_SOURCES, DEFAULT_TRACK_UNKNOWN_SOURCES
         )
+        self.unrecorded_attributes = frozenset(
+            entry.options.get(CONF_UNRECORDED_ATTRIBUTES, DEFAULT_UNRECORDED_ATTRIBUTES)
+        )
         self.untarificated_devices = entry.options.get(
             CONF_UNTARIFICATED_DEVICES, DEFAULT_UNTARIFICATED_DEVICES
         )
@@ -417,8 +561,45 @@ class Hilo:
 
     async def _on_challenges_connected(self) -> None:
         """Trigger challenge subscriptions after the challenge hub connects."""
-        await self.subscribe_to_challenge()
+        self.challenge_messages.reset()
+        replayed = await self.challenge_subscriptions.async_replay()
+        if not replayed and self.challenge_id:
+            await self.subscribe_to_challenge(replay=False)
         await self.subscribe_to_challengelist()
+        self._async_wait_for_event_list()
+
+    @callback
+    def _async_wait_for_event_list(self) -> None:
+        """Fall back on the legacy methods if the event list doesn't come."""
+        self._async_cancel_event_list_timeout()
+        if (
+            self.hq_plan_name in ("rate d", "flex d")
+            and self.challenge_messages.legacy_needed
+            and not self._legacy_challenges_fallback
+        ):
+            self._cancel_event_list_timeout = async_call_later(
+                self._hass, CHALLENGE_EVENT_LIST_TIMEOUT, self._async_event_list_timeout
+            )
+
+    @callback
+    def _async_cancel_event_list_timeout(self) -> None:
+        if self._cancel_event_list_timeout is not None:
+            self._cancel_event_list_timeout()
+            self._cancel_event_list_timeout = None
+
+    async def _async_event_list_timeout(self, _now: datetime) -> None:
+        self._cancel_event_list_timeout = None
+        if not self.challenge_messages.legacy_needed:
+            return
+        LOG.warning(
+            "No event list received from the %s hub within %s seconds, "
+            "falling back on the legacy challenge methods",
+            self.hq_plan_name,
+            CHALLENGE_EVENT_LIST_TIMEOUT,
+        )
+        self._legacy_challenges_fallback = True
+        await self.subscribe_to_challengelist()
+        await self.challenge_subscriptions.async_replay()
 
     def validate_heartbeat(self, event: SignalREvent) -> None:
         """Validate heartbeat messages from SignalR."""
@@ -433,58 +614,34 @@ class Hilo:
 
     async def _handle_signalr_message(self, event):
         """Process SignalR messages and notify listeners."""
-
-        # TODO: ic-dev21: This needs to be cleaned up and optimized
         LOG.debug("Received SignalR message type: %s", event)
         target = event.target
-        LOG.debug("handle_signalr_message_target %s", target)
-        msg_data = event
-        LOG.debug("handle_signalr_message_ msg_data %s", msg_data)
-
-        if target in [
-            "ChallengeListInitialValuesReceived",
-            "EventListInitialValuesReceived",
-        ]:
-            msg_type = "challenge_list_initial"
-        elif target in ["ChallengeAdded", "EventAdded"]:
-            msg_type = "challenge_added"
-        elif target in [
-            "ChallengeDetailsUpdated",
-            "ChallengeConsumptionUpdatedValuesReceived",
-            "EventCHConsumptionUpdatedValuesReceived",
-            "ChallengeDetailsUpdatedValuesReceived",
-            "EventCHDetailsUpdatedValuesReceived",
-            "EventFlexDetailsUpdatedValuesReceived",
-            "ChallengeDetailsInitialValuesReceived",
-            "EventCHDetailsInitialValuesReceived",
-            "EventFlexDetailsInitialValuesReceived",
-            "ChallengeListUpdatedValuesReceived",
-            "EventListUpdatedValuesReceived",
-        ]:
-            msg_type = "challenge_details_update"
-        elif target == "EventFlexConsumptionUpdatedValuesReceived":
+        if target == "EventFlexConsumptionUpdatedValuesReceived":
             LOG.debug("%s message received", target)
-            LOG.debug("%s data: %s", target, msg_data)
+            LOG.debug("%s data: %s", target, event)
             return
 
+        if not isinstance(event, SignalREvent):
+            LOG.warning(f"SHOULD NOT HAPPEN: Not SignalREvent: {event}")
+            payload = event
+        elif event.arguments:  # ic-dev21 check if there are arguments
+            payload = event.arguments[0]
+        else:
+            LOG.warning(f"SHOULD NOT HAPPEN: Received empty arguments for {target}")
+            return
+
+        # Legacy and plan specific hubs send the same updates, only pass along
+        # the canonical version once.
+        if (normalized := self.challenge_messages.normalize(target, payload)) is None:
+            return
+        msg_type, payload = normalized
+
         # ic-dev21 Notify listeners
+        handler_name = f"handle_{msg_type}"
         for listener in self._signalr_listeners:
-            handler_name = f"handle_{msg_type}"
-            if hasattr(listener, handler_name):
-                handler = getattr(listener, handler_name)
+            if handler := getattr(listener, handler_name, None):
                 try:
-                    # ic-dev21 Extract the arguments from the SignalREvent object
-                    if isinstance(msg_data, SignalREvent):
-                        arguments = msg_data.arguments
-                        if arguments:  # ic-dev21 check if there are arguments
-                            await handler(arguments[0])
-                        else:
-                            LOG.warning(
-                                f"SHOULD NOT HAPPEN: Received empty arguments for {msg_type}"
-                            )
-                    else:
-                        LOG.warning(f"SHOULD NOT HAPPEN: Not SignalREvent: {msg_data}")
-                        await handler(msg_data)
+                    await handler(payload)
                 except Exception as e:
                     LOG.error("Error in SignalR handler %s: %s", handler_name, e)
                     LOG.error(traceback.format_exc())
@@ -516,10 +673,11 @@ class Hilo:
             challenges = event.arguments[0]
 
             for challenge in challenges:
-                challenge_id = challenge.get("id")
                 self.challenge_phase = challenge.get("currentPhase")
                 self.challenge_id = challenge.get("id")
-                await self.subscribe_to_challenge(challenge_id)
+            await self.subscribe_to_challenges(
+                [challenge.get("id") for challenge in challenges]
+            )
 
         elif event.target == "EventCHDetailsUpdatedValuesReceived":
             LOG.debug("EventCHDetailsUpdatedValuesReceived")
@@ -544,6 +702,7 @@ class Hilo:
                 # Device list will refresh on next SignalR reconnect/subscribe
 
             updated_devices = self.devices.parse_values_received(event.arguments[0])
+            self.energy.async_sample(updated_devices)
             # NOTE(dvd): If we don't do this, we need to wait until the coordinator
             # runs (scan_interval) to have updated data in the dashboard.
             for device in updated_devices:
@@ -556,22 +715,26 @@ class Hilo:
 
         elif event.target == "DeviceListUpdatedValuesReceived":
             # This message only contains display information, such as the Device's name (as set in the app), it's groupid, icon, etc.
-            # Updating the device name causes issues in the integration, it detects it as a new device and creates a new entity.
-            # Ignore this call, for now... (update_devicelist_from_signalr does work, but causes the issue above)
-            # await self.devices.update_devicelist_from_signalr(event.arguments[0])
-            LOG.debug(
-                "Received 'DeviceListUpdatedValuesReceived' message, not implemented yet."
-            )
+            # update_devicelist_from_signalr would make a renamed device look new, so the
+            # names are applied in place instead.
+            self.async_rename_devices(event.arguments[0])
 
         elif event.target == "DevicesListChanged":
             LOG.debug("Received 'DevicesListChanged' message, not implemented yet.")
 
         elif event.target == "DeviceAdded":
+            known = {device.id for device in self.devices.all}
             devices = [event.arguments[0]]
             await self.devices.add_device_from_signalr(devices)
+            added = [device for device in self.devices.all if device.id not in known]
+            if added:
+                LOG.debug("Adding the entities of %s", [d.name for d in added])
+                async_dispatcher_send(
+                    self._hass, SIGNAL_DEVICES_ADDED.format(self.entry.entry_id), added
+                )
 
         elif event.target == "DeviceDeleted":
-            LOG.debug("Received 'DeviceDeleted' message, not implemented yet.")
+            self.async_remove_device(signalr_device_id(event.arguments[0]))
 
         elif event.target == "GatewayValuesReceived":
             gateway = self.devices.find_device(1)
@@ -580,11 +743,57 @@ class Hilo:
                 LOG.debug("Updated Gateway's deviceId from default 1 to %s", gateway.id)
 
             updated_devices = self.devices.parse_values_received(event.arguments[0])
+            self.energy.async_sample(updated_devices)
             for device in updated_devices:
                 async_dispatcher_send(
                     self._hass, SIGNAL_UPDATE_ENTITY.format(device.id)
                 )
 
+    @callback
+    def async_remove_device(self, device_id: int | None) -> None:
+        """Forget a device deleted from the Hilo app, along with its entities.
+
+        Removing the config entry from the registry device removes the device
+        and its registry entities, which removes the entities from hass.
+        """
+        if (device := self.devices.find_device(device_id)) is None:
+            LOG.debug("Deleted device %s isn't known, ignoring", device_id)
+            return
+        LOG.debug("Removing device %s (%s)", device.name, device_id)
+        self.devices.all.remove(device)
+        registry = dr.async_get(self._hass)
+        device_entry = registry.async_get_device(
+            identifiers={(DOMAIN, device.identifier)}
+        )
+        if device_entry is not None:
+            registry.async_update_device(
+                device_entry.id, remove_config_entry_id=self.entry.entry_id
+            )
+
+    @callback
+    def async_rename_devices(self, items: list[dict]) -> None:
+        """Apply the device names set in the Hilo app to the known devices.
+
+        The devices are looked up by id, so a renamed device keeps its
+        registry device and its entities, which follow the new name.
+        """
+        registry = dr.async_get(self._hass)
+        for item in items:
+            device = self.devices.find_device(signalr_device_id(item))
+            name = item.get("name")
+            if device is None or not name or name == device.name:
+                continue
+            LOG.debug("Device %s renamed to %s", device.name, name)
+            old_name, device.name = device.name, name
+            device_entry = registry.async_get_device(
+                identifiers={(DOMAIN, device.identifier)}
+            )
+            if device_entry is not None:
+                registry.async_update_device(device_entry.id, name=name)
+            async_dispatcher_send(
+                self._hass, SIGNAL_DEVICE_RENAMED.format(device.id), old_name
+            )
+
     @callback
     async def on_signalr_event(self, event: SignalREvent) -> None:
         """Define a callback for receiving a SignalR event."""
@@ -613,10 +822,31 @@ class Hilo:
         )
 
     @callback
-    async def subscribe_to_challenge(self, event_id: int = 0) -> None:
-        """Send the json payload to receive updates from the challenge."""
+    async def subscribe_to_challenge(
+        self, event_id: int = 0, *, replay: bool = True, force: bool = False
+    ) -> None:
+        """Subscribe to a challenge, unless it's already subscribed.
+
+        Set replay to False for one-off subscriptions which shouldn't be
+        replayed after a reconnect and force to subscribe again anyway.
+        """
         LOG.debug("Subscribing to challenge : %s or %s", event_id, self.challenge_id)
         event_id = event_id or self.challenge_id
+        await self.challenge_subscriptions.async_subscribe(
+            [event_id], replay=replay, force=force
+        )
+
+    async def subscribe_to_challenges(
+        self, event_ids: list[int], *, replay: bool = True
+    ) -> None:
+        """Subscribe to several challenges concurrently, skipping duplicates."""
+        await self.challenge_subscriptions.async_subscribe(
+            [event_id for event_id in event_ids if event_id is not None],
+            replay=replay,
+        )
+
+    async def _async_invoke_challenge_subscription(self, event_id: int) -> None:
+        """Send the json payload to receive updates from the challenge."""
         LOG.debug("API URN is %s", self._api.urn)
         # Get plan name to connect to the correct challenge hub list
         tarif_config = self.hq_plan_name
@@ -624,14 +854,15 @@ class Hilo:
 
         # TODO: This is a fallback but will eventually need to be removed, I expect it to create
         # websocket disconnects once the split is complete.
-        LOG.warning(
-            "Starting legacy connection to ChallengeHub. Your tarif is %s, and will also attempt connection. This can be safely ignored. This will be deprecated",
-            tarif_config,
-        )
-        await self._api.signalr_challenges.invoke(
-            "SubscribeToChallenge",
-            [{"locationId": self.devices.location_id, "eventId": event_id}],
-        )
+        if self.legacy_challenges_needed:
+            LOG.warning(
+                "Starting legacy connection to ChallengeHub. Your tarif is %s, and will also attempt connection. This can be safely ignored. This will be deprecated",
+                tarif_config,
+            )
+            await self._api.signalr_challenges.invoke(
+                "SubscribeToChallenge",
+                [{"locationId": self.devices.location_id, "eventId": event_id}],
+            )
 
         # Subscribe to the correct challenge hub
         if tarif_config == "rate d":
@@ -652,6 +883,32 @@ class Hilo:
                 [{"locationId": self.devices.location_id, "eventId": event_id}],
             )
 
+    def in_reduction_phase(self) -> bool:
+        """Return whether a challenge is in its reduction phase right now.
+
+        The reduction window is cached by the challenge event store, the
+        margin leaves a moment around the phase boundaries unlocked.
+        """
+        now = dt_util.utcnow()
+        if (window := self.challenge_events.reduction_window(now)) is None:
+            return False
+        margin = timedelta(minutes=CHALLENGE_LOCK_MARGIN)
+        return window[0] + margin < now < window[1] - margin
+
+    @property
+    def legacy_challenges_needed(self) -> bool:
+        """Return whether the legacy ChallengeHub methods should still be used.
+
+        Plans without a dedicated event hub always need them. The others only
+        fall back on them when their hub didn't send the event list within
+        CHALLENGE_EVENT_LIST_TIMEOUT seconds, and stop for good once it does.
+        """
+        if self.hq_plan_name not in ("rate d", "flex d"):
+            return True
+        return (
+            self._legacy_challenges_fallback and self.challenge_messages.legacy_needed
+        )
+
     @callback
     async def subscribe_to_challengelist(self) -> None:
         """Send the json payload to receive updates from the challenge list."""
@@ -661,10 +918,11 @@ class Hilo:
         )
         LOG.debug("API URN is %s", self._api.urn)
 
-        await self._api.signalr_challenges.invoke(
-            "SubscribeToChallengeList",
-            [{"locationId": self.devices.location_id}],
-        )
+        if self.legacy_challenges_needed:
+            await self._api.signalr_challenges.invoke(
+                "SubscribeToChallengeList",
+                [{"locationId": self.devices.location_id}],
+            )
 
         LOG.debug("Subscribing to event list at location %s", self.devices.location_id)
         await self._api.signalr_challenges.invoke(
@@ -678,15 +936,16 @@ class Hilo:
         event_id = event_id or self.challenge_id
 
         # TODO: Remove fallback once split is complete
-        LOG.debug(
-            "Requesting challenge %s consumption update at location %s",
-            event_id,
-            self.devices.location_id,
-        )
-        await self._api.signalr_challenges.invoke(
-            "RequestChallengeConsumptionUpdate",
-            [{"locationId": self.devices.location_id, "eventId": event_id}],
-        )
+        if self.legacy_challenges_needed:
+            LOG.debug(
+                "Requesting challenge %s consumption update at location %s",
+                event_id,
+                self.devices.location_id,
+            )
+            await self._api.signalr_challenges.invoke(
+                "RequestChallengeConsumptionUpdate",
+                [{"locationId": self.devices.location_id, "eventId": event_id}],
+            )
 
         # Get plan name to request the correct consumption update
         tarif_config = self.hq_plan_name
@@ -709,16 +968,6 @@ class Hilo:
                 "RequestEventFlexConsumptionUpdate",
                 [{"locationHiloId": self._api.urn, "eventId": event_id}],
             )
-        else:
-            LOG.debug(
-                "Requesting challenge %s consumption update at location %s",
-                event_id,
-                self.devices.location_id,
-            )
-            await self._api.signalr_challenges.invoke(
-                "RequestChallengeConsumptionUpdate",
-                [{"locationId": self.devices.location_id, "eventId": event_id}],
-            )
 
     @callback
     def _get_unknown_source_tracker(self) -> HiloDevice:
@@ -843,13 +1092,14 @@ class Hilo:
         # Step 6: Migrate gateway identity (DSN -> MAC) if needed, then register
         # custom devices in HA.
         gateway = self.devices.find_device(1)
-        if gateway:
+        if gateway and self.migrations.pending(MIGRATION_GATEWAY_IDENTIFIER):
             old_dsn = await self._fetch_legacy_gateway_dsn(gateway.identifier)
             if old_dsn:
                 _async_migrate_gateway_device_identifier(
                     self._hass, self.entry, old_dsn, gateway.identifier
                 )
                 self.async_migrate_gateway_entities(old_dsn, gateway.identifier)
+            self.migrations.async_mark_done(MIGRATION_GATEWAY_IDENTIFIER)
         _async_register_custom_device(self._hass, self.entry, gateway)
 
         if self.track_unknown_sources:
@@ -872,6 +1122,7 @@ class Hilo:
                 EVENT_HOMEASSISTANT_STOP, signalr_disconnect_listener
             )
         )
+        self.entry.async_on_unload(self._async_cancel_event_list_timeout)
         self.coordinator = DataUpdateCoordinator(
             self._hass,
             LOG,
@@ -1114,10 +1365,7 @@ class Hilo:
             self.high_times,
         )
 
-        # ic-dev21 : make sure the select for all meters still work by moving this here
-        for state in self._hass.states.async_all():
-            entity = state.entity_id
-            self.set_tarif(entity, state.state, tarif)
+        self.energy.async_set_tariff(tarif)
 
     def handle_unknown_power(self):
         """Take care of the unknown source meter."""
@@ -1154,7 +1402,7 @@ class Hilo:
                     f"value of total_power ({total_power} not initialized correctly)"
                 )
 
-            self.devices.parse_values_received(
+            updated_devices = self.devices.parse_values_received(
                 [
                     {
                         "deviceId": 69420,
@@ -1166,6 +1414,7 @@ class Hilo:
                     }
                 ]
             )
+            self.energy.async_sample(updated_devices)
             LOG.debug(
                 "Currently in use: Total: %s Known sources: %s Unknown sources: %s",
                 total_power.state,
@@ -1204,37 +1453,17 @@ class Hilo:
             )
             self.set_state(entity, None, new_attrs=new_attrs, keep_state=True)
 
-    @callback
-    def set_tarif(self, entity, current, new):
-        """Set the tarif on the select entity if needed."""
-        if self.untarificated_devices and entity != f"select.{HILO_ENERGY_TOTAL}":
-            return
-        if entity.startswith("select.hilo_energy") and current != new:
-            LOG.debug(
-                "check_tarif: Changing tarif of %s from %s to %s", entity, current, new
-            )
-            context = Context()
-            data = {ATTR_OPTION: new, "entity_id": entity}
-            self._hass.async_create_task(
-                self._hass.services.async_call(
-                    SELECT_DOMAIN, SERVICE_SELECT_OPTION, data, context=context
-                )
-            )
-        if (
-            entity.startswith("select.")
-            and entity.endswith("_hilo_energy")
-            and current != new
-        ):
-            LOG.debug(
-                "check_tarif: Changing tarif of %s from %s to %s", entity, current, new
-            )
-            context = Context()
-            data = {ATTR_OPTION: new, "entity_id": entity}
-            self._hass.async_create_task(
-                self._hass.services.async_call(
-                    SELECT_DOMAIN, SERVICE_SELECT_OPTION, data, context=context
-                )
+    @property
+    def entity_index(self) -> EntityRegistryIndex:
+        """Return the index of the Hilo entities of the entity registry.
+
+        It is built once, the first time entities are created.
+        """
+        if self._entity_index is None:
+            self._entity_index = EntityRegistryIndex(
+                er.async_get(self._hass).entities.values()
             )
+        return self._entity_index
 
     @callback
     def async_migrate_unique_id(
@@ -1247,6 +1476,11 @@ class Hilo:
             old_unique_id,
             platform,
         )
+        if not self.migrations.pending(MIGRATION_UNIQUE_IDS):
+            return
+        if self.entity_index.get(platform, old_unique_id) is None:
+            LOG.debug("Unique ID %s does not need to be migrated", old_unique_id)
+            return
         entity_registry = er.async_get(self._hass)
         # async_get_entity_id wants the "HILO" domain
         # in the platform field and the actual platform in the domain
@@ -1278,8 +1512,16 @@ class Hilo:
             new_unique_id,
         )
         entity_registry.async_update_entity(entity_id, new_unique_id=new_unique_id)
+        self.entity_index.move(platform, old_unique_id, new_unique_id)
 
     @callback
     def handle_subscription_result(self, hilo_id: str) -> None:
-        """Handle subscription result by notifying entities."""
+        """Handle subscription result by notifying entities.
+
+        The power of the device is sampled first, so the energy changes with
+        the power instead of waiting for the next catch-up.
+        """
+        device = next((d for d in self.devices.all if d.hilo_id == hilo_id), None)
+        if device is not None:
+            self.energy.async_sample([device])
         async_dispatcher_send(self._hass, SIGNAL_UPDATE_ENTITY.format(hilo_id))
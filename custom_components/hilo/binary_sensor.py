@@ -0,0 +1,77 @@
+"""Support for the Hilo challenge binary sensor."""
+
+from __future__ import annotations
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+import homeassistant.util.dt as dt_util
+from pyhilo.device import HiloDevice
+
+from . import SIGNAL_CHALLENGE_UPDATE, SIGNAL_DEVICES_ADDED, Hilo
+from .const import DOMAIN, LOG
+from .entity import HiloEntity
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the Hilo challenge binary sensor based on a config entry."""
+    hilo = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_devices(devices: list[HiloDevice]) -> None:
+        entities = []
+        for d in devices:
+            if d.type == "Gateway":
+                entities.append(HiloChallengeInProgressSensor(hilo, d))
+        async_add_entities(entities)
+
+    async_add_devices(hilo.devices.all)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
+
+
+class HiloChallengeInProgressSensor(HiloEntity, BinarySensorEntity):
+    """Whether the next challenge is in its appreciation, preheat or reduction.
+
+    The phases come from the challenge event store, kept up to date by the
+    challenge sensor which signals every change and phase boundary.
+    """
+
+    _attr_should_poll = False
+    _attr_icon = "mdi:progress-clock"
+
+    def __init__(self, hilo: Hilo, device: HiloDevice) -> None:
+        """Initialize the binary sensor."""
+        self._attr_name = "Defi Hilo en cours"
+        super().__init__(hilo, name=self._attr_name, device=device)
+        self._attr_unique_id = f"{device.identifier.lower()}-defi_hilo_in_progress"
+        LOG.debug("Setting up ChallengeInProgress entity: %s", self._attr_name)
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update whether the next challenge is in progress."""
+        super()._async_update_attrs()
+        self._attr_is_on = self._hilo.challenge_events.in_progress(dt_util.utcnow())
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the updates of the challenge events."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_CHALLENGE_UPDATE.format(self._hilo.entry.entry_id),
+                self._async_challenges_updated,
+            )
+        )
+
+    @callback
+    def _async_challenges_updated(self) -> None:
+        self._async_update_attrs()
+        self.async_write_ha_state()
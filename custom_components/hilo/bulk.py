@@ -0,0 +1,167 @@
+"""Bulk commands of the Hilo integration."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    ATTR_STATE,
+    ATTR_TEMPERATURE,
+    Platform,
+)
+from homeassistant.core import HomeAssistant, ServiceResponse, split_entity_id
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import async_get_platforms
+import voluptuous as vol
+
+from .const import (
+    ATTR_COMMANDS,
+    ATTR_MAX_CONCURRENCY,
+    ATTR_RETRIES,
+    BULK_SET_CONCURRENCY,
+    BULK_SET_RETRIES,
+    BULK_SET_RETRY_DELAY,
+    DOMAIN,
+    LOG,
+)
+
+Command = Callable[[], Awaitable[Any]]
+
+BULK_SET_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_COMMANDS): vol.All(
+            cv.ensure_list,
+            [
+                vol.All(
+                    {
+                        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+                        vol.Exclusive(ATTR_TEMPERATURE, "value"): vol.Coerce(float),
+                        vol.Exclusive(ATTR_STATE, "value"): cv.boolean,
+                    },
+                    cv.has_at_least_one_key(ATTR_TEMPERATURE, ATTR_STATE),
+                )
+            ],
+        ),
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=BULK_SET_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=20)
+        ),
+        vol.Optional(ATTR_RETRIES, default=BULK_SET_RETRIES): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=5)
+        ),
+    }
+)
+
+
+def hilo_entities(hass: HomeAssistant) -> dict[str, Entity]:
+    """Return the Hilo entities by entity id."""
+    return {
+        entity_id: entity
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity_id, entity in platform.entities.items()
+    }
+
+
+def entity_command(
+    entity: Entity | None, temperature: float | None, state: bool | None
+) -> Command | str:
+    """Return the command setting a value on an entity, or why it can't."""
+    if entity is None:
+        return "Not a Hilo entity"
+    domain = split_entity_id(entity.entity_id)[0]
+    if temperature is not None:
+        if domain != Platform.CLIMATE:
+            return "Only climate entities have a target temperature"
+        return lambda: entity.async_write_target_temperature(temperature)
+    if domain not in (Platform.LIGHT, Platform.SWITCH):
+        return "Only lights and switches can be turned on or off"
+    return entity.async_turn_on if state else entity.async_turn_off
+
+
+async def async_run_bulk(
+    commands: dict[str, Command],
+    max_concurrency: int = BULK_SET_CONCURRENCY,
+    retries: int = BULK_SET_RETRIES,
+    retry_delay: float = BULK_SET_RETRY_DELAY,
+) -> dict[str, dict[str, Any]]:
+    """Run the commands concurrently and return the result of each entity.
+
+    At most ``max_concurrency`` commands run at the same time. A failed
+    command is retried ``retries`` times, waiting a bit longer each time.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def async_run(entity_id: str, command: Command) -> dict[str, Any]:
+        started = time.monotonic()
+        attempts = 0
+        while True:
+            attempts += 1
+            # The slot is released while waiting to retry, so a failing
+            # device doesn't hold back the others
+            async with semaphore:
+                try:
+                    await command()
+                except Exception as err:  # pylint: disable=broad-except
+                    error = err
+                else:
+                    return {
+                        "success": True,
+                        "attempts": attempts,
+                        "duration": round(time.monotonic() - started, 3),
+                    }
+            if attempts > retries:
+                LOG.error("Unable to update %s: %s", entity_id, error)
+                return {
+                    "success": False,
+                    "attempts": attempts,
+                    "duration": round(time.monotonic() - started, 3),
+                    "error": str(error),
+                }
+            LOG.debug("Retrying %s after error: %s", entity_id, error)
+            await asyncio.sleep(retry_delay * 2 ** (attempts - 1))
+
+    results = await asyncio.gather(
+        *(async_run(entity_id, command) for entity_id, command in commands.items())
+    )
+    return dict(zip(commands, results))
+
+
+async def async_bulk_set(
+    hass: HomeAssistant, data: dict[str, Any], challenge_locked: bool
+) -> ServiceResponse:
+    """Handle the bulk_set service and return the result of every entity."""
+    started = time.monotonic()
+    entities = hilo_entities(hass)
+    commands: dict[str, Command] = {}
+    results: dict[str, dict[str, Any]] = {}
+    for item in data[ATTR_COMMANDS]:
+        temperature = item.get(ATTR_TEMPERATURE)
+        for entity_id in item[ATTR_ENTITY_ID]:
+            if temperature is not None and challenge_locked:
+                command = "Challenge lock is active"
+            else:
+                command = entity_command(
+                    entities.get(entity_id), temperature, item.get(ATTR_STATE)
+                )
+            if isinstance(command, str):
+                results[entity_id] = {
+                    "success": False,
+                    "attempts": 0,
+                    "duration": 0,
+                    "error": command,
+                }
+                continue
+            commands[entity_id] = command
+    results.update(
+        await async_run_bulk(commands, data[ATTR_MAX_CONCURRENCY], data[ATTR_RETRIES])
+    )
+    return {
+        "duration": round(time.monotonic() - started, 3),
+        "results": [
+            {ATTR_ENTITY_ID: entity_id, **result}
+            for entity_id, result in results.items()
+        ],
+    }
@@ -0,0 +1,111 @@
+"""Support for the Hilo challenge calendar."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+import homeassistant.util.dt as dt_util
+from pyhilo.device import HiloDevice
+
+from . import SIGNAL_CHALLENGE_UPDATE, SIGNAL_DEVICES_ADDED, Hilo
+from .const import DOMAIN, LOG
+from .entity import HiloEntity
+
+PHASE_NAMES = {
+    "pre_cold": "Pré-refroidissement",
+    "appreciation": "Appréciation",
+    "pre_heat": "Préchauffage",
+    "reduction": "Réduction",
+    "recovery": "Reprise",
+}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the Hilo challenge calendar based on a config entry."""
+    hilo = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_devices(devices: list[HiloDevice]) -> None:
+        entities = []
+        for d in devices:
+            if d.type == "Gateway":
+                entities.append(HiloChallengeCalendar(hilo, d))
+        async_add_entities(entities)
+
+    async_add_devices(hilo.devices.all)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
+
+
+class HiloChallengeCalendar(HiloEntity, CalendarEntity):
+    """Calendar of the phases of the upcoming challenges.
+
+    The phases come from the challenge event store, which is kept up to date
+    by the challenge sensor.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(self, hilo: Hilo, device: HiloDevice) -> None:
+        """Initialize the calendar."""
+        self._attr_name = "Defi Hilo"
+        super().__init__(hilo, name=self._attr_name, device=device)
+        self._attr_unique_id = f"{device.identifier.lower()}-defi_hilo_calendar"
+        LOG.debug("Setting up ChallengeCalendar entity: %s", self._attr_name)
+
+    def _phase_events(self) -> list[CalendarEvent]:
+        """Return a calendar event per phase of the stored challenges."""
+        events = []
+        for timeline in self._hilo.challenge_events.timelines():
+            for phase, start, end in timeline.phases:
+                events.append(
+                    CalendarEvent(
+                        start=start,
+                        end=end,
+                        summary=f"Défi Hilo: {PHASE_NAMES.get(phase, phase)}",
+                        uid=f"{timeline.event_id}-{phase}",
+                    )
+                )
+        events.sort(key=lambda event: event.start)
+        return events
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        """Return the ongoing phase or the next one."""
+        now = dt_util.utcnow()
+        return next((event for event in self._phase_events() if event.end > now), None)
+
+    async def async_get_events(
+        self, hass: HomeAssistant, start_date: datetime, end_date: datetime
+    ) -> list[CalendarEvent]:
+        """Return the phases between two dates."""
+        return [
+            event
+            for event in self._phase_events()
+            if event.start < end_date and event.end > start_date
+        ]
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the updates of the challenge events."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_CHALLENGE_UPDATE.format(self._hilo.entry.entry_id),
+                self._async_challenges_updated,
+            )
+        )
+
+    @callback
+    def _async_challenges_updated(self) -> None:
+        self.async_write_ha_state()
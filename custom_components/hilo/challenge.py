@@ -0,0 +1,588 @@
+"""Challenge (event) helpers for the Hilo integration."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Iterable, Iterator
+
+from pyhilo.event import Event
+
+from .const import ALLOWED_WH_REFRESH_INTERVAL, CONSUMPTION_REFRESH_INTERVALS, LOG
+
+MSG_CHALLENGE_LIST_INITIAL = "challenge_list_initial"
+MSG_CHALLENGE_ADDED = "challenge_added"
+MSG_CHALLENGE_DETAILS_UPDATE = "challenge_details_update"
+
+CHALLENGE_MESSAGE_TYPES = {
+    "ChallengeListInitialValuesReceived": MSG_CHALLENGE_LIST_INITIAL,
+    "EventListInitialValuesReceived": MSG_CHALLENGE_LIST_INITIAL,
+    "ChallengeAdded": MSG_CHALLENGE_ADDED,
+    "EventAdded": MSG_CHALLENGE_ADDED,
+    "ChallengeDetailsUpdated": MSG_CHALLENGE_DETAILS_UPDATE,
+    "ChallengeConsumptionUpdatedValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "EventCHConsumptionUpdatedValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "ChallengeDetailsUpdatedValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "EventCHDetailsUpdatedValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "EventFlexDetailsUpdatedValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "ChallengeDetailsInitialValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "EventCHDetailsInitialValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "EventFlexDetailsInitialValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "ChallengeListUpdatedValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+    "EventListUpdatedValuesReceived": MSG_CHALLENGE_DETAILS_UPDATE,
+}
+
+# Keys which only identify the location in one of the two hub schemas, they
+# don't carry any information about the event itself.
+TRANSPORT_KEYS = frozenset({"locationId", "locationHiloId"})
+# Consumption values sent nested in a "consumption" object by one schema and
+# at the top level by the other.
+CONSUMPTION_KEYS = ("cumulativeBaselinePoints",)
+
+# Number of (message type, event id) fingerprints to remember
+MAX_FINGERPRINTS = 256
+
+
+def is_legacy_target(target: str) -> bool:
+    """Return whether a SignalR target comes from the legacy Challenge methods."""
+    return target.startswith("Challenge")
+
+
+def canonical_challenge(payload: Any) -> Any:
+    """Map a challenge payload from either hub schema to a canonical form."""
+    if isinstance(payload, list):
+        return [canonical_challenge(item) for item in payload]
+    if not isinstance(payload, dict):
+        return payload
+    canonical = {k: v for k, v in payload.items() if k not in TRANSPORT_KEYS}
+    consumption = canonical.get("consumption")
+    if isinstance(consumption, dict):
+        for key in CONSUMPTION_KEYS:
+            if key in consumption and canonical.get(key) is None:
+                canonical[key] = consumption[key]
+    return canonical
+
+
+def _fingerprint(payload: Any) -> str:
+    content = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def _event_id(payload: Any) -> Any:
+    if isinstance(payload, dict):
+        return payload.get("id")
+    if isinstance(payload, list) and len(payload) == 1:
+        return _event_id(payload[0])
+    return None
+
+
+class ChallengeMessageNormalizer:
+    """Normalize challenge hub messages before they reach the listeners.
+
+    Since we subscribe to both the legacy Challenge* methods and the plan
+    specific EventCH*/EventFlex* methods, the same update often comes in
+    twice. Both schemas are mapped to one canonical payload and an update
+    is dropped when its content is identical to the last one received for
+    the same message type and event id.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the normalizer."""
+        self._fingerprints: OrderedDict[tuple, str] = OrderedDict()
+        self._new_hub_list = False
+
+    @property
+    def legacy_needed(self) -> bool:
+        """Return whether the legacy Challenge subscriptions are still needed.
+
+        Once the plan specific hub has delivered the event list, every update
+        we get from the legacy methods is a duplicate.
+        """
+        return not self._new_hub_list
+
+    def normalize(self, target: str, payload: Any) -> tuple[str, Any] | None:
+        """Return the message type and canonical payload, None to drop it."""
+        if (msg_type := CHALLENGE_MESSAGE_TYPES.get(target)) is None:
+            LOG.debug("No challenge handler for %s", target)
+            return None
+
+        if (
+            msg_type == MSG_CHALLENGE_LIST_INITIAL
+            and not is_legacy_target(target)
+            and self.legacy_needed
+        ):
+            LOG.info(
+                "Event list received through %s, legacy challenge "
+                "subscriptions are no longer needed",
+                target,
+            )
+            self._new_hub_list = True
+
+        canonical = canonical_challenge(payload)
+        key = (msg_type, _event_id(canonical))
+        fingerprint = _fingerprint(canonical)
+        if self._fingerprints.get(key) == fingerprint:
+            LOG.debug("Dropping duplicate %s for event %s", target, key[1])
+            return None
+        self._fingerprints[key] = fingerprint
+        self._fingerprints.move_to_end(key)
+        if len(self._fingerprints) > MAX_FINGERPRINTS:
+            self._fingerprints.popitem(last=False)
+        return msg_type, canonical
+
+    def reset(self) -> None:
+        """Start over when the challenge hub reconnects.
+
+        The updates are sent again on the new connection. Whether the plan
+        specific hub has answered is kept, it doesn't go back to the legacy
+        methods.
+        """
+        self._fingerprints.clear()
+
+
+# Phases of an event in chronological order, with the sensor state for each
+CHALLENGE_PHASES = (
+    ("pre_cold", "pre_cold"),
+    ("appreciation", "appreciation"),
+    ("preheat", "pre_heat"),
+    ("reduction", "reduction"),
+    ("recovery", "recovery"),
+)
+# The event stays "completed" this long after the recovery before going "off"
+COMPLETED_DURATION = timedelta(minutes=5)
+
+
+class ChallengeTimeline:
+    """Phase boundaries of an event, computed once per change of its phases.
+
+    ``state_at`` mirrors pyhilo's ``Event.state`` without having to build a
+    new ``Event`` every time the state is read, and ``next_boundary`` tells
+    when that state will change next so a timer can be armed for it.
+    """
+
+    __slots__ = ("event_id", "phases", "preheat_start", "recovery_end", "_boundaries")
+
+    def __init__(self, event: Event) -> None:
+        """Precompute the phase boundaries of an event."""
+        self.event_id = event.event_id
+        self.phases: list[tuple[str, datetime, datetime]] = []
+        for phase, state in CHALLENGE_PHASES:
+            start = getattr(event, f"{phase}_start", None)
+            end = getattr(event, f"{phase}_end", None)
+            if start and end:
+                self.phases.append((state, start, end))
+        self.preheat_start: datetime | None = getattr(event, "preheat_start", None)
+        self.recovery_end: datetime | None = getattr(event, "recovery_end", None)
+        boundaries = {t for _, start, end in self.phases for t in (start, end)}
+        if self.recovery_end:
+            boundaries.add(self.recovery_end + COMPLETED_DURATION)
+        self._boundaries = sorted(boundaries)
+
+    def state_at(self, now: datetime) -> str:
+        """Return the state of the event at a given time."""
+        for state, start, end in self.phases:
+            if state == "pre_heat" and now < start:
+                return "scheduled"
+            if start <= now < end:
+                return state
+        if self.preheat_start and now < self.preheat_start:
+            return "scheduled"
+        if self.recovery_end:
+            if now >= self.recovery_end + COMPLETED_DURATION:
+                return "off"
+            if now >= self.recovery_end:
+                return "completed"
+        return "unknown"
+
+    def next_boundary(self, now: datetime) -> datetime | None:
+        """Return the next time the state of the event changes, if any."""
+        index = bisect_right(self._boundaries, now)
+        if index < len(self._boundaries):
+            return self._boundaries[index]
+        return None
+
+
+# Fields which can be patched on an existing Event without parsing it again
+IN_PLACE_FIELDS = {
+    "isParticipating": "participating",
+    "isConfigurable": "configurable",
+    "period": "period",
+}
+# Consumption values handled through update_consumption, not the payload
+CONSUMPTION_ONLY_KEYS = frozenset({"cumulativeBaselinePoints", "currentWh"})
+
+
+class ChallengeEntry:
+    """An event of the store with its raw payload, timeline and rendering."""
+
+    __slots__ = ("raw", "event", "timeline", "_rendered")
+
+    def __init__(self, raw: dict[str, Any], event: Event) -> None:
+        """Initialize the entry."""
+        self.raw = raw
+        self.event = event
+        self.timeline = ChallengeTimeline(event)
+        self._rendered: dict[str, Any] | None = None
+
+    @property
+    def sort_key(self) -> tuple:
+        """Return the key used to order the events by preheat start."""
+        return (self.timeline.preheat_start, self.event.event_id)
+
+    def changed(self, phases: bool = False) -> None:
+        """Invalidate the cached rendering after the event was modified."""
+        if phases:
+            self.timeline = ChallengeTimeline(self.event)
+        self._rendered = None
+
+    def render(self, now: datetime) -> dict[str, Any]:
+        """Return the event as a dict, only rebuilt when it changed.
+
+        A new dict is returned when the state changes so the previous state
+        written to Home Assistant is never modified in place.
+        """
+        state = self.timeline.state_at(now)
+        if self._rendered is None:
+            self._rendered = {**self.event.as_dict(), "state": state}
+        elif self._rendered.get("state") != state:
+            self._rendered = {**self._rendered, "state": state}
+        return self._rendered
+
+
+IN_PROGRESS_STATES = frozenset({"appreciation", "pre_heat", "reduction"})
+
+
+class ChallengeEventStore:
+    """Incremental store of the upcoming and ongoing challenge events.
+
+    Updates are merged into the stored raw payload and only the fields which
+    changed are applied to the existing ``Event``. Events are kept ordered by
+    preheat start and each one keeps its rendered dict until it changes.
+    """
+
+    def __init__(self, appreciation: int = 0, pre_cold: int = 0) -> None:
+        """Initialize the store with the optional phases to add to events."""
+        self._appreciation = appreciation
+        self._pre_cold = pre_cold
+        self._entries: dict[Any, ChallengeEntry] = {}
+        self._order: list[tuple] = []
+        self._reduction_window: tuple[datetime, datetime] | None = None
+        self._reduction_window_stale = True
+
+    def __contains__(self, event_id: Any) -> bool:
+        """Return whether the event is in the store."""
+        return event_id in self._entries
+
+    def __len__(self) -> int:
+        """Return the number of events in the store."""
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Event]:
+        """Iterate over the events ordered by preheat start."""
+        return (self._entries[event_id].event for _, event_id in self._order)
+
+    def get(self, event_id: Any) -> Event | None:
+        """Return an event of the store."""
+        entry = self._entries.get(event_id)
+        return entry.event if entry else None
+
+    def first_id(self) -> Any:
+        """Return the id of the next event, if any."""
+        return self._order[0][1] if self._order else None
+
+    def oldest_id(self) -> Any:
+        """Return the id of the event with the earliest recovery end."""
+        if not self._entries:
+            return None
+        return min(
+            self._entries,
+            key=lambda event_id: (
+                self._entries[event_id].timeline.recovery_end
+                or datetime.max.replace(tzinfo=timezone.utc)
+            ),
+        )
+
+    def timelines(self) -> list[ChallengeTimeline]:
+        """Return the timelines ordered by preheat start."""
+        return [self._entries[event_id].timeline for _, event_id in self._order]
+
+    def states(self, now: datetime) -> list[tuple[Event, str]]:
+        """Return the events along with their phase at the given time."""
+        return [
+            (entry.event, entry.timeline.state_at(now))
+            for entry in (self._entries[event_id] for _, event_id in self._order)
+        ]
+
+    def in_progress(self, now: datetime) -> bool:
+        """Return whether the next event is in its appreciation, preheat or reduction."""
+        timelines = self.timelines()
+        return bool(timelines) and timelines[0].state_at(now) in IN_PROGRESS_STATES
+
+    def as_list(self, now: datetime) -> list[dict[str, Any]]:
+        """Return the rendered events ordered by preheat start."""
+        return [self._entries[event_id].render(now) for _, event_id in self._order]
+
+    def _build_event(self, payload: dict[str, Any]) -> Event:
+        event = Event(**payload)
+        if self._appreciation > 0:
+            event.appreciation(self._appreciation)
+        if self._pre_cold > 0:
+            event.pre_cold(self._pre_cold)
+        return event
+
+    def reduction_window(self, now: datetime) -> tuple[datetime, datetime] | None:
+        """Return the ongoing or next reduction phase among all the events.
+
+        The window is cached until the events change or it is over, so checking
+        it again and again is a simple comparison.
+        """
+        window = self._reduction_window
+        if self._reduction_window_stale or (window is not None and now >= window[1]):
+            self._reduction_window = min(
+                (
+                    (start, end)
+                    for entry in self._entries.values()
+                    for phase, start, end in entry.timeline.phases
+                    if phase == "reduction" and end > now
+                ),
+                default=None,
+            )
+            self._reduction_window_stale = False
+        return self._reduction_window
+
+    def _insert(self, entry: ChallengeEntry) -> None:
+        insort(self._order, entry.sort_key)
+        self._entries[entry.event.event_id] = entry
+        self._reduction_window_stale = True
+
+    def _unlink(self, entry: ChallengeEntry) -> None:
+        self._reduction_window_stale = True
+        index = bisect_left(self._order, entry.sort_key)
+        if index < len(self._order) and self._order[index] == entry.sort_key:
+            del self._order[index]
+
+    def add(self, payload: dict[str, Any]) -> Event:
+        """Add or replace an event from a hub payload."""
+        raw = {k: v for k, v in payload.items() if k not in CONSUMPTION_ONLY_KEYS}
+        entry = ChallengeEntry(raw, self._build_event(raw))
+        if (current := self._entries.pop(entry.event.event_id, None)) is not None:
+            self._unlink(current)
+        self._insert(entry)
+        return entry.event
+
+    def dump(self) -> list[dict[str, Any]]:
+        """Return the events as JSON serializable data to be restored later."""
+        return [
+            {
+                "raw": entry.raw,
+                "allowed_kWh": entry.event.allowed_kWh,
+                "used_kWh": entry.event.used_kWh,
+            }
+            for entry in (self._entries[event_id] for _, event_id in self._order)
+        ]
+
+    def restore(self, data: list[dict[str, Any]], now: datetime) -> None:
+        """Restore the events dumped before a restart, skipping the old ones."""
+        for item in data:
+            try:
+                event = self.add(item["raw"])
+            except (KeyError, TypeError, ValueError) as err:
+                LOG.warning("Unable to restore challenge %s: %s", item, err)
+                continue
+            entry = self._entries[event.event_id]
+            if entry.timeline.state_at(now) in ("off", "unknown"):
+                self.remove(event.event_id)
+                continue
+            event.allowed_kWh = item.get("allowed_kWh") or event.allowed_kWh
+            event.used_kWh = item.get("used_kWh") or event.used_kWh
+
+    def reconcile(self, payloads: list[dict[str, Any]]) -> bool:
+        """Replace the events with a full list from the hub.
+
+        Events which are still there are patched so what we already know,
+        like their consumption, is kept. Return whether anything changed.
+        """
+        incoming = {payload["id"]: payload for payload in payloads}
+        changed = False
+        for event_id in self._entries.keys() - incoming.keys():
+            changed |= self.remove(event_id)
+        for event_id, payload in incoming.items():
+            if event_id in self._entries:
+                changed |= self.patch(event_id, payload)
+            else:
+                self.add(payload)
+                changed = True
+        return changed
+
+    def remove(self, event_id: Any) -> bool:
+        """Remove an event, return whether it was in the store."""
+        if (entry := self._entries.pop(event_id, None)) is None:
+            return False
+        self._unlink(entry)
+        return True
+
+    def clear(self) -> None:
+        """Remove all the events."""
+        self._entries.clear()
+        self._order.clear()
+        self._reduction_window_stale = True
+
+    def patch(
+        self, event_id: Any, payload: dict[str, Any], allowed_wh: float = 0
+    ) -> bool:
+        """Apply the fields of a payload which changed, return whether any did."""
+        if (entry := self._entries.get(event_id)) is None:
+            return False
+        changed = {
+            k: v
+            for k, v in payload.items()
+            if k not in CONSUMPTION_ONLY_KEYS and entry.raw.get(k) != v
+        }
+        if changed:
+            entry.raw.update(changed)
+            if changed.keys() <= IN_PLACE_FIELDS.keys():
+                for key, value in changed.items():
+                    setattr(entry.event, IN_PLACE_FIELDS[key], value)
+                entry.changed()
+            else:
+                self._reparse(entry)
+        if allowed_wh > 0 and entry.event.allowed_kWh != round(allowed_wh / 1000, 2):
+            entry.event.update_allowed_wh(allowed_wh)
+            entry.changed()
+            return True
+        return bool(changed)
+
+    def _reparse(self, entry: ChallengeEntry) -> None:
+        """Parse the event again after a structural change such as its phases."""
+        previous = entry.event
+        event = self._build_event(entry.raw)
+        if event.allowed_kWh <= 0 < previous.allowed_kWh:
+            event.allowed_kWh = previous.allowed_kWh
+        self._unlink(entry)
+        entry.event = event
+        entry.changed(phases=True)
+        self._insert(entry)
+
+    def update_consumption(
+        self, event_id: Any, used_wh: float, allowed_wh: float = 0
+    ) -> bool:
+        """Update the consumption of an event from a consumption frame."""
+        if (entry := self._entries.get(event_id)) is None:
+            return False
+        entry.event.update_wh(used_wh)
+        if allowed_wh > 0:
+            entry.event.update_allowed_wh(allowed_wh)
+        entry.changed()
+        return True
+
+
+class ConsumptionRefreshController:
+    """Pace the consumption update requests of the ongoing challenge.
+
+    Requests are only sent for a single event per cycle, at an interval
+    depending on its phase, and skipped altogether while consumption frames
+    keep coming in on their own.
+    """
+
+    def __init__(
+        self,
+        request: Callable[[Any], Awaitable[None]],
+        subscribe: Callable[[Any], Awaitable[None]],
+        intervals: dict[str, int] = CONSUMPTION_REFRESH_INTERVALS,
+    ) -> None:
+        """Initialize the controller with the hub request callables."""
+        self._request = request
+        self._subscribe = subscribe
+        self._intervals = {
+            state: timedelta(seconds=seconds) for state, seconds in intervals.items()
+        }
+        self._allowed_wh_interval = timedelta(seconds=ALLOWED_WH_REFRESH_INTERVAL)
+        self._last_frame: dict[Any, datetime] = {}
+        self._last_request: dict[Any, datetime] = {}
+
+    def frame_received(self, event_id: Any, now: datetime) -> None:
+        """Record that a consumption frame came in for an event."""
+        self._last_frame[event_id] = now
+
+    def forget(self, event_id: Any) -> None:
+        """Forget an event which is over."""
+        self._last_frame.pop(event_id, None)
+        self._last_request.pop(event_id, None)
+
+    def _due(self, event_id: Any, now: datetime, interval: timedelta) -> bool:
+        last = max(
+            self._last_frame.get(event_id, datetime.min.replace(tzinfo=timezone.utc)),
+            self._last_request.get(event_id, datetime.min.replace(tzinfo=timezone.utc)),
+        )
+        return now - last >= interval
+
+    async def async_refresh(
+        self, events: Iterable[tuple[Event, str]], now: datetime
+    ) -> Any:
+        """Send at most one refresh, return the id of the refreshed event."""
+        for event, state in events:
+            event_id = event.event_id
+            if event.should_check_for_allowed_wh():
+                if not self._due(event_id, now, self._allowed_wh_interval):
+                    continue
+                LOG.debug("Refreshing allowed_wh of challenge %s", event_id)
+                # Subscribing again gets us the initial values with the allowed_wh
+                await self._subscribe(event_id)
+            elif (interval := self._intervals.get(state)) is None:
+                continue
+            elif not self._due(event_id, now, interval):
+                LOG.debug(
+                    "Consumption of challenge %s is up to date, not requesting",
+                    event_id,
+                )
+                return None
+            else:
+                LOG.debug("Requesting consumption of challenge %s", event_id)
+            self._last_request[event_id] = now
+            await self._request(event_id)
+            return event_id
+        return None
+
+
+CHALLENGE_METRICS = (
+    "allowed_kwh",
+    "used_kwh",
+    "remaining_cash",
+    "predicted_cash",
+    "accumulated_cash",
+)
+
+
+def challenge_metrics(
+    event: Event | None, state: str, now: datetime, reward_rate: float
+) -> dict[str, Any]:
+    """Compute the challenge metrics of the next event.
+
+    These used to be template sensors in doc/templates, the reward estimates
+    extrapolate the consumption so far over the whole reduction phase.
+    """
+    if event is None:
+        return {
+            "allowed_kwh": 0,
+            "used_kwh": 0,
+            "remaining_cash": 0,
+            "predicted_cash": 0,
+            "accumulated_cash": 0,
+        }
+    allowed = event.allowed_kWh or 0
+    used = event.used_kWh or 0
+    duration = max((event.reduction_end - event.reduction_start).total_seconds(), 60)
+    elapsed = (now - event.reduction_start).total_seconds()
+    # Fraction of the reduction phase elapsed, at least one minute
+    progress = min(max(elapsed // 60, 1) * 60, duration) / duration
+    current = min(max((elapsed // 60 + 1) * 60, 60), duration) / duration
+    return {
+        "allowed_kwh": allowed,
+        "used_kwh": used,
+        "remaining_cash": round((allowed - used) * reward_rate, 2),
+        "predicted_cash": round((allowed - used / progress) * reward_rate, 2),
+        "accumulated_cash": round((current * allowed - used) * reward_rate, 2),
+    }
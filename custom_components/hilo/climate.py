@@ -1,7 +1,5 @@
 """Support for Hilo Climate entities."""
 
-from datetime import datetime, timedelta
-
 from homeassistant.components.climate import ClimateEntity
 from homeassistant.components.climate.const import (
     ClimateEntityFeature,
@@ -15,28 +13,21 @@ from homeassistant.const import (
     Platform,
     UnitOfTemperature,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
+from pyhilo.device import HiloDevice
 
-from . import Hilo
-from .const import CLIMATE_CLASSES, DOMAIN, LOG
+from . import SIGNAL_DEVICES_ADDED, Hilo
+from .commands import DeviceCommandPipeline
+from .const import CLIMATE_CLASSES, DOMAIN, LOG, TARGET_TEMPERATURE_DEBOUNCE
 from .entity import HiloEntity
 
 
-def validate_reduction_phase(events, tag):
+def validate_reduction_phase(hilo, tag):
     """Validate if current time is within a challenge lock reduction phase."""
-    if not events:
-        return
-    current = events[0]
-    phases = current["phases"]
-    start = phases["reduction_start"]
-    end = phases["reduction_end"]
-    if (
-        start + timedelta(minutes=2)
-        < datetime.now(start.tzinfo)
-        < end - timedelta(minutes=2)
-    ):
+    if hilo.in_reduction_phase():
         LOG.warning(
             f"{tag} Attempt to set temperature was blocked because challenge lock is active"
         )
@@ -49,13 +40,22 @@ async def async_setup_entry(
 ) -> None:
     """Set up Hilo climate entities from a config entry."""
     hilo = hass.data[DOMAIN][entry.entry_id]
-    entities = []
-    for d in hilo.devices.all:
-        if d.type in CLIMATE_CLASSES:
-            d._entity = HiloClimate(hilo, d)
-            entities.append(d._entity)
-    async_add_entities(entities)
-    return True
+
+    @callback
+    def async_add_devices(devices: list[HiloDevice]) -> None:
+        entities = []
+        for d in devices:
+            if d.type in CLIMATE_CLASSES:
+                d._entity = HiloClimate(hass, hilo, d)
+                entities.append(d._entity)
+        async_add_entities(entities)
+
+    async_add_devices(hilo.devices.all)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
 
 
 class HiloClimate(HiloEntity, ClimateEntity):
@@ -66,7 +66,7 @@ class HiloClimate(HiloEntity, ClimateEntity):
     _attr_precision: float = PRECISION_TENTHS
     _attr_supported_features: int = ClimateEntityFeature.TARGET_TEMPERATURE
 
-    def __init__(self, hilo: Hilo, device):
+    def __init__(self, hass: HomeAssistant, hilo: Hilo, device):
         """Initialize the climate entity."""
         super().__init__(hilo, device=device, name=device.name)
         old_unique_id = f"{slugify(device.name)}-climate"
@@ -82,6 +82,7 @@ class HiloClimate(HiloEntity, ClimateEntity):
         self.operations = [HVACMode.HEAT]
         self._has_operation = False
         self._temperature_entity = None
+        self._commands = DeviceCommandPipeline(device, self.async_write_ha_state)
         LOG.debug("Setting up Climate entity: %s", self._attr_name)
 
     @property
@@ -92,6 +93,8 @@ class HiloClimate(HiloEntity, ClimateEntity):
     @property
     def target_temperature(self):
         """Return the target temperature."""
+        if "target_temperature" in self._commands.pending:
+            return self._commands.value("target_temperature")
         return self._device.target_temperature
 
     @property
@@ -125,17 +128,39 @@ class HiloClimate(HiloEntity, ClimateEntity):
             return "mdi:radiator"
         return "mdi:radiator-disabled"
 
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Forget the target temperature once the device reported it."""
+        super()._async_update_attrs()
+        self._commands.confirm()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the pending target temperature."""
+        await super().async_will_remove_from_hass()
+        self._commands.cancel()
+
     async def async_set_temperature(self, **kwargs):
-        """Set new target temperature."""
+        """Set new target temperature.
+
+        The new target is shown right away, but only the last one set within
+        TARGET_TEMPERATURE_DEBOUNCE seconds is sent to the device. The call
+        returns once it's sent, raising if the device rejected it.
+        """
         if ATTR_TEMPERATURE in kwargs:
             if self._hilo.challenge_lock:
-                challenge = self._hilo._hass.states.get("sensor.defi_hilo")
-                validate_reduction_phase(
-                    challenge.attributes.get("next_events", []), self._device._tag
-                )
+                validate_reduction_phase(self._hilo, self._device._tag)
             LOG.info(
                 f"{self._device._tag} Setting temperature to {kwargs[ATTR_TEMPERATURE]}"
             )
-            await self._device.set_attribute(
-                "target_temperature", kwargs[ATTR_TEMPERATURE]
+            await self._commands.async_write_debounced(
+                {"target_temperature": kwargs[ATTR_TEMPERATURE]},
+                TARGET_TEMPERATURE_DEBOUNCE,
             )
+
+    async def async_write_target_temperature(self, temperature: float) -> None:
+        """Send a new target temperature right away, without the debounce delay.
+
+        Used by the bulk_set service, which checks the challenge lock itself.
+        """
+        LOG.info(f"{self._device._tag} Setting temperature to {temperature}")
+        await self._commands.async_write({"target_temperature": temperature})
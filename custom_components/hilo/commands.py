@@ -0,0 +1,256 @@
+"""Device command pipeline for the Hilo integration."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Any, Callable
+
+from homeassistant.exceptions import HomeAssistantError
+from pyhilo.device import HiloDevice
+
+from .const import (
+    COMMAND_CONFIRM_TIMEOUT,
+    COMMAND_CONFIRM_TOLERANCES,
+    COMMAND_SEND_TIMEOUT,
+    LOG,
+)
+
+
+def reported(attribute: str, written: Any, value: Any) -> bool:
+    """Return whether a device reports the value written to an attribute.
+
+    Lights round the brightness and the color they report, the values in
+    COMMAND_CONFIRM_TOLERANCES. Any other attribute has to match.
+    """
+    if (tolerance := COMMAND_CONFIRM_TOLERANCES.get(attribute)) is not None:
+        try:
+            return abs(written - value) <= tolerance
+        except TypeError:
+            return False
+    return written == value
+
+
+class DeviceCommandPipeline:
+    """Send the attribute writes of a device and show them optimistically.
+
+    The API sets one attribute per request, so the attributes of a command
+    are sent concurrently instead of one after the other, once ``is_on`` is
+    set if it's part of the command. Writes requested while a command is in
+    flight are merged, the latest value of each attribute winning, and sent
+    together once it's done.
+
+    The written values are returned by ``value`` until the device reports
+    them, usually through SignalR, or until they expire. A failed write is
+    rolled back right away. Values can also be staged and flushed later,
+    only the last staged value of an attribute is then sent. Whoever staged
+    them can wait on ``sent`` for the outcome of that flush.
+    ``async_write_debounced`` flushes them once no other write came for a
+    delay, each write restarting the timer.
+    """
+
+    def __init__(
+        self,
+        device: HiloDevice,
+        on_change: Callable[[], None],
+        confirm_timeout: float = COMMAND_CONFIRM_TIMEOUT,
+    ) -> None:
+        """Initialize the pipeline."""
+        self._device = device
+        self._on_change = on_change
+        self._confirm_timeout = confirm_timeout
+        self._lock = asyncio.Lock()
+        self._queued: dict[str, Any] = {}
+        self._optimistic: dict[str, Any] = {}
+        self._expiry: dict[str, asyncio.TimerHandle] = {}
+        self._waiters: list[asyncio.Future[None]] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending(self) -> frozenset[str]:
+        """Return the attributes waiting to be reported by the device."""
+        return frozenset(self._optimistic)
+
+    def value(self, attribute: str, default: Any = None) -> Any:
+        """Return the optimistic value of an attribute or the device's."""
+        if attribute in self._optimistic:
+            return self._optimistic[attribute]
+        return self._device.get_value(attribute, default)
+
+    def confirm(self) -> None:
+        """Forget the optimistic values the device now reports."""
+        for attribute, value in list(self._optimistic.items()):
+            if reported(attribute, value, self._device.get_value(attribute)):
+                self._discard(attribute)
+
+    def stage(self, values: dict[str, Any]) -> None:
+        """Show the values right away and queue them for the next command.
+
+        The values the device already reports are sent all the same, but
+        there's nothing to show or wait for.
+        """
+        loop = asyncio.get_running_loop()
+        for attribute, value in values.items():
+            self._discard(attribute)
+            if reported(attribute, value, self._device.get_value(attribute)):
+                continue
+            self._optimistic[attribute] = value
+            self._expiry[attribute] = loop.call_later(
+                self._confirm_timeout, self._expire, attribute, value
+            )
+        self._queued.update(values)
+        self._on_change()
+
+    def sent(self) -> asyncio.Future[None]:
+        """Return a future resolved once the queued values are sent.
+
+        It raises the error of the command if the values couldn't be set.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        return future
+
+    async def async_flush(self) -> None:
+        """Send the queued values to the device."""
+        async with self._lock:
+            if not self._queued:
+                # Merged into a command sent while we were waiting
+                return
+            command, self._queued = self._queued, {}
+            waiters, self._waiters = self._waiters, []
+            try:
+                await self._async_send(command)
+            except asyncio.CancelledError:
+                for waiter in waiters:
+                    waiter.cancel()
+                raise
+            except HomeAssistantError as err:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(err)
+                raise
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def async_write(self, values: dict[str, Any]) -> None:
+        """Show the values right away and send them to the device."""
+        self.stage(values)
+        await self.async_flush()
+
+    async def async_write_debounced(
+        self,
+        values: dict[str, Any],
+        delay: float,
+        timeout: float = COMMAND_SEND_TIMEOUT,
+    ) -> None:
+        """Show the values right away and send them after delay seconds.
+
+        A write coming within the delay restarts it, only the last value of
+        each attribute being sent. Returns once the values are sent, raising
+        if they couldn't be set or weren't sent within timeout seconds after
+        the delay.
+        """
+        self.stage(values)
+        sent = self.sent()
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self._flush_timer = asyncio.get_running_loop().call_later(
+            delay, self._start_flush
+        )
+        try:
+            async with asyncio.timeout(delay + timeout):
+                await sent
+        except TimeoutError as err:
+            raise HomeAssistantError(
+                f"Timed out setting {', '.join(values)} on {self._device.name}"
+            ) from err
+
+    def _start_flush(self) -> None:
+        # A flush started while another is in flight waits for its lock, so
+        # the values staged in the meantime are sent right after it
+        self._flush_timer = None
+        task = asyncio.get_running_loop().create_task(self._async_flush_quietly())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _async_flush_quietly(self) -> None:
+        # The error is raised to the writes waiting on the flush
+        with contextlib.suppress(HomeAssistantError):
+            await self.async_flush()
+
+    async def _async_send(self, command: dict[str, Any]) -> None:
+        LOG.debug("%s Sending %s", self._device._tag, command)
+        failed: dict[str, BaseException] = {}
+        if "is_on" in command:
+            # Turn a light on before setting its brightness and color
+            failed = await self._async_set({"is_on": command["is_on"]})
+        if failed:
+            # The other attributes weren't sent and are rolled back as well
+            failed = dict.fromkeys(command, failed["is_on"])
+        else:
+            failed = await self._async_set(
+                {
+                    attribute: value
+                    for attribute, value in command.items()
+                    if attribute != "is_on"
+                }
+            )
+        if not failed:
+            return
+        for attribute in failed:
+            if (
+                attribute not in self._queued
+                and self._optimistic.get(attribute) == command[attribute]
+            ):
+                self._discard(attribute)
+        self._on_change()
+        raise HomeAssistantError(
+            f"Unable to set {', '.join(failed)} on {self._device.name}"
+        ) from next(iter(failed.values()))
+
+    async def _async_set(self, values: dict[str, Any]) -> dict[str, BaseException]:
+        results = await asyncio.gather(
+            *(
+                self._device.set_attribute(attribute, value)
+                for attribute, value in values.items()
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+        return {
+            attribute: result
+            for attribute, result in zip(values, results)
+            if isinstance(result, BaseException)
+        }
+
+    def _expire(self, attribute: str, value: Any) -> None:
+        if self._optimistic.get(attribute) != value:
+            return
+        LOG.warning(
+            "%s %s was not confirmed within %s seconds, showing the reported value",
+            self._device._tag,
+            attribute,
+            self._confirm_timeout,
+        )
+        self._discard(attribute)
+        self._on_change()
+
+    def _discard(self, attribute: str) -> None:
+        self._optimistic.pop(attribute, None)
+        if handle := self._expiry.pop(attribute, None):
+            handle.cancel()
+
+    def cancel(self) -> None:
+        """Drop the optimistic values, when the entity is removed."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        for attribute in list(self._optimistic):
+            self._discard(attribute)
+        for waiter in self._waiters:
+            waiter.cancel()
+        self._waiters = []
@@ -25,6 +25,7 @@ from .const import (
     CONF_PRE_COLD_PHASE,
     CONF_TARIFF,
     CONF_TRACK_UNKNOWN_SOURCES,
+    CONF_UNRECORDED_ATTRIBUTES,
     CONF_UNTARIFICATED_DEVICES,
     DEFAULT_APPRECIATION_PHASE,
     DEFAULT_CHALLENGE_LOCK,
@@ -33,8 +34,10 @@ from .const import (
     DEFAULT_LOG_TRACES,
     DEFAULT_PRE_COLD_PHASE,
     DEFAULT_TRACK_UNKNOWN_SOURCES,
+    DEFAULT_UNRECORDED_ATTRIBUTES,
     DEFAULT_UNTARIFICATED_DEVICES,
     DOMAIN,
+    HIGH_CHURN_ATTRIBUTES,
     LOG,
     MIN_SCAN_INTERVAL,
 )
@@ -77,6 +80,13 @@ STEP_OPTION_SCHEMA = vol.Schema(
         vol.Optional(CONF_SCAN_INTERVAL): (
             vol.All(cv.positive_int, vol.Range(min=MIN_SCAN_INTERVAL))
         ),
+        vol.Optional(
+            CONF_UNRECORDED_ATTRIBUTES, default=DEFAULT_UNRECORDED_ATTRIBUTES
+        ): selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=HIGH_CHURN_ATTRIBUTES, multiple=True, custom_value=True
+            )
+        ),
     }
 )
 
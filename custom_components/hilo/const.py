@@ -14,6 +14,8 @@ DEFAULT_APPRECIATION_PHASE = 0
 
 CONF_CHALLENGE_LOCK = "challenge_lock"
 DEFAULT_CHALLENGE_LOCK = False
+# The lock is released this many minutes around the reduction phase
+CHALLENGE_LOCK_MARGIN = 2
 
 CONF_ENERGY_METER_PERIOD = "energy_meter_period"
 DEFAULT_ENERGY_METER_PERIOD = DAILY
@@ -36,6 +38,18 @@ DEFAULT_TRACK_UNKNOWN_SOURCES = False
 CONF_UNTARIFICATED_DEVICES = "untarificated_devices"
 DEFAULT_UNTARIFICATED_DEVICES = False
 
+CONF_UNRECORDED_ATTRIBUTES = "unrecorded_attributes"
+DEFAULT_UNRECORDED_ATTRIBUTES: list[str] = []
+# Device attributes changing often, suggested for the unrecorded attributes
+HIGH_CHURN_ATTRIBUTES = [
+    "co2",
+    "current_temperature",
+    "humidity",
+    "noise",
+    "pressure",
+    "wifi_status",
+]
+
 DEFAULT_SCAN_INTERVAL = 300
 EVENT_SCAN_INTERVAL = 1800
 # During reduction phase, let's refresh the current challenge event
@@ -44,9 +58,71 @@ EVENT_SCAN_INTERVAL = 1800
 EVENT_SCAN_INTERVAL_REDUCTION = 300
 NOTIFICATION_SCAN_INTERVAL = 1800
 MAX_SUB_INTERVAL = 120
+# Device attributes holding a cumulative energy counter, with their factor to
+# kWh. The energy of these devices comes from the counter instead of the power.
+ENERGY_COUNTER_ATTRIBUTES = {
+    "energy": 0.001,
+}
+# A counter going down from above 90% of this value wrapped around
+ENERGY_COUNTER_ROLLOVER = 2**32
 MIN_SCAN_INTERVAL = 60
 REWARD_SCAN_INTERVAL = 7200
 WEATHER_SCAN_INTERVAL = 1800
+# Maximum number of challenge subscriptions sent to the hub at the same time
+CHALLENGE_SUBSCRIPTION_CONCURRENCY = 3
+# Retries of a failed challenge subscription and the first delay between them
+CHALLENGE_SUBSCRIPTION_RETRIES = 2
+CHALLENGE_SUBSCRIPTION_RETRY_DELAY = 1
+# Seconds the plan specific hub has to send the event list before falling back
+# on the legacy challenge methods
+CHALLENGE_EVENT_LIST_TIMEOUT = 60
+# Minimum time without consumption updates before requesting one, per phase
+CONSUMPTION_REFRESH_INTERVALS = {
+    "reduction": 120,
+    "recovery": 600,
+}
+# Minimum time between two attempts at fetching the allowed_wh before preheat
+ALLOWED_WH_REFRESH_INTERVAL = 300
+# Seconds an optimistic value is shown while waiting for the device to report it
+COMMAND_CONFIRM_TIMEOUT = 15
+# Difference between a written value and the rounded one a device reports, the
+# other attributes having to match exactly
+COMMAND_CONFIRM_TOLERANCES = {
+    "intensity": 0.01,
+    "hue": 1,
+    "saturation": 1,
+}
+# Seconds without a new target temperature before sending the last one
+TARGET_TEMPERATURE_DEBOUNCE = 1.5
+# Seconds a debounced write waits to be sent once its delay is over
+COMMAND_SEND_TIMEOUT = 30
+
+# Fired at each phase transition of a challenge
+EVENT_CHALLENGE_PHASE = "hilo_challenge_phase"
+
+# Names of the one-shot migrations already completed, in the config entry data
+CONF_MIGRATIONS = "migrations"
+
+# Services
+ATTR_COMMANDS = "commands"
+ATTR_LIMIT = "limit"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+ATTR_OFFSET = "offset"
+ATTR_RETRIES = "retries"
+ATTR_SEASON = "season"
+SERVICE_BULK_SET = "bulk_set"
+SERVICE_GET_REWARD_HISTORY = "get_reward_history"
+SERVICE_RERUN_MIGRATIONS = "rerun_migrations"
+# Number of events kept in the reward sensor attributes, the full history is
+# available through the get_reward_history service.
+REWARD_SUMMARY_EVENTS = 5
+REWARD_HISTORY_PAGE_SIZE = 50
+REWARD_HISTORY_MAX_PAGE_SIZE = 500
+# Commands of the bulk_set service sent at the same time, retries of a failed
+# command and seconds before the first retry, doubled at each attempt
+BULK_SET_CONCURRENCY = 5
+BULK_SET_RETRIES = 2
+BULK_SET_RETRY_DELAY = 1
 
 CONF_TARIFF = {
     "rate d": {
@@ -88,12 +164,14 @@ WEATHER_CONDITIONS = {
 
 # Class lists
 LIGHT_CLASSES = ["LightDimmer", "WhiteBulb", "ColorBulb", "LightSwitch"]
-HILO_SENSOR_CLASSES = [
-    "SmokeDetector",
-    "IndoorWeatherStation",
-    "OutdoorWeatherStation",
-    "Gateway",
-]
+HILO_SENSOR_CLASSES = frozenset(
+    {
+        "SmokeDetector",
+        "IndoorWeatherStation",
+        "OutdoorWeatherStation",
+        "Gateway",
+    }
+)
 CLIMATE_CLASSES = [
     "Thermostat",
     "FloorThermostat",
@@ -0,0 +1,377 @@
+"""Shared energy accumulator of the Hilo integration."""
+
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta
+import math
+import time
+from typing import Callable, Iterable
+
+from homeassistant.components.utility_meter.const import (
+    DAILY,
+    HOURLY,
+    MONTHLY,
+    WEEKLY,
+    YEARLY,
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import (
+    async_track_point_in_time,
+    async_track_time_interval,
+)
+import homeassistant.util.dt as dt_util
+from pyhilo.device import HiloDevice
+
+from .const import (
+    ENERGY_COUNTER_ATTRIBUTES,
+    ENERGY_COUNTER_ROLLOVER,
+    LOG,
+    MAX_SUB_INTERVAL,
+)
+
+# Watt-seconds in a kWh
+WATT_SECONDS_PER_KWH = 3_600_000
+# Bucket of the devices whose energy isn't split by tariff
+TOTAL_TARIFF = "total"
+# Time to add to the start of a period to land in the next one
+PERIOD_LENGTHS = {
+    HOURLY: timedelta(minutes=61),
+    DAILY: timedelta(hours=25),
+    WEEKLY: timedelta(days=8),
+    MONTHLY: timedelta(days=32),
+    YEARLY: timedelta(days=367),
+}
+
+
+def period_start(now: datetime, period: str) -> datetime:
+    """Return the start of the period including a moment, in local time."""
+    now = dt_util.as_local(now)
+    if period == HOURLY:
+        return now.replace(minute=0, second=0, microsecond=0)
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == WEEKLY:
+        return start - timedelta(days=start.weekday())
+    if period == MONTHLY:
+        return start.replace(day=1)
+    if period == YEARLY:
+        return start.replace(month=1, day=1)
+    return start
+
+
+def energy_counter_attribute(device: HiloDevice) -> str | None:
+    """Return the cumulative energy counter attribute of a device, if any."""
+    return next(
+        (
+            attribute
+            for attribute in ENERGY_COUNTER_ATTRIBUTES
+            if device.has_attribute(attribute)
+        ),
+        None,
+    )
+
+
+class EnergyAccumulator:
+    """Integrate the power of every device into energy, in one place.
+
+    Each tracked device gets a slot in flat arrays holding its energy, the
+    power read at its last sample and when that was. Samples come from the
+    SignalR values of the devices, and a single timer catches up on the
+    devices that didn't report anything for ``max_sub_interval`` seconds.
+    The power is integrated with a left Riemann sum, like the integration
+    sensors this replaces: the power of a sample applies until the next one.
+
+    Devices reporting a cumulative energy counter (ENERGY_COUNTER_ATTRIBUTES)
+    add the increase of their counter instead, which doesn't drift when
+    values are missed. A counter going down was either reset, and counts
+    from zero again, or wrapped around ENERGY_COUNTER_ROLLOVER.
+
+    The energy added to a device also goes to its bucket of the current
+    tariff, or to its total bucket when it isn't split by tariff. The buckets
+    are reset at the start of every period, like the utility meters they
+    replace.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_sub_interval: float = MAX_SUB_INTERVAL,
+        period: str = DAILY,
+    ) -> None:
+        """Initialize the accumulator."""
+        self._hass = hass
+        self._max_sub_interval = max_sub_interval
+        if period not in PERIOD_LENGTHS:
+            LOG.warning("Unsupported energy meter period %s, using %s", period, DAILY)
+            period = DAILY
+        self._period = period
+        self.last_reset = period_start(dt_util.utcnow(), period)
+        self.tariff = "low"
+        self._slots: dict[int, int] = {}
+        self._devices: list[HiloDevice] = []
+        self._listeners: list[Callable[[], None] | None] = []
+        self._energy = array("d")
+        self._power = array("d")
+        self._sampled = array("d")
+        # Last counter value, NaN until the first one is read
+        self._counter = array("d")
+        self._counter_factor = array("d")
+        self._counter_attributes: list[str | None] = []
+        self._tariff_energy: dict[str, array] = {}
+        self._tariff_listeners: dict[str, list[Callable[[], None] | None]] = {}
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._unsub_reset: CALLBACK_TYPE | None = None
+
+    def __len__(self) -> int:
+        """Return the number of tracked devices."""
+        return sum(listener is not None for listener in self._listeners)
+
+    def _slot(self, device: HiloDevice) -> int:
+        """Return the slot of a device, adding one if needed."""
+        if (slot := self._slots.get(device.id)) is not None:
+            self._devices[slot] = device
+            return slot
+        slot = self._slots[device.id] = len(self._devices)
+        self._devices.append(device)
+        self._listeners.append(None)
+        self._energy.append(0.0)
+        self._power.append(0.0)
+        self._sampled.append(0.0)
+        self._counter.append(math.nan)
+        self._counter_factor.append(0.0)
+        self._counter_attributes.append(None)
+        for tariff, energy in self._tariff_energy.items():
+            energy.append(0.0)
+            self._tariff_listeners[tariff].append(None)
+        return slot
+
+    def _tracked(self) -> bool:
+        return any(listener is not None for listener in self._listeners) or any(
+            listener is not None
+            for listeners in self._tariff_listeners.values()
+            for listener in listeners
+        )
+
+    @callback
+    def _async_start(self) -> None:
+        if self._unsub_timer is None:
+            self._unsub_timer = async_track_time_interval(
+                self._hass,
+                self._async_catch_up,
+                timedelta(seconds=self._max_sub_interval),
+            )
+        if self._unsub_reset is None:
+            self._unsub_reset = async_track_point_in_time(
+                self._hass,
+                self._async_reset_period,
+                period_start(
+                    self.last_reset + PERIOD_LENGTHS[self._period], self._period
+                ),
+            )
+
+    @callback
+    def _async_stop_if_idle(self) -> None:
+        if self._tracked():
+            return
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._unsub_reset:
+            self._unsub_reset()
+            self._unsub_reset = None
+
+    def tariff_energy(self, device_id: int, tariff: str) -> float | None:
+        """Return the energy of a device for a tariff over the current period."""
+        if (slot := self._slots.get(device_id)) is None:
+            return None
+        if (energy := self._tariff_energy.get(tariff)) is None:
+            return None
+        return energy[slot]
+
+    def collecting(self, device_id: int, tariff: str) -> bool:
+        """Return whether the energy of a device currently goes to a tariff."""
+        slot = self._slots.get(device_id)
+        return slot is not None and self._bucket(slot) == tariff
+
+    def _bucket(self, slot: int) -> str:
+        listeners = self._tariff_listeners.get(TOTAL_TARIFF)
+        if listeners is not None and listeners[slot] is not None:
+            return TOTAL_TARIFF
+        return self.tariff
+
+    def energy(self, device_id: int) -> float | None:
+        """Return the energy of a device in kWh."""
+        if (slot := self._slots.get(device_id)) is None:
+            return None
+        return self._energy[slot]
+
+    @callback
+    def async_track(
+        self,
+        device: HiloDevice,
+        energy: float,
+        listener: Callable[[], None],
+        now: float | None = None,
+    ) -> CALLBACK_TYPE:
+        """Integrate the power of a device, starting from a restored energy.
+
+        The listener is called whenever the energy of the device changed.
+        Returns a callback to stop tracking the device.
+        """
+        now = time.monotonic() if now is None else now
+        slot = self._slot(device)
+        self._listeners[slot] = listener
+        self._energy[slot] = energy
+        self._power[slot] = self._read_power(device)
+        self._sampled[slot] = now
+        self._counter[slot] = math.nan
+        self._counter_attributes[slot] = None
+        if (attribute := energy_counter_attribute(device)) is not None:
+            LOG.debug("Using the %s counter of %s", attribute, device.name)
+            self._counter_attributes[slot] = attribute
+            self._counter_factor[slot] = ENERGY_COUNTER_ATTRIBUTES[attribute]
+            self._read_counter(slot)
+        self._async_start()
+        LOG.debug("Tracking the energy of %s from %s kWh", device.name, energy)
+
+        @callback
+        def async_untrack() -> None:
+            if self._listeners[slot] is not listener:
+                return
+            self._listeners[slot] = None
+            self._async_stop_if_idle()
+
+        return async_untrack
+
+    @callback
+    def async_track_tariff(
+        self,
+        device: HiloDevice,
+        tariff: str,
+        energy: float,
+        listener: Callable[[], None],
+    ) -> CALLBACK_TYPE:
+        """Keep the energy of a device for a tariff, from a restored energy.
+
+        The listener is called whenever the bucket or the current tariff
+        changed. Returns a callback to stop tracking the bucket.
+        """
+        slot = self._slot(device)
+        if tariff not in self._tariff_energy:
+            self._tariff_energy[tariff] = array("d", bytes(8 * len(self._devices)))
+            self._tariff_listeners[tariff] = [None] * len(self._devices)
+        self._tariff_energy[tariff][slot] = energy
+        self._tariff_listeners[tariff][slot] = listener
+        self._async_start()
+
+        @callback
+        def async_untrack() -> None:
+            if self._tariff_listeners[tariff][slot] is not listener:
+                return
+            self._tariff_listeners[tariff][slot] = None
+            self._async_stop_if_idle()
+
+        return async_untrack
+
+    @callback
+    def async_set_tariff(self, tariff: str, now: float | None = None) -> None:
+        """Send the energy of the devices to another tariff from now on."""
+        if tariff == self.tariff:
+            return
+        LOG.debug("Energy tariff changed from %s to %s", self.tariff, tariff)
+        # The energy used until now belongs to the previous tariff
+        self._async_integrate_all(time.monotonic() if now is None else now)
+        self.tariff = tariff
+        self._async_notify_tariffs()
+
+    @callback
+    def _async_reset_period(self, now: datetime) -> None:
+        self._async_integrate_all(time.monotonic())
+        self.last_reset = period_start(now, self._period)
+        LOG.debug("Resetting the energy tariffs at %s", self.last_reset)
+        for energy in self._tariff_energy.values():
+            for slot in range(len(energy)):
+                energy[slot] = 0.0
+        self._unsub_reset = None
+        self._async_start()
+        self._async_notify_tariffs()
+
+    def _async_integrate_all(self, now: float) -> None:
+        for slot, listener in enumerate(self._listeners):
+            if listener is not None:
+                self._integrate(slot, now)
+
+    def _async_notify_tariffs(self) -> None:
+        for listeners in self._tariff_listeners.values():
+            for listener in listeners:
+                if listener is not None:
+                    listener()
+
+    @callback
+    def async_sample(
+        self, devices: Iterable[HiloDevice], now: float | None = None
+    ) -> None:
+        """Integrate the power of devices that just reported new values."""
+        now = time.monotonic() if now is None else now
+        for device in devices:
+            slot = self._slots.get(device.id)
+            if slot is None or self._listeners[slot] is None:
+                continue
+            self._integrate(slot, now)
+
+    @callback
+    def async_catch_up(self, now: float | None = None) -> None:
+        """Integrate the devices that didn't report for a while."""
+        now = time.monotonic() if now is None else now
+        for slot, listener in enumerate(self._listeners):
+            if listener is None:
+                continue
+            if now - self._sampled[slot] >= self._max_sub_interval:
+                self._integrate(slot, now)
+
+    @callback
+    def _async_catch_up(self, _) -> None:
+        self.async_catch_up()
+
+    def _integrate(self, slot: int, now: float) -> None:
+        if self._counter_attributes[slot] is not None:
+            added = self._read_counter(slot)
+        else:
+            elapsed = max(now - self._sampled[slot], 0)
+            added = self._power[slot] * elapsed / WATT_SECONDS_PER_KWH
+            self._power[slot] = self._read_power(self._devices[slot])
+        self._sampled[slot] = now
+        self._energy[slot] += added
+        self._listeners[slot]()
+        bucket = self._bucket(slot)
+        if added and (listeners := self._tariff_listeners.get(bucket)):
+            if (listener := listeners[slot]) is not None:
+                self._tariff_energy[bucket][slot] += added
+                listener()
+
+    def _read_counter(self, slot: int) -> float:
+        """Read the counter of a device and return its increase in kWh."""
+        device = self._devices[slot]
+        try:
+            value = float(device.get_value(self._counter_attributes[slot]))
+        except (TypeError, ValueError):
+            return 0.0
+        last, self._counter[slot] = self._counter[slot], value
+        if math.isnan(last):
+            return 0.0
+        increase = value - last
+        if increase < 0:
+            if last >= ENERGY_COUNTER_ROLLOVER * 0.9:
+                LOG.debug("Energy counter of %s wrapped around", device.name)
+                increase += ENERGY_COUNTER_ROLLOVER
+            else:
+                LOG.debug("Energy counter of %s was reset", device.name)
+                increase = value
+        return increase * self._counter_factor[slot]
+
+    @staticmethod
+    def _read_power(device: HiloDevice) -> float:
+        try:
+            return float(device.get_value("power", 0) or 0)
+        except (TypeError, ValueError):
+            return 0.0
@@ -13,7 +13,7 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from pyhilo.device import HiloDevice
 from pyhilo.signalr import SignalREvent
 
-from . import SIGNAL_UPDATE_ENTITY, Hilo
+from . import SIGNAL_DEVICE_RENAMED, SIGNAL_UPDATE_ENTITY, Hilo
 from .const import DOMAIN
 
 
@@ -58,6 +58,7 @@ class HiloEntity(CoordinatorEntity):
         self._attr_name = name
         self._device = device
         self._hilo = hilo
+        self._attr_available = device.available
         self._device._entity = self
 
     @property
@@ -68,10 +69,20 @@ class HiloEntity(CoordinatorEntity):
     @property
     def available(self) -> bool:
         """Return whether the entity is available."""
-        return self._device.available
+        return self._attr_available
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the attributes computed from the device.
+
+        Called whenever the device may have changed, right before the state
+        is written, so the state properties only read plain attributes.
+        """
+        self._attr_available = self._device.available
 
     @callback
     def _handle_coordinator_update(self) -> None:
+        self._async_update_attrs()
         self.async_write_ha_state()
 
     @callback
@@ -82,20 +93,37 @@ class HiloEntity(CoordinatorEntity):
     async def async_added_to_hass(self):
         """Call when entity is added to hass."""
         await super().async_added_to_hass()
+        self._async_update_attrs()
         self._remove_signal_update = async_dispatcher_connect(
             self._hilo._hass,
             SIGNAL_UPDATE_ENTITY.format(self._device.hilo_id),
             self._update_callback,
         )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self._hilo._hass,
+                SIGNAL_DEVICE_RENAMED.format(self._device.id),
+                self._async_device_renamed,
+            )
+        )
 
     async def async_will_remove_from_hass(self) -> None:
         """Call when entity will be removed from hass."""
         await super().async_will_remove_from_hass()
         self._remove_signal_update()
 
+    @callback
+    def _async_device_renamed(self, old_name: str) -> None:
+        """Follow the new name of the device, keeping the entity ID."""
+        self._attr_device_info["name"] = self._device.name
+        if isinstance(self._attr_name, str) and self._attr_name.startswith(old_name):
+            self._attr_name = self._device.name + self._attr_name[len(old_name) :]
+        self.async_write_ha_state()
+
     @callback
     def _update_callback(self):
         """Call update method."""
+        self._async_update_attrs()
         self.async_schedule_update_ha_state(True)
 
     async def async_update(self) -> None:
@@ -109,3 +137,4 @@ class HiloEntity(CoordinatorEntity):
 
         if self._device.type != "Gateway":
             await self.coordinator.async_request_refresh()
+        self._async_update_attrs()
@@ -3,13 +3,15 @@
 from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_HS_COLOR, LightEntity
 from homeassistant.components.light.const import ColorMode
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.debounce import Debouncer
+from homeassistant.const import STATE_OFF, STATE_ON, Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
+from pyhilo.device import HiloDevice
 
-from . import Hilo
+from . import SIGNAL_DEVICES_ADDED, Hilo
+from .commands import DeviceCommandPipeline
 from .const import DOMAIN, LIGHT_CLASSES, LOG
 from .entity import HiloEntity
 
@@ -19,13 +21,22 @@ async def async_setup_entry(
 ) -> None:
     """Set up Hilo light entities from a config entry."""
     hilo = hass.data[DOMAIN][entry.entry_id]
-    entities = []
 
-    for d in hilo.devices.all:
-        if d.type in LIGHT_CLASSES:
-            d._entity = HiloLight(hass, hilo, d)
-            entities.append(d._entity)
-    async_add_entities(entities)
+    @callback
+    def async_add_devices(devices: list[HiloDevice]) -> None:
+        entities = []
+        for d in devices:
+            if d.type in LIGHT_CLASSES:
+                d._entity = HiloLight(hass, hilo, d)
+                entities.append(d._entity)
+        async_add_entities(entities)
+
+    async_add_devices(hilo.devices.all)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
 
 
 class HiloLight(HiloEntity, LightEntity):
@@ -42,34 +53,32 @@ class HiloLight(HiloEntity, LightEntity):
         hilo.async_migrate_unique_id(
             f"{slugify(device.identifier)}-light", self._attr_unique_id, Platform.LIGHT
         )
-        self._debounced_turn_on = Debouncer(
-            hass,
-            LOG,
-            cooldown=1,
-            immediate=True,
-            function=self._async_debounced_turn_on,
-        )
+        self._commands = DeviceCommandPipeline(device, self.async_write_ha_state)
         LOG.debug("Setting up Light entity: %s", self._attr_name)
 
     @property
     def brightness(self):
         """Return the brightness of the light."""
+        if "intensity" in self._commands.pending:
+            return round(self._commands.value("intensity") * 255)
         return self._device.brightness
 
     @property
     def state(self):
         """Return the state of the light."""
+        if "is_on" in self._commands.pending:
+            return STATE_ON if self._commands.value("is_on") else STATE_OFF
         return self._device.state
 
     @property
     def is_on(self):
         """Return whether the light is on."""
-        return self._device.get_value("is_on")
+        return self._commands.value("is_on")
 
     @property
     def hs_color(self):
         """Return the HS color."""
-        return (self._device.hue, self._device.saturation)
+        return (self._commands.value("hue"), self._commands.value("saturation"))
 
     @property
     def color_mode(self):
@@ -92,33 +101,36 @@ class HiloLight(HiloEntity, LightEntity):
             color_modes.add(ColorMode.ONOFF)
         return color_modes
 
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Forget the optimistic values the device reported."""
+        super()._async_update_attrs()
+        self._commands.confirm()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop the optimistic values."""
+        await super().async_will_remove_from_hass()
+        self._commands.cancel()
+
     async def async_turn_off(self, **kwargs):
         """Turn off the light."""
         LOG.info("%s Turning off", self._device._tag)
-        await self._device.set_attribute("is_on", False)
-        self.async_schedule_update_ha_state(True)
+        await self._commands.async_write({"is_on": False})
 
     async def async_turn_on(self, **kwargs):
-        """Turn on the light."""
-        self._last_kwargs = kwargs
-        await self._debounced_turn_on.async_call()
+        """Turn on the light.
 
-    async def _async_debounced_turn_on(self):
+        Every attribute is sent in the same command and shown right away,
+        the device confirms them through SignalR.
+        """
         LOG.info("%s Turning on", self._device._tag)
-        await self._device.set_attribute("is_on", True)
-        if ATTR_BRIGHTNESS in self._last_kwargs:
+        command = {"is_on": True}
+        if ATTR_BRIGHTNESS in kwargs:
             LOG.info(
-                f"{self._device._tag} Setting brightness to {self._last_kwargs[ATTR_BRIGHTNESS]}"
-            )
-            await self._device.set_attribute(
-                "intensity", self._last_kwargs[ATTR_BRIGHTNESS] / 255
-            )
-        if ATTR_HS_COLOR in self._last_kwargs:
-            LOG.info(
-                f"{self._device._tag} Setting HS Color to {self._last_kwargs[ATTR_HS_COLOR]}"
-            )
-            await self._device.set_attribute("hue", self._last_kwargs[ATTR_HS_COLOR][0])
-            await self._device.set_attribute(
-                "saturation", self._last_kwargs[ATTR_HS_COLOR][1]
+                f"{self._device._tag} Setting brightness to {kwargs[ATTR_BRIGHTNESS]}"
             )
-        self.async_schedule_update_ha_state(True)
+            command["intensity"] = kwargs[ATTR_BRIGHTNESS] / 255
+        if ATTR_HS_COLOR in kwargs:
+            LOG.info(f"{self._device._tag} Setting HS Color to {kwargs[ATTR_HS_COLOR]}")
+            command["hue"], command["saturation"] = kwargs[ATTR_HS_COLOR]
+        await self._commands.async_write(command)
@@ -0,0 +1,62 @@
+"""One-shot migrations of the Hilo integration."""
+
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import CONF_MIGRATIONS, LOG
+
+# "Defi Hilo en cours" enum sensor replaced by a binary sensor
+MIGRATION_CHALLENGE_IN_PROGRESS = "challenge_in_progress"
+# Entity ids of the gateway and energy entities renamed to their old names
+MIGRATION_ENTITY_IDS = "entity_ids"
+# Gateway device and entities moved from its DSN to its MAC address
+MIGRATION_GATEWAY_IDENTIFIER = "gateway_identifier"
+# Legacy unique ids migrated by the entity constructors
+MIGRATION_UNIQUE_IDS = "unique_ids"
+
+
+class MigrationTracker:
+    """Keep track of the migrations completed for a config entry.
+
+    The names of the completed migrations are stored in the config entry
+    data so they are skipped on the following startups. Clearing them makes
+    every migration run again on the next setup.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the tracker."""
+        self._hass = hass
+        self._entry = entry
+
+    @property
+    def completed(self) -> frozenset[str]:
+        """Return the names of the completed migrations."""
+        return frozenset(self._entry.data.get(CONF_MIGRATIONS, ()))
+
+    def pending(self, name: str) -> bool:
+        """Return whether a migration still has to run."""
+        return name not in self.completed
+
+    @callback
+    def async_mark_done(self, *names: str) -> None:
+        """Record migrations as completed."""
+        completed = self.completed | set(names)
+        if completed == self.completed:
+            return
+        LOG.debug("Migrations completed: %s", sorted(names))
+        self._hass.config_entries.async_update_entry(
+            self._entry,
+            data={**self._entry.data, CONF_MIGRATIONS: sorted(completed)},
+        )
+
+    @callback
+    def async_reset(self) -> None:
+        """Forget the completed migrations so they run again."""
+        if CONF_MIGRATIONS not in self._entry.data:
+            return
+        LOG.info("Migrations will run again on the next setup")
+        data = {**self._entry.data}
+        data.pop(CONF_MIGRATIONS)
+        self._hass.config_entries.async_update_entry(self._entry, data=data)
@@ -0,0 +1,40 @@
+"""Entity registry index for the Hilo integration."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from .const import DOMAIN
+
+
+class EntityRegistryIndex:
+    """Index of the Hilo entities of the entity registry by unique id.
+
+    Entity constructors used to look entities up in the registry one at a
+    time, some of them by scanning every entry. The index is built in a
+    single pass over the registry before the entities are created and kept
+    up to date when a unique id is migrated.
+    """
+
+    __slots__ = ("_entity_ids",)
+
+    def __init__(self, entries: Iterable[Any]) -> None:
+        """Build the index from the registry entries."""
+        self._entity_ids: dict[tuple[str, str], str] = {
+            (entry.domain, entry.unique_id): entry.entity_id
+            for entry in entries
+            if entry.platform == DOMAIN
+        }
+
+    def __len__(self) -> int:
+        """Return the number of indexed entities."""
+        return len(self._entity_ids)
+
+    def get(self, platform: str, unique_id: str) -> str | None:
+        """Return the entity id of a Hilo entity, if registered."""
+        return self._entity_ids.get((str(platform), unique_id))
+
+    def move(self, platform: str, old_unique_id: str, new_unique_id: str) -> None:
+        """Follow the migration of an entity to a new unique id."""
+        if entity_id := self._entity_ids.pop((str(platform), old_unique_id), None):
+            self._entity_ids[(str(platform), new_unique_id)] = entity_id
@@ -0,0 +1,111 @@
+"""Reward history helpers for the Hilo integration."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Iterable, Iterator
+
+
+class SeasonEvents:
+    """Events of a reward season, keyed by event id and kept sorted by id.
+
+    Websocket updates replace or insert a single event at a time. Replacing
+    is a dict lookup, and a new id is appended to the list of ids, which is
+    only sorted again the next time it's read and only if the new id came
+    out of order. Events usually arrive in id order, so the list rarely
+    needs sorting. A plain list is only materialized when the history needs
+    to be serialized.
+    """
+
+    __slots__ = ("_events", "_ids", "_sorted")
+
+    def __init__(self, events: Iterable[dict[str, Any]] = ()) -> None:
+        """Initialize the container from an iterable of event dicts."""
+        self._events: dict[int, dict[str, Any]] = {}
+        self._ids: list[int] = []
+        self._sorted = True
+        for event in events:
+            self.upsert(event)
+
+    def _sorted_ids(self) -> list[int]:
+        if not self._sorted:
+            self._ids.sort()
+            self._sorted = True
+        return self._ids
+
+    def __contains__(self, event_id: Any) -> bool:
+        """Return whether an event with this id is in the season."""
+        return self._key(event_id) in self._events
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Iterate over the events in event id order."""
+        return (self._events[event_id] for event_id in self._sorted_ids())
+
+    def __len__(self) -> int:
+        """Return the number of events in the season."""
+        return len(self._ids)
+
+    @staticmethod
+    def _key(event_id: Any) -> int:
+        return int(event_id)
+
+    def get(self, event_id: Any) -> dict[str, Any] | None:
+        """Return the event with this id, if any."""
+        return self._events.get(self._key(event_id))
+
+    def upsert(self, event: dict[str, Any]) -> bool:
+        """Insert or replace an event, return True if it was inserted."""
+        event_id = self._key(event["event_id"])
+        inserted = event_id not in self._events
+        if inserted:
+            if self._ids and event_id < self._ids[-1]:
+                self._sorted = False
+            self._ids.append(event_id)
+        self._events[event_id] = event
+        return inserted
+
+    def remove(self, event_id: Any) -> None:
+        """Remove an event from the season."""
+        key = self._key(event_id)
+        if self._events.pop(key, None) is None:
+            return
+        ids = self._sorted_ids()
+        del ids[bisect_left(ids, key)]
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the events as a list sorted by event id."""
+        return list(self)
+
+    def page(self, offset: int, limit: int) -> list[dict[str, Any]]:
+        """Return a slice of the events, newest first."""
+        end = len(self._ids) - offset
+        if end <= 0 or limit <= 0:
+            return []
+        ids = self._sorted_ids()[max(end - limit, 0) : end]
+        return [self._events[event_id] for event_id in reversed(ids)]
+
+
+def paginate_history(
+    history: list[dict[str, Any]],
+    season: str | None = None,
+    offset: int = 0,
+    limit: int = 50,
+) -> dict[str, Any]:
+    """Build a service response page out of the reward history.
+
+    Seasons are filtered on their name when ``season`` is given and the
+    events of each returned season are paged newest first.
+    """
+    seasons = []
+    for entry in history:
+        if season is not None and str(entry.get("season")) != str(season):
+            continue
+        events: SeasonEvents = entry["events"]
+        seasons.append(
+            {
+                **{k: v for k, v in entry.items() if k != "events"},
+                "event_count": len(events),
+                "events": events.page(offset, limit),
+            }
+        )
+    return {"offset": offset, "limit": limit, "seasons": seasons}
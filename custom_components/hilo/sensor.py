@@ -3,14 +3,18 @@
 from __future__ import annotations
 
 import asyncio
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from os.path import isfile
+from typing import Any, Callable
 
 import aiofiles
-from homeassistant.components.integration.sensor import METHOD_LEFT, IntegrationSensor
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
@@ -25,7 +29,6 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfSoundPressure,
     UnitOfTemperature,
-    __short_version__ as current_version,
 )
 
 # This is to add backward compatibility
@@ -38,25 +41,51 @@ except ImportError:
 
     _PARTS_PER_MILLION = CONCENTRATION_PARTS_PER_MILLION
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry as er
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import (
+    config_validation as cv,
+    entity_platform,
+    entity_registry as er,
+)
 from homeassistant.helpers.debounce import Debouncer
-from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_state_change_event
-from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.event import (
+    async_track_point_in_time,
+    async_track_state_change_event,
+)
+from homeassistant.helpers.restore_state import RestoredExtraData, RestoreEntity
+from homeassistant.helpers.typing import StateType
 from homeassistant.util import Throttle, slugify
 import homeassistant.util.dt as dt_util
-from packaging.version import Version
 from pyhilo.const import UNMONITORED_DEVICES
 from pyhilo.device import HiloDevice
 from pyhilo.event import Event
 from pyhilo.util import from_utc_timestamp
+import voluptuous as vol
 import yaml
 from yaml.scanner import ScannerError
 
-from . import Hilo
+from . import SIGNAL_CHALLENGE_UPDATE, SIGNAL_DEVICES_ADDED, Hilo
+from .challenge import (
+    CHALLENGE_METRICS,
+    ConsumptionRefreshController,
+    challenge_metrics,
+)
 from .const import (
+    ATTR_LIMIT,
+    ATTR_OFFSET,
+    ATTR_SEASON,
     CONF_ENERGY_METER_PERIOD,
     CONF_GENERATE_ENERGY_METERS,
     CONF_HQ_PLAN_NAME,
@@ -68,20 +97,26 @@ from .const import (
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_UNTARIFICATED_DEVICES,
     DOMAIN,
+    EVENT_CHALLENGE_PHASE,
     EVENT_SCAN_INTERVAL_REDUCTION,
     HILO_ENERGY_TOTAL,
     HILO_SENSOR_CLASSES,
     LOG,
-    MAX_SUB_INTERVAL,
     MIN_SCAN_INTERVAL,
     NOTIFICATION_SCAN_INTERVAL,
+    REWARD_HISTORY_MAX_PAGE_SIZE,
+    REWARD_HISTORY_PAGE_SIZE,
     REWARD_SCAN_INTERVAL,
+    REWARD_SUMMARY_EVENTS,
+    SERVICE_GET_REWARD_HISTORY,
     TARIFF_LIST,
     WEATHER_CONDITIONS,
     WEATHER_SCAN_INTERVAL,
 )
+from .energy import TOTAL_TARIFF, energy_counter_attribute
 from .entity import HiloEntity
-from .managers import EnergyManager, UtilityManager
+from .managers import EnergyManager
+from .rewards import SeasonEvents, paginate_history
 
 WIFI_STRENGTH = {
     "Low": 1,
@@ -90,6 +125,27 @@ WIFI_STRENGTH = {
     "Full": 4,
 }
 
+# Name, icon and unit of the challenge metric sensors
+CHALLENGE_METRIC_SENSORS = {
+    "allowed_kwh": (
+        "Defi Hilo limite max",
+        "mdi:lightning-bolt",
+        UnitOfEnergy.KILO_WATT_HOUR,
+    ),
+    "used_kwh": (
+        "Defi Hilo kWh utilises",
+        "mdi:lightning-bolt-outline",
+        UnitOfEnergy.KILO_WATT_HOUR,
+    ),
+    "remaining_cash": ("Defi Hilo montant restant", "mdi:cash", CURRENCY_DOLLAR),
+    "predicted_cash": ("Defi Hilo montant predit", "mdi:cash-clock", CURRENCY_DOLLAR),
+    "accumulated_cash": (
+        "Defi Hilo montant accumule",
+        "mdi:cash-plus",
+        CURRENCY_DOLLAR,
+    ),
+}
+
 
 # From netatmo integration
 def process_wifi(strength: int) -> str:
@@ -108,13 +164,145 @@ def validate_tariff_list(tariff_config):
     return TARIFF_LIST
 
 
+@dataclass(frozen=True, kw_only=True)
+class HiloSensorEntityDescription(SensorEntityDescription):
+    """Describe a Hilo sensor reading a single device attribute.
+
+    The unique id is built from the key, the name is appended to the device
+    name and ``value_fn`` converts the raw attribute value.
+    """
+
+    attribute: str
+    value_fn: Callable[[Any], StateType] = int
+    icon_fn: Callable[[HiloDevice, StateType], str]
+    unavailable_icon: str = "mdi:lan-disconnect"
+    attributes_fn: Callable[[HiloDevice], dict[str, Any]] | None = None
+    excluded_models: frozenset[str] = frozenset()
+    # The state is a label even though the device class is numeric
+    label_state: bool = False
+    # Also migrate the unique id based on the slugified device identifier
+    migrate_identifier_unique_id: bool = True
+
+    def supports(self, device: HiloDevice) -> bool:
+        """Return whether the device provides this sensor."""
+        return device.model not in self.excluded_models and device.has_attribute(
+            self.attribute
+        )
+
+
+def battery_icon(device: HiloDevice, value: int) -> str:
+    """Return the battery icon matching the level."""
+    level = round(value / 10) * 10
+    if level < 10:
+        return "mdi:battery-alert"
+    return f"mdi:battery-{level}"
+
+
+def thermometer_icon(device: HiloDevice, value: float) -> str:
+    """Return the thermometer icon matching the temperature."""
+    if value >= 22:
+        return "mdi:thermometer-high"
+    if value >= 18:
+        return "mdi:thermometer-low"
+    return "mdi:thermometer-alert"
+
+
+def wifi_icon(device: HiloDevice, value: str) -> str:
+    """Return the Wi-Fi icon matching the signal strength."""
+    if device.get_value("wifi_status", 0) == 0:
+        return "mdi:wifi-strength-off"
+    return f"mdi:wifi-strength-{WIFI_STRENGTH[value]}"
+
+
+DEVICE_SENSORS: tuple[HiloSensorEntityDescription, ...] = (
+    HiloSensorEntityDescription(
+        key="battery",
+        name="Battery",
+        attribute="battery",
+        device_class=SensorDeviceClass.BATTERY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon_fn=battery_icon,
+    ),
+    HiloSensorEntityDescription(
+        key="co2",
+        name="CO2",
+        attribute="co2",
+        device_class=SensorDeviceClass.CO2,
+        native_unit_of_measurement=_PARTS_PER_MILLION,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon_fn=lambda device, value: "mdi:molecule-co2",
+    ),
+    HiloSensorEntityDescription(
+        key="temperature",
+        name="Temperature",
+        attribute="current_temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=float,
+        icon_fn=thermometer_icon,
+        unavailable_icon="mdi:thermometer-off",
+    ),
+    HiloSensorEntityDescription(
+        key="noise",
+        name="Noise",
+        attribute="noise",
+        native_unit_of_measurement=UnitOfSoundPressure.DECIBEL,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon_fn=lambda device, value: (
+            "mdi:volume-vibrate" if value > 0 else "mdi:volume-mute"
+        ),
+    ),
+    HiloSensorEntityDescription(
+        key="power",
+        name="Power",
+        attribute="power",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        excluded_models=frozenset(UNMONITORED_DEVICES),
+        icon_fn=lambda device, value: (
+            "mdi:power-plug" if value > 0 else "mdi:power-plug-off"
+        ),
+    ),
+    HiloSensorEntityDescription(
+        key="target-temperature",
+        name="Target Temperature",
+        attribute="target_temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=float,
+        icon_fn=thermometer_icon,
+        unavailable_icon="mdi:thermometer-off",
+    ),
+    HiloSensorEntityDescription(
+        key="wifistrength",
+        name="WifiStrength",
+        attribute="wifi_status",
+        device_class=SensorDeviceClass.SIGNAL_STRENGTH,
+        native_unit_of_measurement=SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=process_wifi,
+        icon_fn=wifi_icon,
+        unavailable_icon="mdi:wifi-strength-off",
+        attributes_fn=lambda device: {
+            "wifi_signal": device.get_value("wifi_status", 0)
+        },
+        label_state=True,
+        migrate_identifier_unique_id=False,
+    ),
+)
+
+
 def generate_entities_from_device(device, hilo, scan_interval):
     """Generate the entities from the device description."""
     entities = []
     if device.type == "Gateway":
-        entities.append(
-            HiloChallengeSensor(hilo, device, scan_interval),
-        )
+        challenge_sensor = HiloChallengeSensor(hilo, device, scan_interval)
+        entities.append(challenge_sensor)
+        entities.extend(challenge_sensor.metric_sensors.values())
         entities.append(
             HiloRewardSensor(hilo, device, scan_interval),
         )
@@ -124,32 +312,34 @@ def generate_entities_from_device(device, hilo, scan_interval):
         entities.append(
             HiloOutdoorTempSensor(hilo, device, scan_interval),
         )
-    if device.has_attribute("battery"):
-        entities.append(BatterySensor(hilo, device))
-    if device.has_attribute("co2"):
-        entities.append(Co2Sensor(hilo, device))
-    if device.has_attribute("current_temperature"):
-        entities.append(TemperatureSensor(hilo, device))
     if device.type in HILO_SENSOR_CLASSES:
-        entities.append(DeviceSensor(hilo, device))
-    if device.has_attribute("noise"):
-        entities.append(NoiseSensor(hilo, device))
-    if device.has_attribute("power") and device.model not in UNMONITORED_DEVICES:
-        entities.append(PowerSensor(hilo, device))
-    if device.has_attribute("target_temperature"):
-        entities.append(TargetTemperatureSensor(hilo, device))
-    if device.has_attribute("wifi_status"):
-        entities.append(WifiStrengthSensor(hilo, device))
+        entities.append(device_sensor_class(hilo.unrecorded_attributes)(hilo, device))
+    for description in DEVICE_SENSORS:
+        if description.supports(device):
+            entities.append(HiloDeviceSensor(hilo, device, description))
     return entities
 
 
+async def async_get_reward_history(
+    entity: SensorEntity, call: ServiceCall
+) -> ServiceResponse:
+    """Return a page of the reward history of the reward sensor."""
+    if not isinstance(entity, HiloRewardSensor):
+        raise ServiceValidationError(
+            f"{entity.entity_id} has no reward history, target the "
+            "Hilo rewards sensor instead"
+        )
+    return await entity.async_get_reward_history(
+        call.data.get(ATTR_SEASON), call.data[ATTR_OFFSET], call.data[ATTR_LIMIT]
+    )
+
+
 # noinspection GrazieInspection
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up Hilo sensors based on a config entry."""
     hilo = hass.data[DOMAIN][entry.entry_id]
-    new_entities = []
     cost_entities = []
     hq_plan_name = entry.options.get(CONF_HQ_PLAN_NAME, DEFAULT_HQ_PLAN_NAME)
     untarificated_devices = entry.options.get(
@@ -164,39 +354,64 @@ async def async_setup_entry(
     )
     tariff_config = CONF_TARIFF.get(hq_plan_name)
     if untarificated_devices:
-        default_tariff_list = ["total"]
+        default_tariff_list = [TOTAL_TARIFF]
     else:
         default_tariff_list = validate_tariff_list(tariff_config)
     if generate_energy_meters:
         energy_manager = await EnergyManager().init(hass, energy_meter_period)
-        utility_manager = UtilityManager(hass, energy_meter_period, default_tariff_list)
 
     def create_energy_entity(hilo, device):
-        device._energy_entity = EnergySensor(hilo, device, hass)
-        new_entities.append(device._energy_entity)
+        device._energy_entity = EnergySensor(hilo, device)
+        entities = [device._energy_entity]
         energy_entity = f"{slugify(device.name)}_hilo_energy"
         if energy_entity == HILO_ENERGY_TOTAL:
             LOG.error(
                 "An hilo entity can't be named 'total' because it conflicts "
                 "with the generated name for the smart energy meter"
             )
-            return
+            return entities
         tariff_list = default_tariff_list
         if device.type == "Meter":
             energy_entity = HILO_ENERGY_TOTAL
             tariff_list = validate_tariff_list(tariff_config)
-        net_consumption = device.net_consumption
-        utility_manager.add_meter(energy_entity, tariff_list, net_consumption)
-
-    for d in hilo.devices.all:
-        LOG.debug("Adding device %s", d)
-        new_entities.extend(generate_entities_from_device(d, hilo, scan_interval))
-        if d.has_attribute("power") and d.model not in UNMONITORED_DEVICES:
-            # If we opt out the generation of meters we just create the power sensors
-            if generate_energy_meters:
-                create_energy_entity(hilo, d)
-
-    async_add_entities(new_entities)
+        for tariff in tariff_list:
+            entities.append(HiloTariffEnergySensor(hilo, device, energy_entity, tariff))
+        return entities
+
+    @callback
+    def async_add_devices(devices: list[HiloDevice]) -> None:
+        new_entities = []
+        for d in devices:
+            LOG.debug("Adding device %s", d)
+            new_entities.extend(generate_entities_from_device(d, hilo, scan_interval))
+            monitored = d.has_attribute("power") and d.model not in UNMONITORED_DEVICES
+            if monitored or energy_counter_attribute(d):
+                # If we opt out the generation of meters we just create the power sensors
+                if generate_energy_meters:
+                    new_entities.extend(create_energy_entity(hilo, d))
+        async_add_entities(new_entities)
+
+    async_add_devices(hilo.devices.all)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_GET_REWARD_HISTORY,
+        {
+            vol.Optional(ATTR_SEASON): cv.string,
+            vol.Optional(ATTR_OFFSET, default=0): cv.positive_int,
+            vol.Optional(ATTR_LIMIT, default=REWARD_HISTORY_PAGE_SIZE): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=REWARD_HISTORY_MAX_PAGE_SIZE)
+            ),
+        },
+        async_get_reward_history,
+        supports_response=SupportsResponse.ONLY,
+    )
+
     if not generate_energy_meters:
         return
     # Creating cost sensors based on plan
@@ -231,100 +446,91 @@ async def async_setup_entry(
         hilo._hass, ["sensor.hilo_rate_current"], hilo_rate_current._handle_state_change
     )
 
-    # This setups the utility_meter platform
-    await utility_manager.update(async_add_entities)
     # This sends the entities to the energy dashboard
     await energy_manager.update()
     hilo.check_tarif()
 
 
-class BatterySensor(HiloEntity, SensorEntity):
-    """Define a Battery sensor entity."""
+class HiloDeviceSensor(HiloEntity, SensorEntity):
+    """Define a sensor reading a device attribute.
 
-    _attr_device_class = SensorDeviceClass.BATTERY
-    _attr_native_unit_of_measurement = PERCENTAGE
-    _attr_state_class = SensorStateClass.MEASUREMENT
+    What the sensor reads and how it is shown comes from its
+    HiloSensorEntityDescription.
+    """
 
-    def __init__(self, hilo, device):
-        """Hilo battery sensor initialization."""
-        self._attr_name = f"{device.name} Battery"
+    entity_description: HiloSensorEntityDescription
+
+    def __init__(
+        self,
+        hilo: Hilo,
+        device: HiloDevice,
+        description: HiloSensorEntityDescription,
+    ) -> None:
+        """Initialize."""
+        self.entity_description = description
+        self._attr_name = f"{device.name} {description.name}"
         super().__init__(hilo, name=self._attr_name, device=device)
-        old_unique_id = f"{slugify(device.name)}-battery"
-        self._attr_unique_id = f"{device.identifier.lower()}-battery"
+        self._attr_unique_id = f"{device.identifier.lower()}-{description.key}"
         hilo.async_migrate_unique_id(
-            old_unique_id, self._attr_unique_id, Platform.SENSOR
-        )
-        hilo.async_migrate_unique_id(
-            f"{slugify(device.identifier)}-battery",
+            f"{slugify(device.name)}-{description.key}",
             self._attr_unique_id,
             Platform.SENSOR,
         )
-        LOG.debug("Setting up BatterySensor entity: %s", self._attr_name)
-
-    @property
-    def state(self):
-        """Return the battery level."""
-        return str(int(self._device.get_value("battery", 0)))
-
-    @property
-    def icon(self):
-        """Return the icon representing the battery level."""
-        if not self._device.available:
-            return "mdi:lan-disconnect"
-        level = round(int(self._device.get_value("battery", 0)) / 10) * 10
-        if level < 10:
-            return "mdi:battery-alert"
-        return f"mdi:battery-{level}"
-
-
-class Co2Sensor(HiloEntity, SensorEntity):
-    """Define a Co2 sensor entity."""
-
-    _attr_device_class = SensorDeviceClass.CO2
-    _attr_native_unit_of_measurement = _PARTS_PER_MILLION
-    _attr_state_class = SensorStateClass.MEASUREMENT
-
-    def __init__(self, hilo, device):
-        """Hilo CO2 sensor initialization."""
-        self._attr_name = f"{device.name} CO2"
-        super().__init__(hilo, name=self._attr_name, device=device)
-        old_unique_id = f"{slugify(device.name)}-co2"
-        self._attr_unique_id = f"{device.identifier.lower()}-co2"
-        hilo.async_migrate_unique_id(
-            old_unique_id, self._attr_unique_id, Platform.SENSOR
-        )
-        hilo.async_migrate_unique_id(
-            f"{slugify(device.identifier)}-co2", self._attr_unique_id, Platform.SENSOR
+        if description.migrate_identifier_unique_id:
+            hilo.async_migrate_unique_id(
+                f"{slugify(device.identifier)}-{description.key}",
+                self._attr_unique_id,
+                Platform.SENSOR,
+            )
+        LOG.debug("Setting up %s sensor entity: %s", description.key, self._attr_name)
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the value, its icon and the extra attributes."""
+        super()._async_update_attrs()
+        description = self.entity_description
+        self._attr_native_value = description.value_fn(
+            self._device.get_value(description.attribute, 0)
         )
-        LOG.debug("Setting up CO2Sensor entity: %s", self._attr_name)
+        if self._attr_available:
+            self._attr_icon = description.icon_fn(self._device, self._attr_native_value)
+        else:
+            self._attr_icon = description.unavailable_icon
+        if description.attributes_fn:
+            self._attr_extra_state_attributes = description.attributes_fn(self._device)
 
     @property
     def state(self):
-        """Return the CO2 level."""
-        return str(int(self._device.get_value("co2", 0)))
+        """Return the state of the sensor.
+
+        Labels such as the Wi-Fi strength bypass the sensor's numeric
+        validation of the native value.
+        """
+        if self.entity_description.label_state:
+            return self._attr_native_value
+        return super().state
 
-    @property
-    def icon(self):
-        """Return the icon representing the CO2 level."""
-        if not self._device.available:
-            return "mdi:lan-disconnect"
-        return "mdi:molecule-co2"
 
+class EnergySensor(HiloEntity, RestoreSensor):
+    """Define a Hilo energy sensor entity.
 
-class EnergySensor(IntegrationSensor):
-    """Define a Hilo energy sensor entity."""
+    The energy comes from the integration's energy accumulator, which
+    follows the energy counter of the device when it has one and integrates
+    its power otherwise.
+    """
 
     _attr_device_class = SensorDeviceClass.ENERGY
     _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
-    _attr_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
     _attr_suggested_display_precision = 2
     _attr_icon = "mdi:lightning-bolt"
 
-    def __init__(self, hilo, device, hass):
+    def __init__(self, hilo: Hilo, device: HiloDevice) -> None:
         """Hilo Energy sensor initialization."""
-        self._device = device
-        self._attr_name = f"{device.name} Hilo Energy"
+        name = f"{device.name} Hilo Energy"
+        if device.type == "Meter":
+            name = HILO_ENERGY_TOTAL
+        super().__init__(hilo, name=name, device=device)
         old_unique_id = f"hilo_energy_{slugify(device.name)}"
         self._attr_unique_id = f"{device.identifier.lower()}-energy"
         hilo.async_migrate_unique_id(
@@ -335,294 +541,112 @@ class EnergySensor(IntegrationSensor):
             self._attr_unique_id,
             Platform.SENSOR,
         )
-        self._unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
-        self._suggested_display_precision = 2
-
-        if device.type == "Meter":
-            self._attr_name = HILO_ENERGY_TOTAL
-
-        power_unique_id = f"{device.identifier.lower()}-power"
-        entity_registry = er.async_get(hass)
-        self._source = next(
-            (
-                entry.entity_id
-                for entry in entity_registry.entities.values()
-                if entry.unique_id == power_unique_id and entry.platform == DOMAIN
-            ),
-            f"sensor.{slugify(device.name)}_power",  # fallback
-        )
-        # ic-dev21: Set initial state and last_valid_state, removes log errors and unavailable states
-        initial_state = 0
-        self._attr_native_value = initial_state
-        self._attr_last_valid_state = initial_state
-        self._device_info = DeviceInfo(
-            identifiers={(DOMAIN, self._device.identifier)},
-        )
+        LOG.debug("Setting up EnergySensor entity: %s", self._attr_name)
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the energy from the accumulator."""
+        super()._async_update_attrs()
+        # Like the integration sensors, the energy stays available while the
+        # device is disconnected
+        self._attr_available = True
+        energy = self._hilo.energy.energy(self._device.id)
+        self._attr_native_value = None if energy is None else round(energy, 2)
 
-        if Version(current_version) >= Version("2026.8"):
-            super().__init__(
-                integration_method=METHOD_LEFT,
-                max_sub_interval=timedelta(seconds=MAX_SUB_INTERVAL),
-                name=self._attr_name,
-                round_digits=2,
-                source_entity=self._source,
-                unique_id=self._attr_unique_id,
-                unit_prefix="k",
-                unit_time="h",
-            )
-        elif Version(current_version) >= Version("2025.8"):
-            super().__init__(
-                hass,
-                integration_method=METHOD_LEFT,
-                max_sub_interval=timedelta(seconds=MAX_SUB_INTERVAL),
-                name=self._attr_name,
-                round_digits=2,
-                source_entity=self._source,
-                unique_id=self._attr_unique_id,
-                unit_prefix="k",
-                unit_time="h",
-            )
-        elif Version(current_version) >= Version("2024.7"):
-            super().__init__(
-                integration_method=METHOD_LEFT,
-                max_sub_interval=timedelta(seconds=MAX_SUB_INTERVAL),
-                name=self._attr_name,
-                round_digits=2,
-                source_entity=self._source,
-                unique_id=self._attr_unique_id,
-                unit_prefix="k",
-                unit_time="h",
-                device_info=self._device_info,
-            )
-        else:
-            super().__init__(
-                integration_method=METHOD_LEFT,
-                name=self._attr_name,
-                round_digits=2,
-                source_entity=self._source,
-                unique_id=self._attr_unique_id,
-                unit_prefix="k",
-                unit_time="h",
-                device_info=self._device_info,
+    async def async_added_to_hass(self) -> None:
+        """Restore the energy and start accumulating."""
+        energy = 0.0
+        if (last_data := await self.async_get_last_sensor_data()) is not None:
+            try:
+                energy = float(last_data.native_value)
+            except (TypeError, ValueError):
+                LOG.warning(
+                    "Unable to restore the energy of %s: %s",
+                    self._attr_name,
+                    last_data.native_value,
+                )
+        self.async_on_remove(
+            self._hilo.energy.async_track(
+                self._device, energy, self._async_energy_updated
             )
-        self._unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
-        self._suggested_display_precision = 2
-
-        self._attr_icon = "mdi:lightning-bolt"
-        LOG.debug(
-            "Setting up EnergySensor entity: %s with source %s",
-            self._attr_name,
-            self._source,
         )
-
-    @property
-    def unit_of_measurement(self):
-        """Return the unit of measurement."""
-        return self._attr_unit_of_measurement
-
-    @property
-    def suggested_display_precision(self):
-        """Return the suggested display precision."""
-        return self._attr_suggested_display_precision
-
-    async def async_added_to_hass(self) -> None:
-        """Handle entity which will be added."""
-        LOG.debug("Added to hass: %s", self._attr_name)
         await super().async_added_to_hass()
 
+    @callback
+    def _async_energy_updated(self) -> None:
+        self._async_update_attrs()
+        self.async_write_ha_state()
 
-class NoiseSensor(HiloEntity, SensorEntity):
-    """Define a Netatmo noise sensor entity."""
-
-    _attr_native_unit_of_measurement = UnitOfSoundPressure.DECIBEL
-    _attr_state_class = SensorStateClass.MEASUREMENT
-
-    def __init__(self, hilo, device):
-        """Hilo Noise sensor initialization."""
-        self._attr_name = f"{device.name} Noise"
-        super().__init__(hilo, name=self._attr_name, device=device)
-        old_unique_id = f"{slugify(device.name)}-noise"
-        self._attr_unique_id = f"{device.identifier.lower()}-noise"
-        hilo.async_migrate_unique_id(
-            old_unique_id, self._attr_unique_id, Platform.SENSOR
-        )
-        hilo.async_migrate_unique_id(
-            f"{slugify(device.identifier)}-noise", self._attr_unique_id, Platform.SENSOR
-        )
-        LOG.debug("Setting up NoiseSensor entity: %s", self._attr_name)
-
-    @property
-    def state(self):
-        """Return the current noise level."""
-        return str(int(self._device.get_value("noise", 0)))
-
-    @property
-    def icon(self):
-        """Return the icon representing the noise level."""
-        if not self._device.available:
-            return "mdi:lan-disconnect"
-        if int(self._device.get_value("noise", 0)) > 0:
-            return "mdi:volume-vibrate"
-        return "mdi:volume-mute"
 
+class HiloTariffEnergySensor(HiloEntity, RestoreSensor):
+    """Define the energy of a device for one tariff over the current period.
 
-class PowerSensor(HiloEntity, SensorEntity):
-    """Define a Hilo power sensor entity."""
+    The energy accumulator adds the energy of the device to the bucket of
+    the current tariff and resets the buckets at the start of each period,
+    so no utility meter or tariff select is needed. The entity ids of the
+    utility meters it replaces are kept for the Energy dashboard.
+    """
 
-    _attr_device_class = SensorDeviceClass.POWER
-    _attr_native_unit_of_measurement = UnitOfPower.WATT
-    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_suggested_display_precision = 2
+    _attr_icon = "mdi:counter"
 
-    def __init__(self, hilo: Hilo, device: HiloDevice) -> None:
+    def __init__(self, hilo: Hilo, device: HiloDevice, meter: str, tariff: str) -> None:
         """Initialize."""
-        self._attr_name = f"{device.name} Power"
-        super().__init__(hilo, name=self._attr_name, device=device)
-        old_unique_id = f"{slugify(device.name)}-power"
-        self._attr_unique_id = f"{device.identifier.lower()}-power"
-        hilo.async_migrate_unique_id(
-            old_unique_id, self._attr_unique_id, Platform.SENSOR
-        )
-        hilo.async_migrate_unique_id(
-            f"{slugify(device.identifier)}-power", self._attr_unique_id, Platform.SENSOR
-        )
-        LOG.debug("Setting up PowerSensor entity: %s", self._attr_name)
-
-    @property
-    def state(self):
-        """Return the current power state."""
-        return str(int(self._device.get_value("power", 0)))
-
-    @property
-    def icon(self):
-        """Return the icon representing the power state."""
-        if not self._device.available:
-            return "mdi:lan-disconnect"
-        power = int(self._device.get_value("power", 0))
-        if power > 0:
-            return "mdi:power-plug"
-        return "mdi:power-plug-off"
-
-
-class TemperatureSensor(HiloEntity, SensorEntity):
-    """Define a Hilo temperature sensor entity."""
-
-    _attr_device_class = SensorDeviceClass.TEMPERATURE
-    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-    _attr_state_class = SensorStateClass.MEASUREMENT
-
-    def __init__(self, hilo, device):
-        """Hilo Temperature sensor initialization."""
-        self._attr_name = f"{device.name} Temperature"
-        super().__init__(hilo, name=self._attr_name, device=device)
-        old_unique_id = f"{slugify(device.name)}-temperature"
-        self._attr_unique_id = f"{device.identifier.lower()}-temperature"
-        hilo.async_migrate_unique_id(
-            old_unique_id, self._attr_unique_id, Platform.SENSOR
-        )
-        hilo.async_migrate_unique_id(
-            f"{slugify(device.identifier)}-temperature",
-            self._attr_unique_id,
-            Platform.SENSOR,
-        )
-        LOG.debug("Setting up TemperatureSensor entity: %s", self._attr_name)
-
-    @property
-    def state(self):
-        """Return the current temperature."""
-        return str(float(self._device.get_value("current_temperature", 0)))
-
-    @property
-    def icon(self):
-        """Return the icon representing the current temperature."""
-        current_temperature = int(self._device.get_value("current_temperature", 0))
-        if not self._device.available:
-            thermometer = "off"
-        elif current_temperature >= 22:
-            thermometer = "high"
-        elif current_temperature >= 18:
-            thermometer = "low"
-        else:
-            thermometer = "alert"
-        return f"mdi:thermometer-{thermometer}"
-
-
-class TargetTemperatureSensor(HiloEntity, SensorEntity):
-    """Define a Hilo target temperature sensor entity."""
-
-    _attr_device_class = SensorDeviceClass.TEMPERATURE
-    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-    _attr_state_class = SensorStateClass.MEASUREMENT
-
-    def __init__(self, hilo, device):
-        """Hilo Target Temperature sensor initialization."""
-        self._attr_name = f"{device.name} Target Temperature"
-        super().__init__(hilo, name=self._attr_name, device=device)
-        old_unique_id = f"{slugify(device.name)}-target-temperature"
-        self._attr_unique_id = f"{device.identifier.lower()}-target-temperature"
-        hilo.async_migrate_unique_id(
-            old_unique_id, self._attr_unique_id, Platform.SENSOR
-        )
-        hilo.async_migrate_unique_id(
-            f"{slugify(device.identifier)}-target-temperature",
-            self._attr_unique_id,
-            Platform.SENSOR,
-        )
-        LOG.debug("Setting up TargetTemperatureSensor entity: %s", self._attr_name)
-
-    @property
-    def state(self):
-        """Return the target temperature."""
-        return str(float(self._device.get_value("target_temperature", 0)))
-
-    @property
-    def icon(self):
-        """Return the icon representing the target temperature."""
-        target_temperature = int(self._device.get_value("target_temperature", 0))
-        if not self._device.available:
-            thermometer = "off"
-        elif target_temperature >= 22:
-            thermometer = "high"
-        elif target_temperature >= 18:
-            thermometer = "low"
-        else:
-            thermometer = "alert"
-        return f"mdi:thermometer-{thermometer}"
-
-
-class WifiStrengthSensor(HiloEntity, SensorEntity):
-    """Define a Wi-Fi strength sensor entity."""
-
-    _attr_device_class = SensorDeviceClass.SIGNAL_STRENGTH
-    _attr_native_unit_of_measurement = SIGNAL_STRENGTH_DECIBELS_MILLIWATT
-    _attr_state_class = SensorStateClass.MEASUREMENT
+        super().__init__(hilo, name=f"{meter} {tariff}", device=device)
+        self._tariff = tariff
+        self._attr_unique_id = f"{device.identifier.lower()}-energy-{tariff}"
+        self.entity_id = f"{Platform.SENSOR}.{meter}_{tariff}"
+        LOG.debug("Setting up TariffEnergySensor entity: %s", self._attr_name)
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the energy of the tariff and whether it's the current one."""
+        super()._async_update_attrs()
+        self._attr_available = True
+        energy = self._hilo.energy
+        value = energy.tariff_energy(self._device.id, self._tariff)
+        self._attr_native_value = None if value is None else round(value, 2)
+        self._attr_extra_state_attributes = {
+            "tariff": self._tariff,
+            "status": (
+                "collecting"
+                if energy.collecting(self._device.id, self._tariff)
+                else "paused"
+            ),
+            "last_reset": energy.last_reset.isoformat(),
+        }
 
-    def __init__(self, hilo, device):
-        """Hilo Wi-Fi strength sensor initialization."""
-        self._attr_name = f"{device.name} WifiStrength"
-        super().__init__(hilo, name=self._attr_name, device=device)
-        old_unique_id = f"{slugify(device.name)}-wifistrength"
-        self._attr_unique_id = f"{device.identifier.lower()}-wifistrength"
-        hilo.async_migrate_unique_id(
-            old_unique_id, self._attr_unique_id, Platform.SENSOR
+    async def async_added_to_hass(self) -> None:
+        """Restore the energy of the current period and start accumulating."""
+        energy = 0.0
+        last_state = await self.async_get_last_state()
+        if last_state is not None:
+            last_reset = dt_util.parse_datetime(
+                str(last_state.attributes.get("last_reset"))
+            )
+            if last_reset is not None and last_reset >= self._hilo.energy.last_reset:
+                try:
+                    energy = float(last_state.state)
+                except ValueError:
+                    LOG.warning(
+                        "Unable to restore the energy of %s: %s",
+                        self._attr_name,
+                        last_state.state,
+                    )
+        self.async_on_remove(
+            self._hilo.energy.async_track_tariff(
+                self._device, self._tariff, energy, self._async_energy_updated
+            )
         )
-        LOG.debug("Setting up WifiStrengthSensor entity: %s", self._attr_name)
-
-    @property
-    def state(self):
-        """Return the Wi-Fi signal strength."""
-        return process_wifi(self._device.get_value("wifi_status", 0))
-
-    @property
-    def icon(self):
-        """Return the icon representing the Wi-Fi strength."""
-        if not self._device.available or self._device.get_value("wifi_status", 0) == 0:
-            return "mdi:wifi-strength-off"
-        return f"mdi:wifi-strength-{WIFI_STRENGTH[self.state]}"
+        await super().async_added_to_hass()
 
-    @property
-    def extra_state_attributes(self):
-        """Return the Wi-Fi signal strength."""
-        return {"wifi_signal": self._device.get_value("wifi_status", 0)}
+    @callback
+    def _async_energy_updated(self) -> None:
+        self._async_update_attrs()
+        self.async_write_ha_state()
 
 
 class HiloNotificationSensor(HiloEntity, RestoreEntity, SensorEntity):
@@ -716,7 +740,7 @@ class HiloRewardSensor(HiloEntity, RestoreEntity, SensorEntity):
 
     _attr_device_class = SensorDeviceClass.MONETARY
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
-    _entity_component_unrecorded_attributes = frozenset({"history"})
+    _entity_component_unrecorded_attributes = frozenset({"last_events"})
 
     def __init__(self, hilo, device, scan_interval):
         """Hilo Reward sensor initialization."""
@@ -783,8 +807,29 @@ class HiloRewardSensor(HiloEntity, RestoreEntity, SensorEntity):
 
     @property
     def extra_state_attributes(self):
-        """Return the history attributes."""
-        return {"history": self._history}
+        """Return a summary of the current season.
+
+        The full history is only returned on demand by the get_reward_history
+        service so it isn't serialized on every state write.
+        """
+        if not self._history:
+            return {"season": None, "event_count": 0, "last_events": []}
+        current = self._history[0]
+        return {
+            "season": current.get("season"),
+            "season_total": current.get("totalReward", 0),
+            "event_count": len(current["events"]),
+            "last_events": current["events"].page(0, REWARD_SUMMARY_EVENTS),
+        }
+
+    async def async_get_reward_history(
+        self,
+        season: str | None = None,
+        offset: int = 0,
+        limit: int = REWARD_HISTORY_PAGE_SIZE,
+    ) -> ServiceResponse:
+        """Return a page of the reward history."""
+        return paginate_history(self._history, season, offset, limit)
 
     async def async_added_to_hass(self):
         """Handle entity about to be added to hass event."""
@@ -795,7 +840,7 @@ class HiloRewardSensor(HiloEntity, RestoreEntity, SensorEntity):
             self._state = last_state.state
         cached = await self._load_history()
         if cached:
-            self._history = cached
+            self._history = self._history_from_list(cached)
         else:
             await self._async_update()
 
@@ -821,39 +866,45 @@ class HiloRewardSensor(HiloEntity, RestoreEntity, SensorEntity):
             return
 
         event = Event(**challenge).as_dict()
-        corresponding_season = self._events_to_poll[event["event_id"]]
-        del self._events_to_poll[event["event_id"]]
-
-        for season in self._history:
-            if season.get("season") == corresponding_season:
-                for i, season_event in enumerate(season["events"]):
-                    if season_event["event_id"] == event["event_id"]:
-                        LOG.debug(
-                            "ChallengeId matched, replacing: %s", event["event_id"]
-                        )
+        corresponding_season = self._events_to_poll.pop(event["event_id"], None)
+        season = self._find_season(corresponding_season)
+        if season is None:
+            return
 
-                        # Some events from the websocket don't contain reward info. Copying it from history (API) if it's there
-                        event["reward"] = season_event.get("reward", 0.0)
-                        season["events"][i] = event  # On update
-                        season["events"] = [
-                            item
-                            for item in sorted(
-                                season["events"], key=lambda x: int(x["event_id"])
-                            )
-                        ]
-                        await self._save_history_debouncer.async_call()
-                        return
-                LOG.debug("ChallengeId did not match, appending: %s", event["event_id"])
-                season["events"].append(event)
-                season["events"] = [
-                    item
-                    for item in sorted(
-                        season["events"], key=lambda x: int(x["event_id"])
-                    )
-                ]
+        season_events = season["events"]
+        if (season_event := season_events.get(event["event_id"])) is not None:
+            LOG.debug("ChallengeId matched, replacing: %s", event["event_id"])
+            # Some events from the websocket don't contain reward info. Copying it from history (API) if it's there
+            event["reward"] = season_event.get("reward", 0.0)
+        else:
+            LOG.debug("ChallengeId did not match, appending: %s", event["event_id"])
+        season_events.upsert(event)
 
         await self._save_history_debouncer.async_call()
 
+    def _find_season(self, season_name):
+        """Return the history entry of a season, if any."""
+        if season_name is None:
+            return None
+        return next(
+            (season for season in self._history if season.get("season") == season_name),
+            None,
+        )
+
+    @staticmethod
+    def _history_from_list(history: list) -> list:
+        """Wrap the events of each season from a serialized history."""
+        return [
+            {**season, "events": SeasonEvents(season.get("events") or [])}
+            for season in history
+        ]
+
+    def _history_as_list(self) -> list:
+        """Materialize the history with plain event lists for serialization."""
+        return [
+            {**season, "events": season["events"].as_list()} for season in self._history
+        ]
+
     async def _async_update(self):
         seasons = await self._hilo._api.get_seasons(self._hilo.devices.location_id)
         self._events_to_poll = dict()
@@ -869,7 +920,9 @@ class HiloRewardSensor(HiloEntity, RestoreEntity, SensorEntity):
             season_data["totalReward"] = total
 
         if seasons:
-            current_history = await self._load_history()
+            current_history = self._history or self._history_from_list(
+                await self._load_history()
+            )
             new_history = []
 
             for idx, season in enumerate(seasons):
@@ -890,13 +943,8 @@ class HiloRewardSensor(HiloEntity, RestoreEntity, SensorEntity):
                     event = None
 
                     if current_history_season:
-                        current_history_event = next(
-                            (
-                                ev
-                                for ev in current_history_season["events"]
-                                if ev["event_id"] == raw_event["id"]
-                            ),
-                            None,
+                        current_history_event = current_history_season["events"].get(
+                            raw_event["id"]
                         )
 
                     start_date_utc = datetime.fromisoformat(raw_event["startDateUtc"])
@@ -919,13 +967,16 @@ class HiloRewardSensor(HiloEntity, RestoreEntity, SensorEntity):
                     if event:
                         events.append(event)
 
-                season["events"] = events
+                season["events"] = SeasonEvents(events)
                 new_history.append(season)
 
             self._history = new_history
             await self._save_history_debouncer.async_call()
-            for eventId in self._events_to_poll:
-                await self._hilo.subscribe_to_challenge(eventId)
+            # These are only needed until the reward details come in, they are
+            # polled again on the next update so there's no point replaying them.
+            await self._hilo.subscribe_to_challenges(
+                list(self._events_to_poll), replay=False
+            )
 
     async def _load_history(self) -> list:
         history: list = []
@@ -949,12 +1000,12 @@ class HiloRewardSensor(HiloEntity, RestoreEntity, SensorEntity):
         async with aiofiles.open(self._history_state_yaml, mode="w") as yaml_file:
             LOG.debug("Saving history state to yaml file")
             content = await asyncio.get_running_loop().run_in_executor(
-                None, yaml.dump, self._history
+                None, yaml.dump, self._history_as_list()
             )
             await yaml_file.write(content)
 
 
-class HiloChallengeSensor(HiloEntity, SensorEntity):
+class HiloChallengeSensor(HiloEntity, RestoreEntity, SensorEntity):
     """Hilo challenge sensor.
 
     Its state will be either:
@@ -998,7 +1049,19 @@ class HiloChallengeSensor(HiloEntity, SensorEntity):
         self.scan_interval = timedelta(seconds=EVENT_SCAN_INTERVAL_REDUCTION)
         self._state = "off"
         self._next_events = []
-        self._events = {}  # Store active events
+        self._unsub_phase_timer = None
+        # Store active events
+        self._events = hilo.challenge_events
+        self._phases = {}
+        self._consumption_refresh = ConsumptionRefreshController(
+            hilo.request_challenge_consumption_update,
+            partial(hilo.subscribe_to_challenge, force=True),
+        )
+        self._reward_rate = CONF_TARIFF.get(hilo.hq_plan_name, {}).get("reward_rate", 0)
+        self.metric_sensors = {
+            key: HiloChallengeMetricSensor(hilo, device, key)
+            for key in CHALLENGE_METRICS
+        }
         self.async_update = Throttle(timedelta(seconds=MIN_SCAN_INTERVAL))(
             self._async_update
         )
@@ -1010,37 +1073,26 @@ class HiloChallengeSensor(HiloEntity, SensorEntity):
         if event_data.get("progress") == "scheduled":
             event_id = event_data.get("id")
             if event_id:
-                event = Event(**event_data)
-                if self._hilo.appreciation > 0:
-                    event.appreciation(self._hilo.appreciation)
-                if self._hilo.pre_cold > 0:
-                    event.pre_cold(self._hilo.pre_cold)
-                self._events[event_id] = event
+                self._events.add(event_data)
                 self._update_next_events()
 
     async def handle_challenge_list_initial(self, challenges):
         """Handle initial challenge list."""
         LOG.debug("handle_challenge_list_initial challenges: %s", challenges)
-        self._events.clear()
-        LOG.debug("handle_challenge_list_initial events: %s", self._events)
+        active = []
         for challenge in challenges:
-            event_id = challenge.get("id")
             progress = challenge.get("progress")
             LOG.debug("handle_challenge_list_initial progress is %s", progress)
-            if challenge.get("progress") in ["scheduled", "inProgress"]:
-                event_id = challenge.get("id")
-                if event_id:
-                    event = Event(**challenge)
-                    if self._hilo.appreciation > 0:
-                        event.appreciation(self._hilo.appreciation)
-                    if self._hilo.pre_cold > 0:
-                        event.pre_cold(self._hilo.pre_cold)
-                    self._events[event_id] = event
+            if progress in ["scheduled", "inProgress"] and challenge.get("id"):
+                active.append(challenge)
+        # Events restored after a restart are reconciled with the hub's list
+        self._events.reconcile(active)
         self._update_next_events()
 
     async def handle_challenge_list_update(self, challenges):
         """Handle challenge list updates."""
         LOG.debug("handle_challenge_list_update is running")
+        changed = False
         for challenge in challenges:
             event_id = challenge.get("id")
             progress = challenge.get("progress")
@@ -1050,31 +1102,13 @@ class HiloChallengeSensor(HiloEntity, SensorEntity):
             if event_id in self._events:
                 if challenge.get("progress") == "completed":
                     # Find the oldest event based on recovery_end datetime
-                    oldest_event_id = min(
-                        self._events.keys(),
-                        key=lambda key: (
-                            self._events[key]
-                            .as_dict()
-                            .get("phases", {})
-                            .get("recovery_end", "")
-                        ),
-                    )
+                    oldest_event_id = self._events.oldest_id()
                     await asyncio.sleep(300)
-                    del self._events[oldest_event_id]
+                    changed |= self._events.remove(oldest_event_id)
                     break
-                else:
-                    current_event = self._events[event_id]
-                    LOG.debug(
-                        "handle_challenge_list_update current event is: %s",
-                        current_event,
-                    )
-                    updated_event = Event(**{**current_event.as_dict(), **challenge})
-                    if self._hilo.appreciation > 0:
-                        updated_event.appreciation(self._hilo.appreciation)
-                    if self._hilo.pre_cold > 0:
-                        updated_event.pre_cold(self._hilo.pre_cold)
-                    self._events[event_id] = updated_event
-        self._update_next_events()
+                changed |= self._events.patch(event_id, challenge)
+        if changed:
+            self._update_next_events()
 
     async def handle_challenge_details_update(self, challenge):
         """Handle challenge detail updates."""
@@ -1085,8 +1119,8 @@ class HiloChallengeSensor(HiloEntity, SensorEntity):
 
         # In case we get a consumption update (there is no event id),
         # get the event id of the next event so that we can update it
-        if event_id is None and len(self._next_events) > 0:
-            event_id = self._next_events[0]["event_id"]
+        if event_id is None:
+            event_id = self._events.first_id()
 
         progress = challenge.get("progress", "unknown")
 
@@ -1112,51 +1146,86 @@ class HiloChallengeSensor(HiloEntity, SensorEntity):
         LOG.debug("handle_challenge_details_update used_kwh is %s", used_kWh)
         LOG.debug("handle_challenge_details_update allowed_kwh is %s", allowed_kwh)
 
-        if event_id in self._events:
-            if challenge.get("progress") == "completed":
-                # ajout d'un asyncio sleep ici pour avoir l'état completed avant le retrait du challenge
-                await asyncio.sleep(300)
-                self._events.pop(event_id, None)
-
-            # Consumption update
-            elif used_wH is not None and used_wH > 0:
-                current_event = self._events[event_id]
-                current_event.update_wh(used_wH)
-                if baselinewH > 0:
-                    current_event.update_allowed_wh(baselinewH)
-            # For non consumption updates, we need an event id
-            elif event_has_id:
-                current_event = self._events[event_id]
-                updated_event = Event(**{**current_event.as_dict(), **challenge})
-                if self._hilo.appreciation > 0:
-                    updated_event.appreciation(self._hilo.appreciation)
-                if self._hilo.pre_cold > 0:
-                    updated_event.pre_cold(self._hilo.pre_cold)
-                if baselinewH > 0:
-                    updated_event.update_allowed_wh(baselinewH)
-                elif current_event.allowed_kWh > 0:
-                    updated_event.allowed_kWh = current_event.allowed_kWh
-                self._events[event_id] = updated_event
+        if event_id not in self._events:
+            return
+        changed = False
+        if challenge.get("progress") == "completed":
+            # ajout d'un asyncio sleep ici pour avoir l'état completed avant le retrait du challenge
+            await asyncio.sleep(300)
+            changed = self._events.remove(event_id)
+            self._hilo.challenge_subscriptions.discard(event_id)
+            self._consumption_refresh.forget(event_id)
+
+        # Consumption update
+        elif used_wH is not None and used_wH > 0:
+            self._consumption_refresh.frame_received(event_id, dt_util.utcnow())
+            changed = self._events.update_consumption(event_id, used_wH, baselinewH)
+        # For non consumption updates, we need an event id
+        elif event_has_id:
+            changed = self._events.patch(event_id, challenge, allowed_wh=baselinewH)
+        if changed:
             self._update_next_events()
 
     def _update_next_events(self):
-        """Update the next_events list based on current events."""
-        LOG.debug("_update_next_events sorting events")
-        # Sort events by start time
-        sorted_events = sorted(self._events.values(), key=lambda x: x.preheat_start)
-
-        self._next_events = [event.as_dict() for event in sorted_events]
+        """Refresh the next_events attribute and write the new state."""
+        self._async_update_phase()
 
         # Force an update of the entity
         self.async_write_ha_state()
 
+    @callback
+    def _async_update_phase(self) -> None:
+        """Compute the current phase and arm a timer for the next boundary."""
+        now = dt_util.utcnow()
+        self._next_events = self._events.as_list(now)
+        timelines = self._events.timelines()
+        self._state = timelines[0].state_at(now) if timelines else "off"
+        metrics = challenge_metrics(
+            next(iter(self._events), None), self._state, now, self._reward_rate
+        )
+        for key, value in metrics.items():
+            self.metric_sensors[key].async_set_metric(value)
+
+        if self._unsub_phase_timer:
+            self._unsub_phase_timer()
+            self._unsub_phase_timer = None
+        if self.hass is None:
+            # Not added yet, the timer will be armed by async_added_to_hass
+            return
+        phases = {timeline.event_id: timeline.state_at(now) for timeline in timelines}
+        for event_id, phase in phases.items():
+            previous = self._phases.get(event_id)
+            if previous is not None and previous != phase:
+                LOG.debug("Challenge %s moved from %s to %s", event_id, previous, phase)
+                self.hass.bus.async_fire(
+                    EVENT_CHALLENGE_PHASE,
+                    {"event_id": event_id, "phase": phase, "previous_phase": previous},
+                )
+        self._phases = phases
+        async_dispatcher_send(
+            self.hass, SIGNAL_CHALLENGE_UPDATE.format(self._hilo.entry.entry_id)
+        )
+        boundaries = [
+            boundary
+            for timeline in timelines
+            if (boundary := timeline.next_boundary(now)) is not None
+        ]
+        if boundaries:
+            self._unsub_phase_timer = async_track_point_in_time(
+                self.hass, self._async_handle_phase_boundary, min(boundaries)
+            )
+
+    @callback
+    def _async_handle_phase_boundary(self, now: datetime) -> None:
+        """Move to the next phase when a boundary is reached."""
+        self._unsub_phase_timer = None
+        self._async_update_phase()
+        self.async_write_ha_state()
+
     @property
     def state(self):
-        """Return the current state based on next events."""
-        if len(self._next_events) > 0:
-            event = Event(**{**{"id": 0}, **self._next_events[0]})
-            return event.state
-        return "off"
+        """Return the current phase of the next event."""
+        return self._state
 
     @property
     def icon(self):
@@ -1181,31 +1250,82 @@ class HiloChallengeSensor(HiloEntity, SensorEntity):
 
     @property
     def should_poll(self):
-        """Don't poll with websockets. Poll to update allowed_wh in pre_heat phrase and consumption in reduction phase."""
-        return self.state in ["recovery", "reduction", "pre_heat"]
+        """Poll while a challenge is coming up or ongoing.
+
+        The consumption refresh controller decides whether a request is
+        actually sent, polling is skipped when websocket updates flow in.
+        """
+        return self.state in ["scheduled", "pre_heat", "reduction", "recovery"]
 
     @property
     def extra_state_attributes(self):
         """Return the next events attribute."""
         return {"next_events": self._next_events}
 
+    @property
+    def extra_restore_state_data(self) -> RestoredExtraData:
+        """Return the events to restore after a restart."""
+        return RestoredExtraData({"events": self._events.dump()})
+
     async def async_added_to_hass(self):
         """Handle entity about to be added to hass event."""
         await super().async_added_to_hass()
+        if not self._events and (last_data := await self.async_get_last_extra_data()):
+            # Report the right phase until the hub sends the challenge list
+            self._events.restore(
+                last_data.as_dict().get("events", []), dt_util.utcnow()
+            )
+            LOG.debug("Restored %d challenge events", len(self._events))
+        self._async_update_phase()
 
         await self._hilo.subscribe_to_challengelist()
 
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the phase timer when the entity is removed."""
+        await super().async_will_remove_from_hass()
+        if self._unsub_phase_timer:
+            self._unsub_phase_timer()
+            self._unsub_phase_timer = None
+
     async def _async_update(self):
-        """Update fallback, but not needed with websockets."""
-        for event_id in self._events:
-            event = self._events.get(event_id)
-            if event.should_check_for_allowed_wh():
-                LOG.debug("ASYNC UPDATE SUB: EVENT: %s", event_id)
-                await self._hilo.subscribe_to_challenge(event_id)
-                await self._hilo.request_challenge_consumption_update(event_id)
-            elif self.state == "reduction":
-                LOG.debug("ASYNC UPDATE: EVENT: %s", event_id)
-                await self._hilo.request_challenge_consumption_update(event_id)
+        """Refresh the allowed_wh before pre_heat and the consumption afterwards."""
+        now = dt_util.utcnow()
+        await self._consumption_refresh.async_refresh(self._events.states(now), now)
+
+
+class HiloChallengeMetricSensor(HiloEntity, SensorEntity):
+    """Metric of the next challenge, computed by the challenge sensor.
+
+    These replace the template sensors from doc/templates, the challenge
+    sensor pushes a new value whenever its events change.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(self, hilo, device, key):
+        """Hilo challenge metric sensor initialization."""
+        name, icon, unit = CHALLENGE_METRIC_SENSORS[key]
+        self._attr_name = name
+        super().__init__(hilo, name=self._attr_name, device=device)
+        self._attr_unique_id = f"{device.identifier.lower()}-defi_hilo_{key}"
+        self._attr_icon = icon
+        if unit == UnitOfEnergy.KILO_WATT_HOUR:
+            self._attr_device_class = SensorDeviceClass.ENERGY
+        else:
+            self._attr_device_class = SensorDeviceClass.MONETARY
+            unit = hilo._hass.config.currency or "CAD"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_native_value = None
+        LOG.debug("Setting up ChallengeMetricSensor entity: %s", self._attr_name)
+
+    @callback
+    def async_set_metric(self, value) -> None:
+        """Set a new value, the state is only written when it changed."""
+        if value == self._attr_native_value:
+            return
+        self._attr_native_value = value
+        if self.hass is not None:
+            self.async_write_ha_state()
 
 
 class DeviceSensor(HiloEntity, SensorEntity):
@@ -1231,25 +1351,72 @@ class DeviceSensor(HiloEntity, SensorEntity):
             Platform.SENSOR,
         )
         LOG.debug("Setting up DeviceSensor entity: %s", self._attr_name)
+        self._attr_extra_state_attributes = {}
 
-    @property
-    def state(self):
-        """Return the connection state."""
-        return "on" if self._device.available else "off"
+    @callback
+    def _async_device_renamed(self, old_name: str) -> None:
+        """Move the registry entry to the unique ID built from the new name.
 
-    @property
-    def extra_state_attributes(self):
-        """Return the extra state attributes."""
-        return {k: self._device.get_value(k) for k in self._device.attributes}
+        The unique ID of this entity includes the device name, so the next
+        setup finds the same entity instead of creating a new one.
+        """
+        super()._async_device_renamed(old_name)
+        if self.registry_entry is None:
+            return
+        unique_id = f"{self._device.identifier.lower()}-{slugify(self._device.name)}"
+        try:
+            er.async_get(self.hass).async_update_entity(
+                self.entity_id, new_unique_id=unique_id
+            )
+        except ValueError as err:
+            LOG.warning("Unable to follow the rename of %s: %s", self.entity_id, err)
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the connection state and the device attributes.
+
+        The attributes mapping is only replaced when a value changed, so Home
+        Assistant can reuse the previous one instead of comparing and
+        serializing everything again.
+        """
+        super()._async_update_attrs()
+        self._attr_native_value = "on" if self._attr_available else "off"
+        self._attr_icon = (
+            "mdi:access-point-network" if self._attr_available else "mdi:lan-disconnect"
+        )
+        current = self._attr_extra_state_attributes
+        keys = self._device.attributes
+        changed = {}
+        for key in keys:
+            value = self._device.get_value(key)
+            if key not in current or current[key] != value:
+                changed[key] = value
+        if not changed and len(current) == len(keys):
+            return
+        attributes = {**current, **changed}
+        if len(attributes) != len(keys):
+            attributes = {key: attributes[key] for key in keys}
+        self._attr_extra_state_attributes = attributes
 
-    @property
-    def icon(self):
-        """Set the icon based on the connection state."""
-        if not self._device.available:
-            return "mdi:lan-disconnect"
-        if self.state == "off":
-            return "mdi:access-point-network-off"
-        return "mdi:access-point-network"
+
+_DEVICE_SENSOR_CLASSES: dict[frozenset[str], type[DeviceSensor]] = {}
+
+
+def device_sensor_class(unrecorded_attributes: frozenset[str]) -> type[DeviceSensor]:
+    """Return a DeviceSensor class keeping some attributes out of the recorder.
+
+    Unrecorded attributes are a class attribute in Home Assistant, so a
+    subclass is created once per set of attributes set in the options.
+    """
+    if not unrecorded_attributes:
+        return DeviceSensor
+    if unrecorded_attributes not in _DEVICE_SENSOR_CLASSES:
+        _DEVICE_SENSOR_CLASSES[unrecorded_attributes] = type(
+            DeviceSensor.__name__,
+            (DeviceSensor,),
+            {"_unrecorded_attributes": unrecorded_attributes},
+        )
+    return _DEVICE_SENSOR_CLASSES[unrecorded_attributes]
 
 
 class HiloCostSensor(HiloEntity, SensorEntity):
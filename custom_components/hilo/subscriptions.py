@@ -0,0 +1,128 @@
+"""SignalR challenge subscription registry for the Hilo integration."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Iterable
+
+from .const import (
+    CHALLENGE_SUBSCRIPTION_CONCURRENCY,
+    CHALLENGE_SUBSCRIPTION_RETRIES,
+    CHALLENGE_SUBSCRIPTION_RETRY_DELAY,
+    LOG,
+)
+
+
+class ChallengeSubscriptionRegistry:
+    """Keep track of the challenge subscriptions of the challenge hub.
+
+    The same event used to be subscribed to from several places (hub
+    messages, the challenge sensor and the reward sensor), one event at a
+    time. The registry remembers which event ids are already subscribed on
+    the current hub connection, skips duplicates and sends the new
+    subscriptions concurrently, with a small cap so we don't flood the hub.
+
+    Events subscribed with ``replay`` are part of the live set and get
+    subscribed again automatically after a reconnect. A failed subscription
+    is retried a few times, waiting a bit longer each time, then logged and
+    returned to the caller. Event id 0, meaning no event, is skipped.
+    """
+
+    def __init__(
+        self,
+        subscribe: Callable[[int], Awaitable[None]],
+        max_concurrency: int = CHALLENGE_SUBSCRIPTION_CONCURRENCY,
+        retries: int = CHALLENGE_SUBSCRIPTION_RETRIES,
+        retry_delay: float = CHALLENGE_SUBSCRIPTION_RETRY_DELAY,
+    ) -> None:
+        """Initialize the registry."""
+        self._subscribe = subscribe
+        self._retries = retries
+        self._retry_delay = retry_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._subscribed: set[int] = set()
+        self._in_flight: dict[int, asyncio.Future] = {}
+        self._live: set[int] = set()
+
+    @property
+    def live(self) -> frozenset[int]:
+        """Return the event ids replayed after a reconnect."""
+        return frozenset(self._live)
+
+    def is_subscribed(self, event_id: int) -> bool:
+        """Return whether the event is subscribed on the current connection."""
+        return event_id in self._subscribed
+
+    async def async_subscribe(
+        self, event_ids: Iterable[int], *, replay: bool = True, force: bool = False
+    ) -> frozenset[int]:
+        """Subscribe to the given events, skipping those already subscribed.
+
+        Returns the event ids which couldn't be subscribed.
+        """
+        pending = {}
+        for event_id in dict.fromkeys(event_ids):
+            if not event_id:
+                LOG.debug("No challenge to subscribe to, skipping")
+                continue
+            if replay:
+                self._live.add(event_id)
+            if future := self._in_flight.get(event_id):
+                pending[event_id] = future
+                continue
+            if event_id in self._subscribed and not force:
+                LOG.debug("Challenge %s is already subscribed, skipping", event_id)
+                continue
+            future = asyncio.ensure_future(self._async_run(event_id))
+            self._in_flight[event_id] = future
+            pending[event_id] = future
+        if not pending:
+            return frozenset()
+        results = await asyncio.gather(*pending.values())
+        return frozenset(event_id for event_id, ok in zip(pending, results) if not ok)
+
+    async def _async_run(self, event_id: int) -> bool:
+        try:
+            attempts = 0
+            while True:
+                attempts += 1
+                # The slot is released while waiting to retry
+                async with self._semaphore:
+                    try:
+                        await self._subscribe(event_id)
+                    except Exception as err:  # pylint: disable=broad-except
+                        error = err
+                    else:
+                        self._subscribed.add(event_id)
+                        return True
+                if attempts > self._retries:
+                    LOG.error(
+                        "Unable to subscribe to challenge %s after %s attempts: %s",
+                        event_id,
+                        attempts,
+                        error,
+                    )
+                    return False
+                LOG.debug("Retrying challenge %s subscription: %s", event_id, error)
+                await asyncio.sleep(self._retry_delay * 2 ** (attempts - 1))
+        finally:
+            self._in_flight.pop(event_id, None)
+
+    def discard(self, event_id: int) -> None:
+        """Forget an event that doesn't need updates anymore."""
+        self._live.discard(event_id)
+        self._subscribed.discard(event_id)
+
+    async def async_replay(self) -> bool:
+        """Start over on a new hub connection and replay the live set.
+
+        Returns False when there was nothing to replay. The events which
+        still fail stay in the live set for the next connection.
+        """
+        self._subscribed.clear()
+        if not self._live:
+            return False
+        LOG.debug("Replaying challenge subscriptions: %s", sorted(self._live))
+        if failed := await self.async_subscribe(list(self._live)):
+            LOG.warning("Challenges %s weren't subscribed again", sorted(failed))
+        return True
@@ -2,13 +2,16 @@
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF, STATE_ON, Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
+from pyhilo.device import HiloDevice
 from pyhilo.device.switch import Switch
 
-from . import Hilo
+from . import SIGNAL_DEVICES_ADDED, Hilo
+from .commands import DeviceCommandPipeline
 from .const import DOMAIN, LOG, SWITCH_CLASSES
 from .entity import HiloEntity
 
@@ -18,13 +21,22 @@ async def async_setup_entry(
 ) -> None:
     """Set up Hilo switches based on a config entry."""
     hilo = hass.data[DOMAIN][entry.entry_id]
-    entities = []
 
-    for d in hilo.devices.all:
-        if d.type in SWITCH_CLASSES:
-            d._entity = HiloSwitch(hilo, d)
-            entities.append(d._entity)
-    async_add_entities(entities)
+    @callback
+    def async_add_devices(devices: list[HiloDevice]) -> None:
+        entities = []
+        for d in devices:
+            if d.type in SWITCH_CLASSES:
+                d._entity = HiloSwitch(hilo, d)
+                entities.append(d._entity)
+        async_add_entities(entities)
+
+    async_add_devices(hilo.devices.all)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
 
 
 class HiloSwitch(HiloEntity, SwitchEntity):
@@ -43,11 +55,14 @@ class HiloSwitch(HiloEntity, SwitchEntity):
             self._attr_unique_id,
             Platform.SWITCH,
         )
+        self._commands = DeviceCommandPipeline(device, self.async_write_ha_state)
         LOG.debug("Setting up Switch entity: %s", self._attr_name)
 
     @property
     def state(self):
         """Return the state of the switch."""
+        if "is_on" in self._commands.pending:
+            return STATE_ON if self._commands.value("is_on") else STATE_OFF
         return self._device.state
 
     @property
@@ -62,16 +77,29 @@ class HiloSwitch(HiloEntity, SwitchEntity):
     @property
     def is_on(self):
         """Return true if the switch is on."""
-        return self._device.get_value("is_on")
+        return self._commands.value("is_on")
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Forget the expected state once the device reported it."""
+        super()._async_update_attrs()
+        self._commands.confirm()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop the expected state."""
+        await super().async_will_remove_from_hass()
+        self._commands.cancel()
 
     async def async_turn_off(self, **kwargs):
-        """Turn the switch off."""
+        """Turn the switch off.
+
+        The switch shows as off right away, and goes back to the reported
+        state if the device doesn't confirm it in time.
+        """
         LOG.info("%s Turning off", self._device._tag)
-        await self._device.set_attribute("is_on", False)
-        self.async_schedule_update_ha_state(True)
+        await self._commands.async_write({"is_on": False})
 
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
         LOG.info("%s Turning on", self._device._tag)
-        await self._device.set_attribute("is_on", True)
-        self.async_schedule_update_ha_state(True)
+        await self._commands.async_write({"is_on": True})
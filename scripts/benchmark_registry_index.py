@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Compare the entity registry lookups done while setting up Hilo entities.
+
+Before the registry index, each energy sensor scanned the whole registry to
+find its power sensor. This builds a synthetic registry for a number of
+devices and times both approaches.
+
+Usage: python scripts/benchmark_registry_index.py [devices]
+"""
+
+from pathlib import Path
+import sys
+import timeit
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.hilo.registry import EntityRegistryIndex  # noqa: E402
+
+# Entities registered by the integration for each device
+SUFFIXES = ("power", "energy", "battery", "temperature", "target-temperature")
+
+
+def build_registry(devices: int) -> list[SimpleNamespace]:
+    """Return registry entries for synthetic devices and other integrations."""
+    entries = []
+    for device in range(devices):
+        for suffix in SUFFIXES:
+            entries.append(
+                SimpleNamespace(
+                    domain="sensor",
+                    platform="hilo",
+                    unique_id=f"device{device}-{suffix}",
+                    entity_id=f"sensor.device{device}_{suffix}",
+                )
+            )
+        entries.append(
+            SimpleNamespace(
+                domain="light",
+                platform="other",
+                unique_id=f"other{device}",
+                entity_id=f"light.other{device}",
+            )
+        )
+    return entries
+
+
+def scan(entries: list, devices: int) -> list:
+    """Resolve the power sensors the way EnergySensor used to."""
+    return [
+        next(
+            (
+                entry.entity_id
+                for entry in entries
+                if entry.unique_id == f"device{device}-power"
+                and entry.platform == "hilo"
+            ),
+            None,
+        )
+        for device in range(devices)
+    ]
+
+
+def indexed(entries: list, devices: int) -> list:
+    """Resolve the power sensors through the registry index."""
+    index = EntityRegistryIndex(entries)
+    return [index.get("sensor", f"device{device}-power") for device in range(devices)]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    entries = build_registry(devices)
+    assert scan(entries, devices) == indexed(entries, devices)
+    for name, func in (("scan", scan), ("index", indexed)):
+        duration = min(
+            timeit.repeat(lambda: func(entries, devices), number=1, repeat=5)
+        )
+        print(f"{name:>5}: {duration * 1000:8.2f} ms for {devices} devices")
+
+
+if __name__ == "__main__":
+    main()
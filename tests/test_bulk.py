@@ -0,0 +1,106 @@
+"""Tests for the Hilo bulk commands."""
+
+import asyncio
+from functools import partial
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.hilo.bulk import async_run_bulk
+from custom_components.hilo.commands import DeviceCommandPipeline
+
+
+async def test_commands_run_concurrently_with_a_cap() -> None:
+    """Test that no more than max_concurrency commands run at once."""
+    running = 0
+    peak = 0
+
+    async def command():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+
+    results = await async_run_bulk(
+        {f"climate.room_{index}": command for index in range(6)}, max_concurrency=2
+    )
+
+    assert peak == 2
+    assert all(result["success"] for result in results.values())
+    assert list(results) == [f"climate.room_{index}" for index in range(6)]
+
+
+async def test_failed_commands_are_retried() -> None:
+    """Test the retries and the result of a command failing every time."""
+    flaky = AsyncMock(side_effect=[Exception("timeout"), None])
+    broken = AsyncMock(side_effect=Exception("offline"))
+
+    results = await async_run_bulk(
+        {"switch.flaky": flaky, "switch.broken": broken}, retries=2, retry_delay=0
+    )
+
+    assert results["switch.flaky"]["success"]
+    assert results["switch.flaky"]["attempts"] == 2
+    assert not results["switch.broken"]["success"]
+    assert results["switch.broken"]["attempts"] == 3
+    assert results["switch.broken"]["error"] == "offline"
+
+
+async def test_retries_release_the_concurrency_slot() -> None:
+    """Test that a command waiting to retry lets the others run."""
+    done = []
+
+    async def broken():
+        raise HomeAssistantError("offline")
+
+    async def healthy():
+        done.append(asyncio.get_running_loop().time())
+
+    started = asyncio.get_running_loop().time()
+    results = await async_run_bulk(
+        {"switch.broken": broken, "switch.healthy": healthy},
+        max_concurrency=1,
+        retries=1,
+        retry_delay=0.2,
+    )
+
+    assert results["switch.healthy"]["success"]
+    assert done[0] - started < 0.1
+    assert results["switch.broken"]["attempts"] == 2
+
+
+async def test_retried_pipeline_writes_stay_optimistic() -> None:
+    """Test that a write retried by the bulk service is shown once it's sent."""
+    values = {"is_on": False}
+    bulb = SimpleNamespace(
+        name="Bulb",
+        _tag="<Bulb>",
+        get_value=lambda attribute, default=None: values.get(attribute, default),
+        set_attribute=AsyncMock(side_effect=[Exception("timeout"), None]),
+    )
+    on_change = MagicMock()
+    commands = DeviceCommandPipeline(bulb, on_change)
+
+    results = await async_run_bulk(
+        {"light.bulb": partial(commands.async_write, {"is_on": True})},
+        retry_delay=0,
+    )
+
+    assert results["light.bulb"]["attempts"] == 2
+    assert commands.value("is_on") is True
+    # Shown, rolled back after the failure, then shown again
+    assert on_change.call_count == 3
+
+    bulb.set_attribute.side_effect = Exception("offline")
+    results = await async_run_bulk(
+        {"light.bulb": partial(commands.async_write, {"is_on": False})},
+        retries=1,
+        retry_delay=0,
+    )
+    assert not results["light.bulb"]["success"]
+    # The last failure rolled the optimistic value back
+    assert commands.pending == frozenset()
+    assert commands.value("is_on") is False
+    commands.cancel()
@@ -0,0 +1,269 @@
+"""Tests for the Hilo challenge helpers."""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from custom_components.hilo import challenge
+from custom_components.hilo.challenge import (
+    MSG_CHALLENGE_DETAILS_UPDATE,
+    ChallengeEventStore,
+    ChallengeMessageNormalizer,
+    ChallengeTimeline,
+    ConsumptionRefreshController,
+    challenge_metrics,
+)
+
+START = datetime(2025, 1, 15, 1, 0, tzinfo=timezone.utc)
+
+
+def make_event(event_id: int = 1, start: datetime = START, **extra):
+    """Build an object with the phase attributes of a pyhilo Event."""
+    phases = {
+        "preheat_start": start,
+        "preheat_end": start + timedelta(hours=2),
+        "reduction_start": start + timedelta(hours=2),
+        "reduction_end": start + timedelta(hours=6),
+        "recovery_start": start + timedelta(hours=6),
+        "recovery_end": start + timedelta(hours=7),
+    }
+    return SimpleNamespace(event_id=event_id, **phases, **extra)
+
+
+def test_duplicate_updates_are_dropped() -> None:
+    """Test that the same update from both hubs is only passed along once."""
+    normalizer = ChallengeMessageNormalizer()
+    legacy = {
+        "id": 42,
+        "locationId": 123,
+        "consumption": {"cumulativeBaselinePoints": [{"wh": 1000}]},
+    }
+    new_hub = {
+        "id": 42,
+        "locationHiloId": "urn:test",
+        "consumption": {"cumulativeBaselinePoints": [{"wh": 1000}]},
+        "cumulativeBaselinePoints": [{"wh": 1000}],
+    }
+
+    msg_type, payload = normalizer.normalize(
+        "ChallengeDetailsUpdatedValuesReceived", legacy
+    )
+    assert msg_type == MSG_CHALLENGE_DETAILS_UPDATE
+    assert "locationId" not in payload
+    assert normalizer.normalize("EventCHDetailsUpdatedValuesReceived", new_hub) is None
+
+    new_hub["currentWh"] = 500
+    assert normalizer.normalize("EventCHDetailsUpdatedValuesReceived", new_hub)
+
+
+def test_unknown_targets_are_ignored() -> None:
+    """Test that targets without a handler are dropped."""
+    assert ChallengeMessageNormalizer().normalize("ChallengeRemoved", {}) is None
+
+
+def test_legacy_no_longer_needed_after_event_list() -> None:
+    """Test that the legacy hub is flagged as unneeded once the event list arrives."""
+    normalizer = ChallengeMessageNormalizer()
+    normalizer.normalize("ChallengeListInitialValuesReceived", [])
+    assert normalizer.legacy_needed
+    normalizer.normalize("EventListInitialValuesReceived", [{"id": 1}])
+    assert not normalizer.legacy_needed
+    # The plan specific hub stays in use after a reconnect
+    normalizer.reset()
+    assert not normalizer.legacy_needed
+
+
+def test_timeline_states_and_boundaries() -> None:
+    """Test the phase computed at various times and the next boundaries."""
+    timeline = ChallengeTimeline(
+        make_event(
+            appreciation_start=START - timedelta(hours=3), appreciation_end=START
+        )
+    )
+
+    assert timeline.state_at(START - timedelta(hours=4)) == "scheduled"
+    assert timeline.next_boundary(START - timedelta(hours=4)) == START - timedelta(
+        hours=3
+    )
+    assert timeline.state_at(START - timedelta(hours=1)) == "appreciation"
+    assert timeline.state_at(START) == "pre_heat"
+    assert timeline.state_at(START + timedelta(hours=3)) == "reduction"
+    assert timeline.next_boundary(START + timedelta(hours=3)) == START + timedelta(
+        hours=6
+    )
+    assert timeline.state_at(START + timedelta(hours=6, minutes=30)) == "recovery"
+    assert timeline.state_at(START + timedelta(hours=7, minutes=1)) == "completed"
+    assert timeline.state_at(START + timedelta(hours=8)) == "off"
+    assert timeline.next_boundary(START + timedelta(hours=8)) is None
+
+
+class FakeEvent(SimpleNamespace):
+    """Stand-in for pyhilo's Event, built from a simplified payload."""
+
+    parsed = 0
+
+    def __init__(self, **payload):
+        """Parse the payload."""
+        FakeEvent.parsed += 1
+        start = payload["start"]
+        super().__init__(
+            participating=payload.get("isParticipating", False),
+            allowed_kWh=0,
+            used_kWh=0,
+            **vars(make_event(payload["id"], start)),
+        )
+
+    def update_wh(self, used_wh):
+        """Update the used energy."""
+        self.used_kWh = round(used_wh / 1000, 2)
+
+    def update_allowed_wh(self, allowed_wh):
+        """Update the allowed energy."""
+        self.allowed_kWh = round(allowed_wh / 1000, 2)
+
+    def as_dict(self):
+        """Render the event."""
+        return {"event_id": self.event_id, "used_kWh": self.used_kWh}
+
+
+@pytest.fixture
+def store(monkeypatch) -> ChallengeEventStore:
+    """Return an event store building fake events."""
+    monkeypatch.setattr(challenge, "Event", FakeEvent)
+    return ChallengeEventStore()
+
+
+def test_store_orders_by_preheat_start(store: ChallengeEventStore) -> None:
+    """Test that events are kept ordered and reordered when their phases move."""
+    store.add({"id": 1, "start": START + timedelta(days=1)})
+    store.add({"id": 2, "start": START})
+    assert [e.event_id for e in store] == [2, 1]
+    assert store.first_id() == 2
+    assert store.oldest_id() == 2
+
+    assert store.patch(2, {"start": START + timedelta(days=2)})
+    assert [e.event_id for e in store] == [1, 2]
+
+
+def test_store_patches_in_place(store: ChallengeEventStore) -> None:
+    """Test that simple fields are patched without parsing the event again."""
+    store.add({"id": 1, "start": START})
+    rendered = store.as_list(START)[0]
+    FakeEvent.parsed = 0
+
+    assert not store.patch(1, {"id": 1, "start": START})
+    assert store.as_list(START)[0] is rendered
+
+    assert store.patch(1, {"isParticipating": True})
+    assert store.get(1).participating is True
+    assert FakeEvent.parsed == 0
+
+    assert store.update_consumption(1, 1500)
+    rendered = store.as_list(START)[0]
+    assert rendered["used_kWh"] == 1.5
+    assert rendered["state"] == "pre_heat"
+    assert store.as_list(START + timedelta(hours=3))[0]["state"] == "reduction"
+    assert rendered["state"] == "pre_heat"
+
+    assert store.remove(1)
+    assert store.as_list(START) == []
+
+
+def test_store_restored_and_reconciled(store: ChallengeEventStore) -> None:
+    """Test that restored events keep their consumption once reconciled."""
+    store.add({"id": 1, "start": START})
+    store.add({"id": 2, "start": START - timedelta(days=1)})
+    store.update_consumption(1, 1500)
+    dumped = store.dump()
+
+    restored = ChallengeEventStore()
+    restored.restore(dumped, START + timedelta(hours=3))
+    # The old event is over and isn't restored
+    assert [e.event_id for e in restored] == [1]
+    assert restored.get(1).used_kWh == 1.5
+
+    assert not restored.reconcile([{"id": 1, "start": START}])
+    assert restored.get(1).used_kWh == 1.5
+    assert restored.reconcile([{"id": 3, "start": START + timedelta(days=1)}])
+    assert [e.event_id for e in restored] == [3]
+
+
+def test_store_caches_the_reduction_window(store: ChallengeEventStore) -> None:
+    """Test that the reduction window covers every event, not just the first."""
+    assert store.reduction_window(START) is None
+    store.add({"id": 1, "start": START})
+    store.add({"id": 2, "start": START + timedelta(days=1)})
+    first = (START + timedelta(hours=2), START + timedelta(hours=6))
+    assert store.reduction_window(START) == first
+    assert store.reduction_window(START + timedelta(hours=3)) == first
+
+    second = (START + timedelta(days=1, hours=2), START + timedelta(days=1, hours=6))
+    assert store.reduction_window(START + timedelta(hours=7)) == second
+    store.remove(2)
+    assert store.reduction_window(START + timedelta(hours=7)) is None
+
+
+def test_store_in_progress(store: ChallengeEventStore) -> None:
+    """Test that the next event is in progress until its recovery."""
+    assert not store.in_progress(START)
+    store.add({"id": 1, "start": START})
+    assert not store.in_progress(START - timedelta(hours=1))
+    assert store.in_progress(START)
+    assert store.in_progress(START + timedelta(hours=3))
+    assert not store.in_progress(START + timedelta(hours=6, minutes=30))
+
+
+async def test_consumption_refresh_is_paced() -> None:
+    """Test that consumption requests are skipped while frames flow in."""
+    request = AsyncMock()
+    subscribe = AsyncMock()
+    controller = ConsumptionRefreshController(
+        request, subscribe, intervals={"reduction": 120}
+    )
+    event = make_event(1, should_check_for_allowed_wh=lambda: False)
+    other = make_event(2, should_check_for_allowed_wh=lambda: False)
+    now = START + timedelta(hours=3)
+
+    assert await controller.async_refresh([(event, "pre_heat")], now) is None
+    assert (
+        await controller.async_refresh(
+            [(event, "reduction"), (other, "reduction")], now
+        )
+        == 1
+    )
+    request.assert_awaited_once_with(1)
+
+    # A frame came in since, no need to ask again
+    controller.frame_received(1, now + timedelta(seconds=100))
+    assert (
+        await controller.async_refresh(
+            [(event, "reduction")], now + timedelta(seconds=150)
+        )
+        is None
+    )
+    assert (
+        await controller.async_refresh(
+            [(event, "reduction")], now + timedelta(seconds=220)
+        )
+        == 1
+    )
+    assert request.await_count == 2
+    subscribe.assert_not_awaited()
+
+
+def test_challenge_metrics() -> None:
+    """Test the metrics extrapolated over the reduction phase."""
+    assert challenge_metrics(None, "off", START, 0.5)["used_kwh"] == 0
+
+    event = make_event(allowed_kWh=10.0, used_kWh=3.0)
+    # One hour into the four hours reduction phase
+    now = event.reduction_start + timedelta(hours=1)
+    metrics = challenge_metrics(event, "reduction", now, 0.5)
+    assert metrics["remaining_cash"] == 3.5
+    assert metrics["predicted_cash"] == -1.0
+    assert metrics["accumulated_cash"] == round((61 / 240 * 10 - 3) * 0.5, 2)
+
+    metrics = challenge_metrics(event, "recovery", event.recovery_end, 0.5)
+    assert metrics["predicted_cash"] == metrics["accumulated_cash"] == 3.5
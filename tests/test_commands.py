@@ -0,0 +1,245 @@
+"""Tests for the Hilo device command pipeline."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+
+from custom_components.hilo.commands import DeviceCommandPipeline
+
+
+def device(**values):
+    """Build an object with the device methods used by the pipeline."""
+    return SimpleNamespace(
+        name="Bulb",
+        _tag="<Bulb>",
+        values=values,
+        get_value=lambda attribute, default=None: values.get(attribute, default),
+        set_attribute=AsyncMock(),
+    )
+
+
+async def test_writes_are_optimistic_until_reported() -> None:
+    """Test that written values are shown until the device reports them."""
+    bulb = device(is_on=False, intensity=0.1)
+    on_change = MagicMock()
+    commands = DeviceCommandPipeline(bulb, on_change)
+
+    await commands.async_write({"is_on": True, "intensity": 0.5})
+
+    assert bulb.set_attribute.await_count == 2
+    assert commands.value("is_on") is True
+    assert commands.pending == {"is_on", "intensity"}
+    bulb.values["is_on"] = True
+    commands.confirm()
+    assert commands.pending == {"intensity"}
+    assert on_change.call_count == 1
+
+
+async def test_reported_values_are_not_optimistic() -> None:
+    """Test that writing the value a device reports doesn't wait for it."""
+    outlet = device(is_on=False)
+    commands = DeviceCommandPipeline(outlet, MagicMock(), confirm_timeout=0)
+
+    await commands.async_write({"is_on": False})
+    await asyncio.sleep(0)
+
+    outlet.set_attribute.assert_awaited_once_with("is_on", False)
+    assert not commands.pending
+
+
+async def test_writes_in_flight_are_merged() -> None:
+    """Test that the writes queued during a command are sent together."""
+    bulb = device()
+    sent = asyncio.Event()
+
+    async def set_attribute(attribute, value):
+        await sent.wait()
+
+    bulb.set_attribute = AsyncMock(side_effect=set_attribute)
+    commands = DeviceCommandPipeline(bulb, MagicMock())
+    first = asyncio.ensure_future(commands.async_write({"is_on": True}))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(commands.async_write({"hue": 10}))
+    third = asyncio.ensure_future(commands.async_write({"hue": 20}))
+    await asyncio.sleep(0)
+    sent.set()
+    await asyncio.gather(first, second, third)
+
+    assert [call.args for call in bulb.set_attribute.await_args_list] == [
+        ("is_on", True),
+        ("hue", 20),
+    ]
+
+
+async def test_lights_are_turned_on_first() -> None:
+    """Test that is_on is set before the other attributes of a command."""
+    bulb = device(is_on=False, intensity=0.1)
+    commands = DeviceCommandPipeline(bulb, MagicMock())
+
+    await commands.async_write({"intensity": 0.5, "is_on": True})
+
+    assert [call.args for call in bulb.set_attribute.await_args_list] == [
+        ("is_on", True),
+        ("intensity", 0.5),
+    ]
+
+    bulb.set_attribute.reset_mock()
+    bulb.set_attribute.side_effect = Exception("offline")
+    with pytest.raises(HomeAssistantError):
+        await commands.async_write({"intensity": 0.8, "is_on": False})
+
+    bulb.set_attribute.assert_awaited_once_with("is_on", False)
+    assert commands.value("intensity") == 0.1
+    commands.cancel()
+
+
+async def test_failed_writes_are_rolled_back() -> None:
+    """Test that a failed write shows the device value again."""
+    bulb = device(is_on=False)
+    bulb.set_attribute.side_effect = Exception("API down")
+    commands = DeviceCommandPipeline(bulb, MagicMock())
+
+    with pytest.raises(HomeAssistantError):
+        await commands.async_write({"is_on": True})
+
+    assert commands.value("is_on") is False
+    assert not commands.pending
+
+
+async def test_unconfirmed_writes_expire() -> None:
+    """Test that a value never reported by the device expires."""
+    bulb = device(is_on=False)
+    on_change = MagicMock()
+    commands = DeviceCommandPipeline(bulb, on_change, confirm_timeout=0)
+
+    await commands.async_write({"is_on": True})
+    await asyncio.sleep(0)
+
+    assert commands.value("is_on") is False
+    assert on_change.call_count == 2
+
+
+async def test_staged_values_are_sent_once() -> None:
+    """Test that only the last staged value of an attribute is sent."""
+    thermostat = device(target_temperature=20)
+    commands = DeviceCommandPipeline(thermostat, MagicMock())
+
+    for target in (20.5, 21, 21.5):
+        commands.stage({"target_temperature": target})
+    assert commands.value("target_temperature") == 21.5
+    assert not thermostat.set_attribute.await_count
+    await commands.async_flush()
+    await commands.async_flush()
+
+    thermostat.set_attribute.assert_awaited_once_with("target_temperature", 21.5)
+
+
+async def test_rounded_values_are_confirmed() -> None:
+    """Test that the numbers rounded by the device confirm the written ones."""
+    bulb = device(intensity=0.1, hue=0)
+    commands = DeviceCommandPipeline(bulb, MagicMock())
+
+    await commands.async_write({"intensity": 128 / 255, "hue": 212.47})
+    bulb.values.update(intensity=0.5, hue=212)
+    commands.confirm()
+    assert commands.pending == frozenset()
+
+    await commands.async_write({"intensity": 0.8})
+    bulb.values["intensity"] = 0.5
+    commands.confirm()
+    assert commands.pending == {"intensity"}
+    commands.cancel()
+
+
+async def test_target_temperatures_must_match() -> None:
+    """Test that a close target temperature doesn't confirm the written one."""
+    thermostat = device(target_temperature=20)
+    commands = DeviceCommandPipeline(thermostat, MagicMock())
+
+    await commands.async_write({"target_temperature": 21.5})
+    thermostat.values["target_temperature"] = 21.0
+    commands.confirm()
+    assert commands.value("target_temperature") == 21.5
+
+    thermostat.values["target_temperature"] = 21.5
+    commands.confirm()
+    assert not commands.pending
+
+
+async def test_cancelled_writes_are_not_failures() -> None:
+    """Test that a cancelled write is cancelled, not reported as failed."""
+    bulb = device(is_on=False)
+    bulb.set_attribute.side_effect = asyncio.CancelledError
+    commands = DeviceCommandPipeline(bulb, MagicMock())
+
+    with pytest.raises(asyncio.CancelledError):
+        await commands.async_write({"is_on": True})
+    commands.cancel()
+
+
+async def test_staged_values_report_the_outcome() -> None:
+    """Test that the callers of a debounced write get its outcome."""
+    bulb = device(target_temperature=20)
+    commands = DeviceCommandPipeline(bulb, MagicMock())
+
+    commands.stage({"target_temperature": 21})
+    first = commands.sent()
+    commands.stage({"target_temperature": 22})
+    second = commands.sent()
+    await commands.async_flush()
+    await first
+    await second
+
+    bulb.set_attribute.side_effect = Exception("offline")
+    commands.stage({"target_temperature": 23})
+    sent = commands.sent()
+    with pytest.raises(HomeAssistantError):
+        await commands.async_flush()
+    with pytest.raises(HomeAssistantError):
+        await sent
+    commands.cancel()
+
+
+async def test_debounced_writes_during_a_flush_are_sent() -> None:
+    """Test that a value written while a flush is in flight is sent after it."""
+    thermostat = device(target_temperature=20)
+    released = asyncio.Event()
+
+    async def set_attribute(attribute, value):
+        await released.wait()
+
+    thermostat.set_attribute = AsyncMock(side_effect=set_attribute)
+    commands = DeviceCommandPipeline(thermostat, MagicMock())
+    first = asyncio.ensure_future(
+        commands.async_write_debounced({"target_temperature": 21}, 0)
+    )
+    while not thermostat.set_attribute.await_count:
+        await asyncio.sleep(0)
+    second = asyncio.ensure_future(
+        commands.async_write_debounced({"target_temperature": 22}, 0)
+    )
+    await asyncio.sleep(0.01)
+    released.set()
+    await asyncio.wait_for(asyncio.gather(first, second), 1)
+
+    assert [call.args for call in thermostat.set_attribute.await_args_list] == [
+        ("target_temperature", 21),
+        ("target_temperature", 22),
+    ]
+    commands.cancel()
+
+
+async def test_debounced_writes_time_out() -> None:
+    """Test that a debounced write never sent raises instead of hanging."""
+    thermostat = device(target_temperature=20)
+    thermostat.set_attribute = AsyncMock(side_effect=asyncio.Event().wait)
+    commands = DeviceCommandPipeline(thermostat, MagicMock())
+
+    with pytest.raises(HomeAssistantError):
+        await commands.async_write_debounced(
+            {"target_temperature": 21}, 0, timeout=0.01
+        )
+    commands.cancel()
@@ -0,0 +1,125 @@
+"""Tests for the Hilo energy accumulator."""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.hilo.energy import EnergyAccumulator, period_start
+
+
+def device(device_id: int, **values):
+    """Build an object with the device attributes read by the accumulator."""
+    return SimpleNamespace(
+        id=device_id,
+        name=f"Device {device_id}",
+        values=values,
+        has_attribute=lambda attribute: attribute in values,
+        get_value=lambda attribute, default=None: values.get(attribute, default),
+    )
+
+
+@pytest.fixture
+def timer():
+    """Replace the shared catch-up timer and the period reset."""
+    with (
+        patch("custom_components.hilo.energy.async_track_point_in_time"),
+        patch(
+            "custom_components.hilo.energy.async_track_time_interval"
+        ) as track_time_interval,
+    ):
+        yield track_time_interval
+
+
+def test_power_integrated_from_samples(timer) -> None:
+    """Test the left Riemann sum of the power samples."""
+    accumulator = EnergyAccumulator(MagicMock(), max_sub_interval=120)
+    heater = device(1, power=1000)
+    listener = MagicMock()
+    accumulator.async_track(heater, 10.0, listener, now=0)
+
+    heater.values["power"] = 2000
+    accumulator.async_sample([heater, device(2)], now=1800)
+    assert accumulator.energy(1) == pytest.approx(10.5)
+    accumulator.async_sample([heater], now=3600)
+    assert accumulator.energy(1) == pytest.approx(11.5)
+    assert listener.call_count == 2
+    assert accumulator.energy(2) is None
+
+
+def test_single_timer_catches_up(timer) -> None:
+    """Test that one timer integrates the devices without recent samples."""
+    accumulator = EnergyAccumulator(MagicMock(), max_sub_interval=120)
+    heater = device(1, power=3600)
+    outlet = device(2, power=None)
+    untrack_heater = accumulator.async_track(heater, 0, MagicMock(), now=0)
+    untrack_outlet = accumulator.async_track(outlet, 0, MagicMock(), now=0)
+    assert timer.call_count == 1
+
+    accumulator.async_sample([outlet], now=100)
+    accumulator.async_catch_up(now=150)
+    assert accumulator.energy(1) == pytest.approx(0.15)
+    assert accumulator._sampled[1] == 100
+
+    untrack_heater()
+    assert len(accumulator) == 1
+    untrack_outlet()
+    timer.return_value.assert_called_once()
+
+
+def test_energy_counter_preferred(timer) -> None:
+    """Test that a counter is followed through resets and rollovers."""
+    accumulator = EnergyAccumulator(MagicMock(), max_sub_interval=120)
+    meter = device(1, power=5000, energy=1000)
+    accumulator.async_track(meter, 2.0, MagicMock(), now=0)
+
+    meter.values["energy"] = 1500
+    accumulator.async_sample([meter], now=3600)
+    assert accumulator.energy(1) == pytest.approx(2.5)
+    meter.values["energy"] = 200
+    accumulator.async_sample([meter], now=3700)
+    assert accumulator.energy(1) == pytest.approx(2.7)
+    meter.values["energy"] = 2**32 - 1000
+    accumulator.async_sample([meter], now=3800)
+    energy = accumulator.energy(1)
+    meter.values["energy"] = 500
+    accumulator.async_sample([meter], now=3900)
+    assert accumulator.energy(1) == pytest.approx(energy + 1.5)
+
+
+def test_energy_split_by_tariff(timer) -> None:
+    """Test that the energy goes to the bucket of the current tariff."""
+    accumulator = EnergyAccumulator(MagicMock(), max_sub_interval=120)
+    meter = device(1, power=1000)
+    heater = device(2, power=2000)
+    accumulator.async_track(meter, 0, MagicMock(), now=0)
+    accumulator.async_track(heater, 0, MagicMock(), now=0)
+    for tariff in ("low", "medium"):
+        accumulator.async_track_tariff(meter, tariff, 1.0, MagicMock())
+    total_listener = MagicMock()
+    accumulator.async_track_tariff(heater, "total", 0, total_listener)
+
+    accumulator.async_set_tariff("medium", now=3600)
+    accumulator.async_sample([meter, heater], now=7200)
+
+    assert accumulator.tariff_energy(1, "low") == pytest.approx(2.0)
+    assert accumulator.tariff_energy(1, "medium") == pytest.approx(2.0)
+    assert accumulator.tariff_energy(2, "total") == pytest.approx(4.0)
+    assert accumulator.collecting(1, "medium")
+    assert not accumulator.collecting(1, "low")
+    assert accumulator.collecting(2, "total")
+    assert total_listener.call_count == 3
+
+    accumulator._async_reset_period(datetime(2026, 1, 2, 5, tzinfo=timezone.utc))
+    assert accumulator.tariff_energy(1, "medium") == 0
+    assert accumulator.tariff_energy(2, "total") == 0
+
+
+def test_period_start() -> None:
+    """Test the start of the periods of the meters."""
+    now = datetime(2026, 3, 12, 15, 30, tzinfo=timezone.utc)
+    assert period_start(now, "hourly") == datetime(2026, 3, 12, 15, tzinfo=timezone.utc)
+    assert period_start(now, "daily") == datetime(2026, 3, 12, tzinfo=timezone.utc)
+    assert period_start(now, "weekly") == datetime(2026, 3, 9, tzinfo=timezone.utc)
+    assert period_start(now, "monthly") == datetime(2026, 3, 1, tzinfo=timezone.utc)
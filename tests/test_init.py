@@ -1,10 +1,170 @@
 """Test component setup."""
 
+from unittest.mock import AsyncMock, MagicMock, patch
+
 from homeassistant.setup import async_setup_component
+import pytest
 
+from custom_components.hilo import (
+    SIGNAL_DEVICE_RENAMED,
+    Hilo,
+    _async_remove_challenge_in_progress_sensor,
+    _async_remove_stale_devices,
+    signalr_device_id,
+)
 from custom_components.hilo.const import DOMAIN
 
 
 async def test_async_setup(hass):
     """Test the component gets setup."""
     assert await async_setup_component(hass, DOMAIN, {}) is True
+
+
+@pytest.mark.parametrize(
+    ("argument", "device_id"),
+    [(42, 42), ("42", 42), ({"deviceId": 42}, 42), ({"id": 42}, 42), ({}, None)],
+)
+def test_signalr_device_id(argument, device_id) -> None:
+    """Test reading the device id of the SignalR device messages."""
+    assert signalr_device_id(argument) == device_id
+
+
+def test_remove_device() -> None:
+    """Test that a deleted device is forgotten along with its registry device."""
+    device = MagicMock(id=42, identifier="abc")
+    hilo = MagicMock()
+    hilo.devices.all = [device]
+    hilo.devices.find_device.side_effect = lambda device_id: (
+        device if device_id == 42 else None
+    )
+    registry = MagicMock()
+    with patch("custom_components.hilo.dr.async_get", return_value=registry):
+        Hilo.async_remove_device(hilo, 7)
+        registry.async_update_device.assert_not_called()
+
+        Hilo.async_remove_device(hilo, 42)
+
+    assert hilo.devices.all == []
+    registry.async_get_device.assert_called_once_with(identifiers={(DOMAIN, "abc")})
+    registry.async_update_device.assert_called_once_with(
+        registry.async_get_device.return_value.id,
+        remove_config_entry_id=hilo.entry.entry_id,
+    )
+
+
+def test_rename_devices() -> None:
+    """Test that renames are applied to the known devices in place."""
+    device = MagicMock(id=42, identifier="abc")
+    device.name = "Salon"
+    hilo = MagicMock()
+    hilo.devices.find_device.side_effect = lambda device_id: (
+        device if device_id == 42 else None
+    )
+    registry = MagicMock()
+    with (
+        patch("custom_components.hilo.dr.async_get", return_value=registry),
+        patch("custom_components.hilo.async_dispatcher_send") as dispatcher_send,
+    ):
+        Hilo.async_rename_devices(
+            hilo,
+            [
+                {"id": 42, "name": "Cuisine"},
+                {"id": 7, "name": "Chambre"},
+                {"id": 42, "name": "Cuisine"},
+            ],
+        )
+
+    assert device.name == "Cuisine"
+    registry.async_update_device.assert_called_once_with(
+        registry.async_get_device.return_value.id, name="Cuisine"
+    )
+    dispatcher_send.assert_called_once_with(
+        hilo._hass, SIGNAL_DEVICE_RENAMED.format(42), "Salon"
+    )
+
+
+def test_subscription_result_samples_energy() -> None:
+    """Test that the GraphQL device updates are sampled by the accumulator."""
+    device = MagicMock(hilo_id="urn-1")
+    hilo = MagicMock()
+    hilo.devices.all = [MagicMock(hilo_id="urn-2"), device]
+    with patch("custom_components.hilo.async_dispatcher_send") as dispatcher_send:
+        Hilo.handle_subscription_result(hilo, "urn-1")
+        Hilo.handle_subscription_result(hilo, "urn-3")
+
+    hilo.energy.async_sample.assert_called_once_with([device])
+    assert dispatcher_send.call_count == 2
+
+
+def test_legacy_challenges_only_after_timeout() -> None:
+    """Test that the legacy challenge methods are a fallback for event hubs."""
+    hilo = MagicMock(hq_plan_name="rate d", _legacy_challenges_fallback=False)
+    hilo.challenge_messages.legacy_needed = True
+    assert not Hilo.legacy_challenges_needed.fget(hilo)
+
+    hilo._legacy_challenges_fallback = True
+    assert Hilo.legacy_challenges_needed.fget(hilo)
+    # The event hub answered late, it's used from now on
+    hilo.challenge_messages.legacy_needed = False
+    assert not Hilo.legacy_challenges_needed.fget(hilo)
+
+    hilo.hq_plan_name = "rate g"
+    assert Hilo.legacy_challenges_needed.fget(hilo)
+
+
+async def test_event_list_timeout_falls_back_on_legacy() -> None:
+    """Test that the legacy subscriptions are sent once the event list is late."""
+    hilo = MagicMock(_legacy_challenges_fallback=False)
+    hilo.subscribe_to_challengelist = AsyncMock()
+    hilo.challenge_subscriptions.async_replay = AsyncMock()
+    hilo.challenge_messages.legacy_needed = False
+    await Hilo._async_event_list_timeout(hilo, None)
+    assert not hilo._legacy_challenges_fallback
+    hilo.subscribe_to_challengelist.assert_not_awaited()
+
+    hilo.challenge_messages.legacy_needed = True
+    await Hilo._async_event_list_timeout(hilo, None)
+    assert hilo._legacy_challenges_fallback
+    hilo.subscribe_to_challengelist.assert_awaited_once()
+    hilo.challenge_subscriptions.async_replay.assert_awaited_once()
+
+
+def test_remove_challenge_in_progress_sensor() -> None:
+    """Test that the enum sensor replaced by the binary sensor is removed."""
+    registry = MagicMock()
+    registry.async_get_entity_id.return_value = "sensor.defi_hilo_en_cours"
+    with patch("custom_components.hilo.er.async_get", return_value=registry):
+        _async_remove_challenge_in_progress_sensor(
+            MagicMock(), MagicMock(identifier="AA:BB")
+        )
+
+    registry.async_get_entity_id.assert_called_once_with(
+        "sensor", DOMAIN, "aa:bb-defi_hilo_in_progress"
+    )
+    registry.async_remove.assert_called_once_with("sensor.defi_hilo_en_cours")
+
+
+def test_remove_stale_devices() -> None:
+    """Test that the devices deleted while stopped are removed at setup."""
+    hilo = MagicMock(unknown_tracker_device=None)
+    hilo.devices.all = [MagicMock(identifier="abc")]
+    entry = MagicMock(entry_id="entry")
+    kept = MagicMock(identifiers={(DOMAIN, "abc")})
+    stale = MagicMock(identifiers={(DOMAIN, "def")})
+    registry = MagicMock()
+    with (
+        patch("custom_components.hilo.dr.async_get", return_value=registry),
+        patch(
+            "custom_components.hilo.dr.async_entries_for_config_entry",
+            return_value=[kept, stale],
+        ),
+    ):
+        _async_remove_stale_devices(MagicMock(), entry, hilo)
+        registry.async_update_device.assert_called_once_with(
+            stale.id, remove_config_entry_id="entry"
+        )
+
+        hilo.devices.all = []
+        registry.async_update_device.reset_mock()
+        _async_remove_stale_devices(MagicMock(), entry, hilo)
+        registry.async_update_device.assert_not_called()
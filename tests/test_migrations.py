@@ -0,0 +1,44 @@
+"""Tests for the Hilo one-shot migrations."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from custom_components.hilo.migrations import (
+    MIGRATION_ENTITY_IDS,
+    MIGRATION_UNIQUE_IDS,
+    MigrationTracker,
+)
+
+
+def tracker(data: dict) -> tuple[MigrationTracker, SimpleNamespace, MagicMock]:
+    """Build a tracker whose config entry updates are applied in place."""
+    entry = SimpleNamespace(data=data)
+    hass = MagicMock()
+
+    def update_entry(config_entry, data):
+        config_entry.data = data
+
+    hass.config_entries.async_update_entry.side_effect = update_entry
+    return MigrationTracker(hass, entry), entry, hass
+
+
+def test_migrations_run_once() -> None:
+    """Test that completed migrations are recorded in the entry data."""
+    migrations, entry, hass = tracker({"token": "abc"})
+    assert migrations.pending(MIGRATION_ENTITY_IDS)
+    migrations.async_mark_done(MIGRATION_ENTITY_IDS, MIGRATION_UNIQUE_IDS)
+    assert not migrations.pending(MIGRATION_ENTITY_IDS)
+    assert not migrations.pending(MIGRATION_UNIQUE_IDS)
+    assert entry.data["token"] == "abc"
+    migrations.async_mark_done(MIGRATION_ENTITY_IDS)
+    assert hass.config_entries.async_update_entry.call_count == 1
+
+
+def test_migrations_reset() -> None:
+    """Test that a reset makes every migration pending again."""
+    migrations, entry, hass = tracker({"migrations": [MIGRATION_ENTITY_IDS]})
+    migrations.async_reset()
+    assert migrations.pending(MIGRATION_ENTITY_IDS)
+    assert "migrations" not in entry.data
+    migrations.async_reset()
+    assert hass.config_entries.async_update_entry.call_count == 1
@@ -0,0 +1,39 @@
+"""Tests for the Hilo entity registry index."""
+
+from types import SimpleNamespace
+
+from custom_components.hilo.registry import EntityRegistryIndex
+
+
+def entry(unique_id: str, entity_id: str, platform: str = "hilo"):
+    """Build an object with the attributes of a registry entry."""
+    return SimpleNamespace(
+        domain=entity_id.split(".")[0],
+        platform=platform,
+        unique_id=unique_id,
+        entity_id=entity_id,
+    )
+
+
+def test_index_only_keeps_hilo_entities() -> None:
+    """Test lookups by platform and unique id."""
+    index = EntityRegistryIndex(
+        [
+            entry("abc-power", "sensor.heater_power"),
+            entry("abc-power", "sensor.other_power", platform="other"),
+            entry("abc-climate", "climate.heater"),
+        ]
+    )
+    assert len(index) == 2
+    assert index.get("sensor", "abc-power") == "sensor.heater_power"
+    assert index.get("climate", "abc-power") is None
+
+
+def test_index_follows_migrations() -> None:
+    """Test that a migrated unique id is found under its new value."""
+    index = EntityRegistryIndex([entry("heater-power", "sensor.heater_power")])
+    index.move("sensor", "heater-power", "abc-power")
+    assert index.get("sensor", "heater-power") is None
+    assert index.get("sensor", "abc-power") == "sensor.heater_power"
+    index.move("sensor", "missing", "abc-missing")
+    assert index.get("sensor", "abc-missing") is None
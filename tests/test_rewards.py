@@ -0,0 +1,46 @@
+"""Tests for the Hilo reward history helpers."""
+
+from custom_components.hilo.rewards import SeasonEvents, paginate_history
+
+
+def test_season_events_sorted_by_id() -> None:
+    """Test that events stay sorted by id regardless of insertion order."""
+    events = SeasonEvents([{"event_id": 30}, {"event_id": 10}])
+    assert events.upsert({"event_id": 20}) is True
+    assert [e["event_id"] for e in events.as_list()] == [10, 20, 30]
+    events.upsert({"event_id": 5})
+    assert [e["event_id"] for e in events.page(0, 2)] == [30, 20]
+    events.remove(20)
+    assert [e["event_id"] for e in events] == [5, 10, 30]
+
+
+def test_season_events_upsert_replaces() -> None:
+    """Test that an update replaces the existing event in place."""
+    events = SeasonEvents([{"event_id": 10, "reward": 0.0}])
+    assert events.upsert({"event_id": "10", "reward": 1.5}) is False
+    assert len(events) == 1
+    assert events.get(10)["reward"] == 1.5
+    events.remove(10)
+    assert 10 not in events
+    assert events.as_list() == []
+
+
+def test_paginate_history() -> None:
+    """Test season filtering and newest-first paging of the history."""
+    history = [
+        {
+            "season": 2025,
+            "totalReward": 3.0,
+            "events": SeasonEvents({"event_id": i} for i in range(1, 6)),
+        },
+        {"season": 2024, "totalReward": 1.0, "events": SeasonEvents()},
+    ]
+    page = paginate_history(history, season="2025", offset=1, limit=2)
+    assert page["offset"] == 1
+    assert page["limit"] == 2
+    assert len(page["seasons"]) == 1
+    season = page["seasons"][0]
+    assert season["event_count"] == 5
+    assert season["totalReward"] == 3.0
+    assert [e["event_id"] for e in season["events"]] == [4, 3]
+    assert paginate_history(history, offset=10)["seasons"][0]["events"] == []
@@ -0,0 +1,61 @@
+"""Tests for the Hilo sensor descriptions."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.exceptions import ServiceValidationError
+import pytest
+
+from custom_components.hilo.sensor import (
+    DEVICE_SENSORS,
+    HiloRewardSensor,
+    async_get_reward_history,
+)
+
+
+def device(model: str = "Model", **values):
+    """Build an object with the device attributes used by the descriptions."""
+    return SimpleNamespace(
+        model=model,
+        has_attribute=lambda attribute: attribute in values,
+        get_value=lambda attribute, default=None: values.get(attribute, default),
+    )
+
+
+def test_descriptions_match_device_attributes() -> None:
+    """Test that only the sensors of the available attributes are described."""
+    thermostat = device(current_temperature=21.5, target_temperature=20, power=0)
+    keys = [
+        description.key
+        for description in DEVICE_SENSORS
+        if description.supports(thermostat)
+    ]
+    assert keys == ["temperature", "power", "target-temperature"]
+
+
+def test_description_values_and_icons() -> None:
+    """Test the value and icon functions of the descriptions."""
+    sensors = {description.key: description for description in DEVICE_SENSORS}
+    battery = sensors["battery"]
+    assert battery.value_fn("54") == 54
+    assert battery.icon_fn(device(), 54) == "mdi:battery-50"
+    assert battery.icon_fn(device(), 4) == "mdi:battery-alert"
+    wifi = sensors["wifistrength"]
+    assert wifi.value_fn(60) == "High"
+    assert wifi.icon_fn(device(wifi_status=60), "High") == "mdi:wifi-strength-3"
+    assert wifi.icon_fn(device(wifi_status=0), "Full") == "mdi:wifi-strength-off"
+    assert wifi.attributes_fn(device(wifi_status=60)) == {"wifi_signal": 60}
+
+
+async def test_reward_history_only_from_the_reward_sensor() -> None:
+    """Test that the reward history service rejects the other sensors."""
+    call = SimpleNamespace(data={"offset": 0, "limit": 10})
+    with pytest.raises(ServiceValidationError):
+        await async_get_reward_history(
+            MagicMock(entity_id="sensor.hilo_rate_low"), call
+        )
+
+    rewards = MagicMock(spec=HiloRewardSensor)
+    rewards.async_get_reward_history = AsyncMock(return_value={"seasons": []})
+    assert await async_get_reward_history(rewards, call) == {"seasons": []}
+    rewards.async_get_reward_history.assert_awaited_once_with(None, 0, 10)
@@ -0,0 +1,72 @@
+"""Tests for the Hilo challenge subscription registry."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+from custom_components.hilo.subscriptions import ChallengeSubscriptionRegistry
+
+
+async def test_subscriptions_are_deduplicated() -> None:
+    """Test that an event is only subscribed once per connection."""
+    subscribe = AsyncMock()
+    registry = ChallengeSubscriptionRegistry(subscribe)
+
+    await asyncio.gather(
+        registry.async_subscribe([1, 2, 2]), registry.async_subscribe([1])
+    )
+    await registry.async_subscribe([2, 3], replay=False)
+
+    assert sorted(call.args[0] for call in subscribe.await_args_list) == [1, 2, 3]
+    assert registry.live == {1, 2}
+
+
+async def test_live_set_replayed_after_reconnect() -> None:
+    """Test that only the live set is replayed on a new connection."""
+    subscribe = AsyncMock()
+    registry = ChallengeSubscriptionRegistry(subscribe)
+    await registry.async_subscribe([1, 2])
+    await registry.async_subscribe([3], replay=False)
+    registry.discard(2)
+    subscribe.reset_mock()
+
+    assert await registry.async_replay() is True
+    assert [call.args[0] for call in subscribe.await_args_list] == [1]
+    assert registry.is_subscribed(1)
+    assert not registry.is_subscribed(3)
+
+
+async def test_failed_subscription_is_retried() -> None:
+    """Test that a failed subscription isn't recorded as subscribed."""
+    subscribe = AsyncMock(side_effect=[Exception("hub down"), None])
+    registry = ChallengeSubscriptionRegistry(subscribe, retries=0)
+
+    assert await registry.async_subscribe([1]) == {1}
+    assert not registry.is_subscribed(1)
+    assert await registry.async_subscribe([1]) == frozenset()
+    assert registry.is_subscribed(1)
+
+
+async def test_failed_subscription_retried_with_backoff() -> None:
+    """Test the retries of a failed subscription and the reported failures."""
+    subscribe = AsyncMock(
+        side_effect=[Exception("timeout"), None] + [Exception("hub down")] * 3
+    )
+    registry = ChallengeSubscriptionRegistry(subscribe, retries=2, retry_delay=0)
+
+    assert await registry.async_subscribe([1]) == frozenset()
+    assert registry.is_subscribed(1)
+    assert await registry.async_subscribe([2]) == {2}
+    assert not registry.is_subscribed(2)
+    assert subscribe.await_count == 5
+    # Still part of the live set, for the next connection
+    assert registry.live == {1, 2}
+
+
+async def test_no_event_is_not_subscribed() -> None:
+    """Test that event id 0, meaning no event, isn't subscribed."""
+    subscribe = AsyncMock()
+    registry = ChallengeSubscriptionRegistry(subscribe)
+
+    assert await registry.async_subscribe([0]) == frozenset()
+    subscribe.assert_not_awaited()
+    assert registry.live == frozenset()